@@ -1,12 +1,10 @@
+import argparse
+import os
+import sys
 import pandas as pd
-import numpy as np
-from datetime import datetime
 
-# Load gold price data
-gold_df = pd.read_csv("XAUUSD_MN1.csv")
-gold_df['date'] = pd.to_datetime(gold_df['time']).dt.to_period('M').dt.to_timestamp()
-gold_df = gold_df[['date', 'close']]
-gold_df.rename(columns={'close': 'price'}, inplace=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from macro_store import ReleaseStore
 
 # Define macroeconomic file paths
 macro_files = {
@@ -18,54 +16,50 @@ macro_files = {
     'PPI': "PPI.csv"
 }
 
-# Function to normalize NFP values like '151K', '1.2M'
-def normalize_nfp(value):
-    if isinstance(value, str):
-        value = value.replace(',', '').strip()
-        if value.endswith('K'):
-            return float(value[:-1]) * 1000
-        elif value.endswith('M'):
-            return float(value[:-1]) * 1_000_000
-        else:
-            try:
-                return float(value)
-            except:
-                return np.nan
-    return value
+# Output grids: pandas period of a row and the dataset name; weeks run
+# Sunday to Saturday like MetaTrader's weekly bars
+GRIDS = {
+    'M': ('M', 'monthly'),
+    'W': ('W-SAT', 'weekly'),
+    'D': ('D', 'daily'),
+}
+
+def load_macro_store(files=macro_files):
+    # One store for all factors: dated on the 'date' column (no time of day), values
+    # as floats ('151K' -> 151000.0, '1.2M' -> 1200000.0), rows with invalid dates dropped
+    return ReleaseStore.from_files(files, date_col='date', time_col=None, fields=['Actual'])
 
-# Load and process each macro file
-macro_data = {}
-for label, file_path in macro_files.items():
-    df = pd.read_csv(file_path)
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df = df.dropna(subset=['date'])  # drop rows with invalid dates
-    if label == 'NFP':
-        df['Actual'] = df['Actual'].apply(normalize_nfp)
-    else:
-        df['Actual'] = pd.to_numeric(df['Actual'], errors='coerce')
-    df = df[['date', 'Actual']].sort_values('date')
-    macro_data[label] = df
+def build_dataset(prices_file, horizon='M', store=None):
+    """
+    One row per bar of `prices_file` (time, close): the start of the bar's period,
+    the Actual of every factor for that period and the close as price.
+    """
+    freq = GRIDS[horizon][0]
+    store = store if store is not None else load_macro_store()
+    prices = pd.read_csv(prices_file)
+    gold_df = pd.DataFrame({
+        'date': pd.to_datetime(prices['time']).dt.to_period(freq).dt.to_timestamp(),
+        'price': prices['close'],
+    })
 
-# Function to get the latest available macro value for a month
-def map_macro_to_date(target_date, macro_df):
-    target_month = target_date.to_period('M')
-    same_month = macro_df[macro_df['date'].dt.to_period('M') == target_month]
-    if not same_month.empty:
-        return same_month.iloc[-1]['Actual']
-    else:
-        prev = macro_df[macro_df['date'] < target_date]
-        if not prev.empty:
-            return prev.iloc[-1]['Actual']
-    return np.nan
+    # Last release inside the period, else the latest before it: one as-of
+    # lookup at each period's end for all factors (same store as the intraday merges)
+    macro = store.as_of_period(gold_df['date'], freq, fields=['Actual'])
+    macro.columns = [c[:-len('_Actual')] for c in macro.columns]
 
-# Map each macro to the gold price dataframe
-for label, macro_df in macro_data.items():
-    gold_df[label] = gold_df['date'].apply(lambda x: map_macro_to_date(x, macro_df))
+    # Final ordering of columns
+    return pd.concat([gold_df[['date']], macro, gold_df[['price']]], axis=1)
 
-# Final ordering of columns
-final_df = gold_df[['date', 'CPI', 'GDP', 'I_R', 'NFP', 'PCE', 'PPI', 'price']]
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Macro + gold price dataset on a monthly / weekly / daily grid.')
+    parser.add_argument('--prices', default='XAUUSD_MN1.csv', help='price bars with time and close columns')
+    parser.add_argument('--horizon', choices=list(GRIDS), default='M')
+    parser.add_argument('--out', help='default: {monthly,weekly,daily}_macro_gold_dataset.csv')
+    args = parser.parse_args()
+    output_file = args.out or f"{GRIDS[args.horizon][1]}_macro_gold_dataset.csv"
 
-# Optional: save to CSV
-final_df.to_csv("monthly_macro_gold_dataset.csv", index=False)
+    final_df = build_dataset(args.prices, args.horizon)
+    final_df.to_csv(output_file, index=False)
 
-print("✅ Dataset created successfully as 'monthly_macro_gold_dataset.csv'")
+    print(f"✅ Dataset created successfully as '{output_file}'")
@@ -1,64 +1,15 @@
 # merge macroeconomic data with forex data
+import os
+import sys
 import pandas as pd
 from data_preparation import excel_serial_to_datetime_str
-import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from macro_merge import merge_macros
 
 # Load forex data
 forex = pd.read_csv('./output/processed_XAUUSD_30m.csv', parse_dates=['time'])
 
-# Updated function to parse Release Date and Time
-def parse_macro_datetime(row):
-    release_date = row['Release Date']
-    
-    # Check if 'Release Date' is a string
-    if isinstance(release_date, str):
-        # Extract the date part from the string (e.g., "May 02, 2025 (Apr)")
-        date_str = release_date.split(' (')[0]
-        date = pd.to_datetime(date_str).date()
-    elif isinstance(release_date, pd.Timestamp) or isinstance(release_date, datetime.datetime):
-        # If 'Release Date' is already a Timestamp or datetime.datetime, use it directly
-        date = release_date.date()
-    else:
-        raise TypeError(f"Unknown type for 'Release Date': {type(release_date)}")
-    
-    t = row['Time']
-    # If 'Time' is a string, parse it to datetime.time first
-    if isinstance(t, str):
-        t = pd.to_datetime(t).time()
-    
-    time_delta = pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
-    
-    # Combine date and time
-    return pd.Timestamp(date) + time_delta
-
-
-# Function to merge macroeconomic data with forex data
-def merge_macro_to_forex(forex_df, macro_df, factor_name):
-    macro_df['datetime'] = macro_df.apply(parse_macro_datetime, axis=1)
-    forex_df = forex_df.sort_values('time')
-    macro_df = macro_df.sort_values('datetime')
-    
-    # Use merge_asof to align macro data with forex data
-    merged = pd.merge_asof(macro_df, forex_df, left_on='datetime', right_on='time', direction='forward')
-    
-    # Rename macro columns
-    macro_cols = ['datetime', 'Actual', 'Forecast', 'Previous']
-    macro_renamed = merged[macro_cols].rename(columns={
-        'Actual': f'{factor_name}_Actual',
-        'Forecast': f'{factor_name}_Forecast',
-        'Previous': f'{factor_name}_Previous',
-        'datetime': 'time'
-    })
-    
-    # Merge into forex data
-    result = pd.merge(forex_df, macro_renamed, on='time', how='left')
-    
-    # # Forward fill missing macroeconomic columns
-    macro_fill_cols = [f'{factor_name}_Actual', f'{factor_name}_Forecast', f'{factor_name}_Previous']
-    result[macro_fill_cols] = result[macro_fill_cols].fillna(method='ffill')
-    
-    return result
-
 # Load CPI and GDP data
 cpi = pd.read_excel('./data/xlsx/CPI.xlsx')
 gdp = pd.read_excel('./data/xlsx/GDP.xlsx')
@@ -68,13 +19,12 @@ nfp = pd.read_excel('./data/xlsx/NFP.xlsx')
 pce = pd.read_excel('./data/xlsx/PCE.xlsx')
 ppi = pd.read_excel('./data/xlsx/PPI.xlsx')
 
-# Merge the new macroeconomic data with the forex data
-forex_with_cpi = merge_macro_to_forex(forex, cpi, 'CPI')
-forex_with_gdp = merge_macro_to_forex(forex_with_cpi, gdp, 'GDP')
-forex_with_interest_rate = merge_macro_to_forex(forex_with_gdp, interest_rate, 'Interest_Rate')
-# forex_with_nfp = merge_macro_to_forex(forex_with_interest_rate, nfp, 'NFP')
-forex_with_pce = merge_macro_to_forex(forex_with_interest_rate, pce, 'PCE')
-forex_with_ppi = merge_macro_to_forex(forex_with_pce, ppi, 'PPI')
+# Merge the macroeconomic data with the forex data: every calendar is aligned
+# to the bars on its exact release time in one pass
+macros = {'CPI': cpi, 'GDP': gdp, 'Interest_Rate': interest_rate,
+          # 'NFP': nfp,
+          'PCE': pce, 'PPI': ppi}
+forex_with_ppi = merge_macros(forex, macros)
 
 # Save merged data to Excel
 output_file = './output/forex_with_all_macros.xlsx'
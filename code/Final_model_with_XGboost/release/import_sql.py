@@ -1,12 +1,17 @@
+import os
+import sys
 import pandas as pd
 from sqlalchemy import create_engine, types
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from macro_flags import parse_flags
+
 def import_csv_to_sqlite(csv_file, db_file, table_name):
     # Read the CSV, ensuring Macro_factor is read as string
     df = pd.read_csv(csv_file, dtype={'Macro_factor': str})
     
-    # Ensure Macro_factor is padded to 6 digits
-    df['Macro_factor'] = df['Macro_factor'].str.zfill(6)
+    # Macro_factor '010000' -> bitmask integer (CPI = 32 ... Interest_Rate = 1)
+    df['Macro_factor'] = parse_flags(df['Macro_factor'])
     
     # Convert time column to datetime
     df['time'] = pd.to_datetime(df['time'], format='%Y-%m-%d %H:%M:%S')
@@ -35,7 +40,7 @@ def import_csv_to_sqlite(csv_file, db_file, table_name):
         'PPI_Actual': types.Float,
         'PPI_Forecast': types.Float,
         'PPI_Previous': types.Float,
-        'Macro_factor': types.String(6),  # Enforce 6-character string
+        'Macro_factor': types.SmallInteger,  # 6-bit release mask, see common/macro_flags.py
         'RSI': types.Float,
         'MACD': types.Float,
         'Signal': types.Float,
@@ -1,22 +1,25 @@
+import os
+import sys
 import pandas as pd
 import csv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from indicator_engine import indicator_frame
+
+# This pipeline only has a single 'price' column
+PRICE_COLUMNS = {'close': 'price'}
+
 def calculate_rsi(data, periods=14):
     """Calculate 14-period RSI."""
-    delta = data['price'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=periods).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=periods).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    # delta.where(...) semantics: the first bar's gain/loss is 0, not NaN
+    return indicator_frame(data, [f'RSI_{periods}'], columns=PRICE_COLUMNS,
+                           rsi_leading_zero=True).iloc[:, 0]
 
 def calculate_macd(data, short_period=12, long_period=26, signal_period=9):
     """Calculate MACD and Signal Line."""
-    short_ema = data['price'].ewm(span=short_period, adjust=False).mean()
-    long_ema = data['price'].ewm(span=long_period, adjust=False).mean()
-    macd = short_ema - long_ema
-    signal = macd.ewm(span=signal_period, adjust=False).mean()
-    return macd, signal
+    out = indicator_frame(data, ['MACD', f'MACD_sig_{signal_period}'], columns=PRICE_COLUMNS,
+                          macd_periods=(short_period, long_period))
+    return out.iloc[:, 0], out.iloc[:, 1]
 
 def add_technical_indicators(input_file, output_file):
     # Read origin_with_macro.csv, ensuring Macro_factor is read as string
@@ -29,16 +32,11 @@ def add_technical_indicators(input_file, output_file):
     df['time'] = pd.to_datetime(df['time'], format='%Y-%m-%d %H:%M:%S')
     df = df.sort_values('time')
     
-    # Calculate RSI (14-period)
-    df['RSI'] = calculate_rsi(df, periods=14)
-    
-    # Calculate MACD (12, 26, 9)
-    df['MACD'], df['Signal'] = calculate_macd(df, short_period=12, long_period=26, signal_period=9)
-    
-    # Calculate Simple Moving Averages (50, 200, 280)
-    df['SMA_50'] = df['price'].rolling(window=50).mean()
-    df['SMA_200'] = df['price'].rolling(window=200).mean()
-    df['SMA_280'] = df['price'].rolling(window=280).mean()
+    # RSI (14-period), MACD (12, 26, 9) and SMAs (50, 200, 280) in one engine pass
+    features = ['RSI_14', 'MACD', 'Signal', 'SMA_50', 'SMA_200', 'SMA_280']
+    block = indicator_frame(df, features, columns=PRICE_COLUMNS, rsi_leading_zero=True)
+    block = block.rename(columns={'RSI_14': 'RSI'})
+    df[block.columns] = block
     
     # Save to a new CSV file with string quoting to preserve formats
     df.to_csv(output_file, index=False, quoting=csv.QUOTE_NONNUMERIC)
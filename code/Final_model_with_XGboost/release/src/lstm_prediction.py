@@ -6,6 +6,10 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'common'))
+from windows import make_sequences
 
 # Load and preprocess data
 def get_data():
@@ -37,11 +41,8 @@ def get_data():
 
 # Create sequences for LSTM
 def create_sequences(data, seq_length, forecast_horizon):
-    X, y = [], []
-    for i in range(len(data) - seq_length - forecast_horizon + 1):
-        X.append(data[i:i + seq_length])
-        y.append(data[i + seq_length + forecast_horizon - 1, 3])  # Predict close after horizon
-    return np.array(X), np.array(y)
+    # Predict close (column 3) `forecast_horizon` bars after the window
+    return make_sequences(data, data[:, 3], seq_length, horizon=forecast_horizon)
 
 # Main execution
 if __name__ == '__main__':
@@ -5,6 +5,11 @@ from ta.momentum import RSIIndicator
 from ta.volatility import BollingerBands, AverageTrueRange
 from sklearn.preprocessing import MinMaxScaler
 from collections import Counter
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from kernels import get_backend
+from trade_labels import perfect_labels, realistic_labels
 
 # Load the CSV file
 df = pd.read_csv('./Data/XAUUSD_30m_from_2018.csv', parse_dates=['time'])
@@ -40,89 +45,26 @@ stop_loss          = 8  * pip_value
 holding_period     = 8    # 4 hours = 8 candles of 30 minutes
 
 # ---- Updated Realistic Trader Labeling ----
-def assign_realistic_label(row, df, idx):
-    # ensure we have both a prior bar and future bars
-    if idx < 1 or idx + holding_period >= len(df):
-        return 'neutral'
-    
-    close       = row['close']
-    atr         = row['atr']
-    adx         = row['adx']
-    ema10       = row['ema_10']
-    ema20       = row['ema_20']
-    prev_ema10  = df['ema_10'].iat[idx-1]
-    prev_ema20  = df['ema_20'].iat[idx-1]
-    
-    # only enter trades in a trending market
-    if adx < 15:
-        return 'neutral'
-    
-    # dynamic risk/reward via ATR
-    stop_level   = atr
-    tp_strong_atr = 2.0 * atr
-    tp_weak_atr   = 1.5 * atr
-    
-    # simulate candle-by-candle to see which level hits first
-    future = df.iloc[idx+1 : idx+holding_period+1]
-    entry  = close
-
-    # LONG: EMA10 crosses above EMA20
-    if prev_ema10 <= prev_ema20 and ema10 > ema20:
-        for _, f in future.iterrows():
-            if f['low'] <= entry - stop_level:
-                return 'neutral'
-            if f['high'] >= entry + tp_strong_atr:
-                return 'strong_buy'
-            if f['high'] >= entry + tp_weak_atr:
-                return 'weak_buy'
-        return 'neutral'
-    
-    # SHORT: EMA10 crosses below EMA20
-    if prev_ema10 >= prev_ema20 and ema10 < ema20:
-        for _, f in future.iterrows():
-            if f['high'] >= entry + stop_level:
-                return 'neutral'
-            if f['low'] <= entry - tp_strong_atr:
-                return 'strong_sell'
-            if f['low'] <= entry - tp_weak_atr:
-                return 'weak_sell'
-        return 'neutral'
-    
-    return 'neutral'
-
-# Perfect Hindsight Labeling (unchanged)
-def assign_perfect_label(row, df, idx):
-    if idx + holding_period >= len(df):
-        return 'neutral'
-    
-    close         = row['close']
-    future_prices = df.iloc[idx:idx+holding_period+1][['high','low']].values
-    max_high      = np.max(future_prices[:,0])
-    min_low       = np.min(future_prices[:,1])
-    
-    # buy side
-    buy_entry  = close + spread
-    buy_profit = max_high - buy_entry
-    buy_loss   = buy_entry - min_low
-    if buy_profit >= take_profit_strong and buy_loss < stop_loss:
-        return 'strong_buy'
-    if buy_profit >= take_profit_weak   and buy_loss < stop_loss:
-        return 'weak_buy'
-    
-    # sell side
-    sell_entry  = close - spread
-    sell_profit = sell_entry - min_low
-    sell_loss   = max_high - sell_entry
-    if sell_profit >= take_profit_strong and sell_loss < stop_loss:
-        return 'strong_sell'
-    if sell_profit >= take_profit_weak   and sell_loss < stop_loss:
-        return 'weak_sell'
-    
-    return 'neutral'
+# Enter on a 10/20 EMA crossover when ADX >= 15, stop at 1 ATR, targets at
+# 2.0 ATR (strong) / 1.5 ATR (weak); the first level touched within
+# holding_period bars decides the label. The bar-by-bar walk runs in
+# common/kernels.first_touch (numba when installed, NumPy otherwise).
+def assign_realistic_labels(df):
+    return realistic_labels(df, stop_atr=1.0, tp_strong_atr=2.0, tp_weak_atr=1.5,
+                            holding_period=holding_period, adx_min=15)
+
+# Perfect Hindsight Labeling (unchanged rules)
+# Highest high / lowest low of bars idx .. idx+holding_period decide the
+# label; common/trade_labels.perfect_labels takes them for every bar at once
+# from a strided (bars x window) view instead of a df.iloc slice per row.
+def assign_perfect_labels(df):
+    return perfect_labels(df, take_profit_strong, take_profit_weak, stop_loss, spread,
+                          holding_period, include_entry=True)
 
 # Apply both labeling functions
-df['label']         = [assign_realistic_label(r, df, i) for i,r in df.iterrows()]
-df['perfect_label'] = [assign_perfect_label(r, df, i) for i,r in df.iterrows()]
+print(f"Labeling kernels: {get_backend()}")
+df['label']         = assign_realistic_labels(df)
+df['perfect_label'] = assign_perfect_labels(df)
 
 # Compare and report
 df['match'] = df['label'] == df['perfect_label']
@@ -1,12 +1,18 @@
 # labeling_corrected.py
 
 import pandas as pd
-import numpy as np
 from ta.trend import SMAIndicator, EMAIndicator, ADXIndicator, MACD
 from ta.momentum import RSIIndicator
 from ta.volatility import BollingerBands, AverageTrueRange
 from sklearn.preprocessing import MinMaxScaler
 from collections import Counter
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from kernels import get_backend
+from trade_labels import perfect_labels, realistic_labels
+from windows import make_sequences, window_targets
+from sequence_store import write_sequences
 import joblib
 
 # 1) LOAD RAW DATA
@@ -45,84 +51,24 @@ holding_period     = 8        # # of 30m bars (~4h)
 # ATR‐based targets; we'll compute inside the function
 
 # 4) REALISTIC TRADER LABEL (EMA crossover + ADX + ATR‐sized TP/SL)
-def assign_realistic_label(row, df, idx):
-    # need prior bar and enough future bars
-    if idx < 1 or idx + holding_period >= len(df):
-        return 'neutral'
-
-    entry = row['close']
-    atr   = row['atr']
-    adx   = row['adx']
-
-    # trend filter
-    if adx < 15:
-        return 'neutral'
-
-    # dynamic levels
-    stop   = 1.0 * atr
-    tp_w   = 1.2 * atr
-    tp_s   = 1.5 * atr
-
-    prev_e10 = df.at[idx-1, 'ema_10']
-    prev_e20 = df.at[idx-1, 'ema_20']
-    e10      = row['ema_10']
-    e20      = row['ema_20']
-
-    future = df.iloc[idx+1 : idx+1+holding_period]
-
-    # LONG: 10 crosses above 20
-    if prev_e10 <= prev_e20 and e10 > e20:
-        for _, f in future.iterrows():
-            if f['low'] <= entry - stop:
-                return 'neutral'
-            if f['high'] >= entry + tp_s:
-                return 'strong_buy'
-            if f['high'] >= entry + tp_w:
-                return 'weak_buy'
-        return 'neutral'
-
-    # SHORT: 10 crosses below 20
-    if prev_e10 >= prev_e20 and e10 < e20:
-        for _, f in future.iterrows():
-            if f['high'] >= entry + stop:
-                return 'neutral'
-            if f['low'] <= entry - tp_s:
-                return 'strong_sell'
-            if f['low'] <= entry - tp_w:
-                return 'weak_sell'
-        return 'neutral'
-
-    return 'neutral'
+# Enter on a 10/20 EMA crossover when ADX >= 15, stop at 1 ATR, targets at
+# 1.5 ATR (strong) / 1.2 ATR (weak); the first level touched within
+# holding_period bars decides the label. The bar-by-bar walk runs in
+# common/kernels.first_touch (numba when installed, NumPy otherwise).
+def assign_realistic_labels(df):
+    return realistic_labels(df, stop_atr=1.0, tp_strong_atr=1.5, tp_weak_atr=1.2,
+                            holding_period=holding_period, adx_min=15)
 
 # 5) PERFECT HINDSIGHT LABEL (pure future‐move)
-def assign_perfect_label(row, df, idx):
-    if idx + holding_period >= len(df):
-        return 'neutral'
-
-    entry_buy  = row['close'] + spread
-    entry_sell = row['close'] - spread
-    window     = df.iloc[idx+1 : idx+1+holding_period]
-
-    max_h = window['high'].max()
-    min_l = window['low'].min()
-
-    # buy side
-    if (max_h - entry_buy) >= 0.01 and (entry_buy - min_l) < 0.01:
-        return 'strong_buy'
-    if (max_h - entry_buy) >= 0.005 and (entry_buy - min_l) < 0.01:
-        return 'weak_buy'
-
-    # sell side
-    if (entry_sell - min_l) >= 0.01 and (max_h - entry_sell) < 0.01:
-        return 'strong_sell'
-    if (entry_sell - min_l) >= 0.005 and (max_h - entry_sell) < 0.01:
-        return 'weak_sell'
-
-    return 'neutral'
+# TP 0.01 (strong) / 0.005 (weak), stop 0.01, on the high / low of the next
+# holding_period bars (common/trade_labels.perfect_labels, all bars at once)
+def assign_perfect_labels(df):
+    return perfect_labels(df, 0.01, 0.005, 0.01, spread, holding_period)
 
 # 6) APPLY LABELS
-df['label']         = [assign_realistic_label(r, df, i) for i,r in df.iterrows()]
-df['perfect_label'] = [assign_perfect_label(r, df, i) for i,r in df.iterrows()]
+print(f"Labeling kernels: {get_backend()}")
+df['label']         = assign_realistic_labels(df)
+df['perfect_label'] = assign_perfect_labels(df)
 
 # 7) EXPORT UN‐SCALED CSV FOR VERIFICATION
 df.to_csv('forex_data_with_labels_raw.csv', index=False)
@@ -145,28 +91,27 @@ df2[features] = scaler.fit_transform(df2[features])
 
 # window into sequences
 seq_len = 20
-X, y = [], []
 label_map = {'strong_buy':0,'weak_buy':1,'neutral':2,'weak_sell':3,'strong_sell':4}
 
-for i in range(len(df2) - seq_len):
-    X.append(df2[features].iloc[i:i+seq_len].values)
-    y.append(label_map[df2.at[i+seq_len, 'label']])
-
-X = np.array(X)
-y = np.array(y)
+# X[i] = rows i .. i+seq_len-1 (a strided view), y[i] = label of the next row
+X, y = make_sequences(df2[features].to_numpy(), df2['label'].map(label_map).to_numpy(), seq_len)
 
 # train/test split
 split = int(0.8 * len(X))
 X_train, X_test = X[:split], X[split:]
 y_train, y_test = y[:split], y[split:]
 
-# save
-np.save('X_train.npy', X_train)
-np.save('X_test.npy',  X_test)
-np.save('y_train.npy', y_train)
-np.save('y_test.npy',  y_test)
+# save as sharded, memory-mapped stores (windows are written shard by shard,
+# readers open them with SequenceStore('seq_train') / iter_batches)
+times = window_targets(df2['time'].to_numpy(), seq_len)
+meta = {'seq_len': seq_len, 'label_map': label_map}
+train_store = write_sequences('seq_train', X_train, y_train, times[:split],
+                              feature_names=features, scaler=scaler, meta=meta)
+test_store = write_sequences('seq_test', X_test, y_test, times[split:],
+                             feature_names=features, scaler=scaler, meta=meta)
 joblib.dump(scaler, 'scaler.pkl')
 
-print(f"→ Sequences saved. X_train shape: {X_train.shape}, y_train shape: {y_train.shape}")
+print(f"→ Sequences saved to seq_train/ and seq_test/. X_train shape: {train_store.shape}, "
+      f"y_train shape: {y_train.shape}")
 print(f"Realistic vs. Perfect match: { (df2['label']==df2['perfect_label']).mean()*100 :.2f}%")
 print("Label counts:", Counter(df2['label']), Counter(df2['perfect_label']))
@@ -1,11 +1,17 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from tensorflow.keras.models import Model, Sequential
 from tensorflow.keras.layers import Input, LSTM, Dense, Dropout, Concatenate
 from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
 from data_preparation import calculate_technical_indicators, label_data
+from feature_cache import default_cache
+from windows import valid_window_indices
+from window_feeder import WindowSequence
+from row_scaler import RowScaler
 from utils import profit_accuracy, plot_history, print_classification_report
 from tensorflow.keras.optimizers import Adam
 
@@ -30,53 +36,6 @@ def process_macro_data(df, macro_cols, window=3):
     return df
 
 
-def create_sequences(df, tech_features, macro_features, target_col, time_steps):
-    """
-    Build overlapping sequences for technical and macro branches efficiently,
-    without reallocating large arrays in each loop.
-    Returns:
-      X_tech: (n_samples, time_steps, len(tech_features))
-      X_macro: (n_samples, time_steps, len(macro_features))
-      y: (n_samples,)
-    """
-    # Pre-extract full arrays once
-    arr_tech  = df[tech_features].values
-    arr_macro = df[macro_features].values
-    y_all     = df[target_col].values
-
-    X_tech, X_macro, y = [], [], []
-    for i in range(time_steps, len(df)):
-        seq_tech  = arr_tech[i-time_steps:i]
-        seq_macro = arr_macro[i-time_steps:i]
-        label     = y_all[i]
-        # skip if any missing values
-        if np.isnan(seq_tech).any() or np.isnan(seq_macro).any():
-            continue
-        X_tech.append(seq_tech)
-        X_macro.append(seq_macro)
-        y.append(label)
-
-    return np.array(X_tech), np.array(X_macro), np.array(y)
-
-
-def scale_features(X_train, X_test):
-    """
-    Fit a scaler on flattened samples per feature, then transform back to sequences.
-    """
-    n_train, t, f = X_train.shape
-    n_test  = X_test.shape[0]
-
-    flat_train = X_train.reshape(-1, f)
-    flat_test  = X_test.reshape(-1, f)
-
-    scaler = StandardScaler()
-    scaler.fit(flat_train)
-    scaled_train = scaler.transform(flat_train).reshape(n_train, t, f)
-    scaled_test  = scaler.transform(flat_test).reshape(n_test, t, f)
-
-    return scaled_train, scaled_test
-
-
 def build_multi_input_lstm(time_steps, n_tech, n_macro):
     """
     Two-branch LSTM: one for technical indicators, one for macro data.
@@ -218,6 +177,7 @@ def main():
 
     # 1) Technical indicators
     df = calculate_technical_indicators(df)
+    print(default_cache().report())
 
     # 2) Macro surprises & lag windows (no fill/shift required)
     macro_cols = [
@@ -242,18 +202,30 @@ def main():
     macro_features  = macro_cols + [c for c in df.columns if 'Surprise' in c]
 
     time_steps = 30
-    X_tech, X_macro, y = create_sequences(df, tech_features,
-                                         macro_features, 'label', time_steps)
+    # Windows are gathered per batch from the 2-D feature matrices; only
+    # their start rows are kept (windows with missing values are skipped)
+    arr_tech  = df[tech_features].to_numpy(dtype=np.float32)
+    arr_macro = df[macro_features].to_numpy(dtype=np.float32)
+    y_all     = df['label'].to_numpy()
+    starts = valid_window_indices(arr_tech, arr_macro, window=time_steps)
 
     # Split
-    split_idx = int(0.8 * len(X_tech))
-    X_tr_tech, X_te_tech = X_tech[:split_idx], X_tech[split_idx:]
-    X_tr_macro, X_te_macro = X_macro[:split_idx], X_macro[split_idx:]
-    y_train, y_test = y[:split_idx], y[split_idx:]
-
-    # Scale
-    X_tr_tech_s, X_te_tech_s = scale_features(X_tr_tech, X_te_tech)
-    X_tr_macro_s, X_te_macro_s = scale_features(X_tr_macro, X_te_macro)
+    split_idx = int(0.8 * len(starts))
+    train_starts, test_starts = starts[:split_idx], starts[split_idx:]
+
+    # Scale: fit on the rows covered by training windows, transform all rows
+    # in place; the scalers are saved for inference
+    train_rows = slice(0, train_starts[-1] + time_steps)
+    for name, features, arr in (('tech', tech_features, arr_tech), ('macro', macro_features, arr_macro)):
+        scaler = RowScaler('standard').fit(df[features].iloc[train_rows])
+        scaler.transform(arr)
+        scaler.save(f'./scaler_{name}.json')
+
+    inputs = {'tech_input': arr_tech, 'macro_input': arr_macro}
+    train_seq = WindowSequence(inputs, y_all, time_steps, indices=train_starts,
+                               batch_size=32, shuffle=True)
+    test_seq  = WindowSequence(inputs, y_all, time_steps, indices=test_starts, batch_size=32)
+    y_test = test_seq.labels()
 
     # Build & train
     model = build_multi_input_5_layer_lstm(time_steps,
@@ -267,18 +239,14 @@ def main():
     rl = ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=3)
 
     history = model.fit(
-        {'tech_input': X_tr_tech_s, 'macro_input': X_tr_macro_s}, y_train,
-        validation_data=(
-            {'tech_input': X_te_tech_s, 'macro_input': X_te_macro_s}, y_test
-        ),
+        train_seq.to_dataset(),
+        validation_data=test_seq.to_dataset(),
         epochs=50,
-        batch_size=32,
         callbacks=[es, rl]
     )
 
     # Evaluate
-    y_pred_prob = model.predict({'tech_input': X_te_tech_s,
-                                 'macro_input': X_te_macro_s})
+    y_pred_prob = model.predict(test_seq.to_dataset())
     y_pred = np.argmax(y_pred_prob, axis=1)
 
     # DEBUG: Print predicted and true class distribution
@@ -298,7 +266,8 @@ def main():
     plot_history(history)
 
     # Align df_test properly with y_test and y_pred (important for correct plotting)
-    df_test = df.iloc[time_steps + split_idx : time_steps + split_idx + len(y_test)].copy()
+    # Row of each test label: the bar right after its window
+    df_test = df.iloc[test_starts + time_steps].copy()
     df_test.reset_index(inplace=True)  # reset index so plotting uses integer index or time column
 
     # DEBUG: check shapes alignment
@@ -1,8 +1,17 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import RobustScaler
 from technical_indicators import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from feature_cache import cached_indicator_frame
+from indicator_engine import MT5_COLUMNS
+from windows import make_sequences
+from row_scaler import RowScaler
+from direction_labels import NO_LABEL, label_frame
+from macro_store import ReleaseStore
+
 
 def load_forex_data(path):
     df = pd.read_csv(path)
@@ -11,55 +20,37 @@ def load_forex_data(path):
     return df
 
 def calculate_technical_indicators(df):
-    df['MA_50'] = moving_average(df['close'], 50)
-    df['MA_200'] = moving_average(df['close'], 200)
-    df['MACD'] = macd(df['close'])
-    # df['Momentum_4'] = momentum(df['close'], 4)
-    # df['ROC_2'] = rate_of_change(df['close'], 2)
-    df['RSI_14'] = relative_strength_index(df['close'], 14)
-    df['BB_upper'], df['BB_lower'] = bollinger_bands(df['close'])
-    # df['CCI_20'] = commodity_channel_index(df)
+    # Momentum_4, ROC_2 and CCI_20 are left out of this feature set
+    features = ['MA_50', 'MA_200', 'MACD', 'RSI_14', 'BB_upper', 'BB_lower']
+    df[features] = cached_indicator_frame(df, features, MT5_COLUMNS)
     df.dropna(inplace=True)
     return df
 
 # remove other indicators(RSI,MA50,200)
 
-def label_data(df, threshold=0.0005):
-    df['close_next'] = df['close'].shift(-1)
+def label_data(df, threshold=0.0005, horizon=1, mode='absolute'):
+    # 2 = increase, 1 = decrease, 0 = no_action (see common/direction_labels.py);
+    # mode 'percent' / 'atr' reads threshold as a fraction of close / of ATR
+    df['close_next'] = df['close'].shift(-horizon)
     df['price_diff'] = df['close_next'] - df['close']
-
-    def label_direction(diff):
-        if diff > threshold:
-            return 2  # increase
-        elif diff < -threshold:
-            return 1  # decrease
-        else:
-            return 0  # no_action
-
-    df['label'] = df['price_diff'].apply(label_direction)
+    label = label_frame(df, horizon, threshold, mode).iloc[:, 0]
+    df['label'] = label.where(label != NO_LABEL)  # NaN (dropped below) where no label exists
     df.dropna(inplace=True)
+    df['label'] = df['label'].astype(np.int64)
     return df
 
 def create_sequences(df, features, label_col, time_steps=30):
-    X, y = [], []
-    for i in range(len(df) - time_steps):
-        X.append(df[features].iloc[i:i+time_steps].values)
-        y.append(df[label_col].iloc[i+time_steps])
-    return np.array(X), np.array(y)
-
-def scale_features(X_train, X_test):
-    num_features = X_train.shape[2]
-    scaler = RobustScaler()
-
-    X_train_2d = X_train.reshape(-1, num_features)
-    X_test_2d = X_test.reshape(-1, num_features)
-
-    scaler.fit(X_train_2d)
-
-    X_train_scaled = scaler.transform(X_train_2d).reshape(X_train.shape)
-    X_test_scaled = scaler.transform(X_test_2d).reshape(X_test.shape)
-
-    return X_train_scaled, X_test_scaled
+    # X[i] = rows i .. i+time_steps-1 (a strided view), y[i] = label of the next row
+    return make_sequences(df[features].to_numpy(), df[label_col].to_numpy(), time_steps)
+
+def scale_features(train_rows, rows, scaler=None, path=None):
+    # Robust (median / IQR) scaling fitted on the 2-D training rows only, before
+    # windowing, so each bar counts once; `rows` (all bars) is scaled in place as
+    # float32. Returns the scaled rows and the scaler, also saved to `path` if given
+    scaler = scaler or RowScaler('robust').fit(train_rows)
+    if path is not None:
+        scaler.save(path)
+    return scaler.transform(rows), scaler
 
 # def merge_cpi_with_forex(forex_df, cpi_path):
 #     cpi_df = pd.read_excel(cpi_path)
@@ -115,46 +106,17 @@ def scale_features(X_train, X_test):
 #     return merged
 
 def load_macro_data_with_prefix(path, prefix):
-    df = pd.read_excel(path)
-
-    # Extract date part from 'Release Date' column
-    df['Release Date'] = df['Release Date'].str.extract(r'([A-Za-z]{3,9}\s\d{1,2},\s\d{4})')[0]
-
-    # Combine 'Release Date' and 'Time' columns into one datetime string
-    df['Release DateTime'] = df['Release Date'] + ' ' + df['Time'].astype(str)
+    # One row per release: 'Release Date' ("Apr 10, 2025 (Mar)", ISO, Excel serial) + 'Time',
+    # rows that fail to parse dropped, columns {prefix}_Actual / _Forecast / _Previous on query
+    return ReleaseStore.from_files({prefix: path})
 
-    # Parse combined datetime string
-    df['Release DateTime'] = pd.to_datetime(df['Release DateTime'], errors='coerce')
 
-    # Drop rows where parsing failed
-    df = df.dropna(subset=['Release DateTime'])
-
-    # Sort by the new datetime index
-    df = df.sort_values('Release DateTime')
-
-    # Keep only relevant columns and rename
-    df = df[['Release DateTime', 'Actual', 'Forecast', 'Previous']]
-    df = df.rename(columns={
-        'Actual': f'{prefix}_Actual',
-        'Forecast': f'{prefix}_Forecast',
-        'Previous': f'{prefix}_Previous'
-    })
-
-    # Set the combined datetime as index
-    df.set_index('Release DateTime', inplace=True)
-
-    # Now resample with 30-min frequency to match forex data time intervals
-    # Forward fill missing values to cover all forex timestamps
-    df = df.resample('30T').ffill()
-
-    return df
-
-
-def merge_multiple_macros(forex_df, macro_dfs):
+def merge_multiple_macros(forex_df, macro_stores):
+    # Latest release of every factor known at each forex bar (release time <= bar time),
+    # looked up per bar instead of joining a 30-minute forward-filled grid
+    macro = ReleaseStore.concat(macro_stores).as_of(forex_df.index)
     merged = forex_df.copy()
-
-    for macro_df in macro_dfs:
-        merged = merged.join(macro_df, how='left')
+    merged[macro.columns] = macro.to_numpy()
 
     merged = merged.dropna()
     return merged
@@ -1,11 +1,16 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from tensorflow.keras.models import Model, Sequential
 from tensorflow.keras.layers import Input, LSTM, Dense, Dropout, Concatenate
 from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
 from data_preparation import calculate_technical_indicators, label_data
+from feature_cache import default_cache
+from windows import sliding_windows, window_count, window_targets
+from row_scaler import RowScaler
 from utils import profit_accuracy, plot_history, print_classification_report
 from tensorflow.keras.optimizers import Adam
 import matplotlib.pyplot as plt
@@ -32,79 +37,17 @@ def process_macro_data(df, macro_cols, window=3):
     return df
 
 
-def create_sequences(df, tech_features, macro_features, target_col, time_steps):
+def create_sequences_tech(arr_tech, labels, time_steps):
     """
-    Build overlapping sequences for technical and macro branches efficiently,
-    without reallocating large arrays in each loop.
+    Build overlapping technical-indicator sequences as a strided view of the
+    (already scaled) 2-D feature rows; the label of each window is the row after it.
     Returns:
-      X_tech: (n_samples, time_steps, len(tech_features))
-      X_macro: (n_samples, time_steps, len(macro_features))
+      X_tech: (n_samples, time_steps, n_features)
       y: (n_samples,)
     """
-    # Pre-extract full arrays once
-    arr_tech  = df[tech_features].values
-    arr_macro = df[macro_features].values
-    y_all     = df[target_col].values
-
-    X_tech, X_macro, y = [], [], []
-    for i in range(time_steps, len(df)):
-        seq_tech  = arr_tech[i-time_steps:i]
-        seq_macro = arr_macro[i-time_steps:i]
-        label     = y_all[i]
-        # skip if any missing values
-        if np.isnan(seq_tech).any() or np.isnan(seq_macro).any():
-            continue
-        X_tech.append(seq_tech)
-        X_macro.append(seq_macro)
-        y.append(label)
-
-    return np.array(X_tech), np.array(X_macro), np.array(y)
-
-def create_sequences_tech(df, tech_features, target_col, time_steps):
-    """
-    Build overlapping sequences for technical and macro branches efficiently,
-    without reallocating large arrays in each loop.
-    Returns:
-      X_tech: (n_samples, time_steps, len(tech_features))
-      X_macro: (n_samples, time_steps, len(macro_features))
-      y: (n_samples,)
-    """
-    # Pre-extract full arrays once
-    arr_tech  = df[tech_features].values
-    # arr_macro = df[macro_features].values
-    y_all     = df[target_col].values
-
-    X_tech, y = [], []
-    for i in range(time_steps, len(df)):
-        seq_tech  = arr_tech[i-time_steps:i]
-        # seq_macro = arr_macro[i-time_steps:i]
-        label     = y_all[i]
-        # skip if any missing values
-        # if np.isnan(seq_tech).any() or np.isnan(seq_macro).any():
-            # continue
-        X_tech.append(seq_tech)
-        # X_macro.append(seq_macro)
-        y.append(label)
-
-    return np.array(X_tech), np.array(y)
-
-
-def scale_features(X_train, X_test):
-    """
-    Fit a scaler on flattened samples per feature, then transform back to sequences.
-    """
-    n_train, t, f = X_train.shape
-    n_test  = X_test.shape[0]
-
-    flat_train = X_train.reshape(-1, f)
-    flat_test  = X_test.reshape(-1, f)
-
-    scaler = StandardScaler()
-    scaler.fit(flat_train)
-    scaled_train = scaler.transform(flat_train).reshape(n_train, t, f)
-    scaled_test  = scaler.transform(flat_test).reshape(n_test, t, f)
-
-    return scaled_train, scaled_test
+    X_tech = sliding_windows(arr_tech, time_steps, horizon=1)
+    y      = window_targets(labels, time_steps, horizon=1)
+    return X_tech, y
 
 
 def build_multi_input_lstm(time_steps, n_tech, n_macro):
@@ -240,6 +183,7 @@ def main():
 
     # 1) Technical indicators
     df = calculate_technical_indicators(df)
+    print(default_cache().report())
 
     # # 2) Macro surprises & lag windows (no fill/shift required)
     # macro_cols = [
@@ -263,18 +207,21 @@ def main():
     # macro_features = macro_cols + [c for c in df.columns if 'Surprise' in c]
 
     time_steps = 30
-    X_tech, y = create_sequences_tech(df, tech_features, 'label', time_steps)
+    split_idx = int(0.8 * window_count(len(df), time_steps, horizon=1))
+
+    # Scale the 2-D rows before windowing: fit on the rows of the training
+    # windows only, transform in place as float32, save for inference
+    arr_tech = df[tech_features].to_numpy(dtype=np.float32)
+    scaler = RowScaler('standard').fit(df[tech_features].iloc[:split_idx + time_steps - 1])
+    scaler.transform(arr_tech)
+    scaler.save('./scaler_tech.json')
+    X_tech, y = create_sequences_tech(arr_tech, df['label'].values, time_steps)
 
     # Split
-    split_idx = int(0.8 * len(X_tech))
-    X_tr_tech, X_te_tech = X_tech[:split_idx], X_tech[split_idx:]
+    X_tr_tech_s, X_te_tech_s = X_tech[:split_idx], X_tech[split_idx:]
     # X_tr_macro, X_te_macro = X_macro[:split_idx], X_macro[split_idx:]
     y_train, y_test = y[:split_idx], y[split_idx:]
 
-    # Scale
-    X_tr_tech_s, X_te_tech_s = scale_features(X_tr_tech, X_te_tech)
-    # X_tr_macro_s, X_te_macro_s = scale_features(X_tr_macro, X_te_macro)
-
     # Build & train
     model = build_multi_input_5_layer_lstm_tech(time_steps,
                                            len(tech_features)
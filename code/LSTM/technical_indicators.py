@@ -1,5 +1,10 @@
+import os
+import sys
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from rolling import rolling_mad
+
 def moving_average(series, period=10):
     return series.rolling(window=period).mean()
 
@@ -35,7 +40,7 @@ def bollinger_bands(series, period=20):
 def commodity_channel_index(df, period=20):
     tp = (df['high'] + df['low'] + df['close']) / 3
     ma = tp.rolling(window=period).mean()
-    mean_dev = tp.rolling(window=period).apply(lambda x: (x - x.mean()).abs().mean())
+    mean_dev = pd.Series(rolling_mad(tp.to_numpy(), period), index=tp.index)
     cci = (tp - ma) / (0.015 * mean_dev)
     return cci
 
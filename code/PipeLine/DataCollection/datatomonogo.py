@@ -2,6 +2,8 @@ import MetaTrader5 as mt5
 import pandas as pd
 from datetime import datetime
 from pymongo import MongoClient, ASCENDING
+from pymongo.errors import DuplicateKeyError
+from live_indicators import LiveIndicators
 import time
 
 # === 1. Initialize MT5 ===
@@ -17,6 +19,7 @@ client = MongoClient("mongodb://localhost:27017/")
 db = client["market_data"]
 collection = db["XAUUSD_M30"]
 collection.create_index([("time", ASCENDING)], unique=True)
+indicators = LiveIndicators(db, "XAUUSD_M30")
 
 def fetch_and_insert_new():
     # Get the last inserted timestamp from DB
@@ -46,9 +49,10 @@ def fetch_and_insert_new():
     for record in df.to_dict(orient="records"):
         try:
             collection.insert_one(record)
-            inserted += 1
-        except Exception:
+        except DuplicateKeyError:
             continue  # Duplicate time, skip
+        inserted += 1
+        indicators.update(record)
     
     print(f"Inserted {inserted} new records from {df['time'].min()} to {df['time'].max()}")
 
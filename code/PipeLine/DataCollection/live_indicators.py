@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from streaming_indicators import StreamingIndicatorSet
+from support_resistance import SupportResistance
+
+# Same feature set as calculate_technical_indicators, plus ATR/ADX for the labelers
+LIVE_FEATURES = ['MA_10', 'MACD', 'MACD_sig', 'Momentum_4', 'ROC_2', 'RSI_14',
+                 'BB_upper', 'BB_lower', 'CCI_20', 'ATR_14', 'ADX_14']
+
+
+class LiveIndicators:
+    """
+    Keeps streaming indicator state next to a MongoDB bar collection.
+
+    Values for each new bar go to `<collection>_indicators` and the
+    indicator state is checkpointed in `indicator_state`, so a restarted
+    poller resumes from the checkpoint instead of recomputing the history.
+    With `support_resistance` the nearest support/resistance zones
+    (support_resistance.SupportResistance) are stored alongside.
+    """
+
+    def __init__(self, db, bar_collection, features=LIVE_FEATURES, support_resistance=True):
+        self.bars = db[bar_collection]
+        self.values = db[f"{bar_collection}_indicators"]
+        self.states = db["indicator_state"]
+        self.key = bar_collection
+        self.features = list(features)
+        self.with_levels = support_resistance
+        self.indicators, self.levels, self.last_time = self._restore()
+
+    def _restore(self):
+        doc = self.states.find_one({"_id": self.key})
+        if doc and doc.get("features") == self.features and ("levels" in doc) == self.with_levels:
+            indicators = StreamingIndicatorSet.from_state(doc["state"])
+            levels = SupportResistance.from_state(doc["levels"]) if self.with_levels else None
+            last_time = doc["time"]
+        else:
+            indicators, last_time = StreamingIndicatorSet(self.features), None
+            levels = SupportResistance() if self.with_levels else None
+        # catch up on bars stored since the checkpoint (all of them on first run)
+        query = {"time": {"$gt": last_time}} if last_time is not None else {}
+        backlog = list(self.bars.find(query, sort=[("time", 1)]))
+        if backlog:
+            df = pd.DataFrame(backlog)
+            values = dict(indicators.warm_up(df))
+            if levels is not None:
+                values.update(levels.warm_up(df))
+            last_time = df["time"].iloc[-1]
+            self._save(indicators, levels, last_time, values)
+        return indicators, levels, last_time
+
+    def update(self, bar):
+        """Feed one newly inserted bar dict (MT5 rates record)."""
+        if self.last_time is not None and bar["time"] <= self.last_time:
+            return None
+        values = self.indicators.update(bar["open"], bar["high"], bar["low"],
+                                        bar["close"], bar.get("tick_volume", float("nan")))
+        values = dict(values)
+        if self.levels is not None:
+            values.update(self.levels.update(bar["high"], bar["low"], bar["close"]))
+        self.last_time = bar["time"]
+        self._save(self.indicators, self.levels, self.last_time, values)
+        return values
+
+    def _save(self, indicators, levels, time, values):
+        self.values.update_one({"time": time}, {"$set": dict(values, time=time)}, upsert=True)
+        state = {"_id": self.key, "time": time, "features": self.features,
+                 "state": indicators.state_dict()}
+        if levels is not None:
+            state["levels"] = levels.state_dict()
+        self.states.replace_one({"_id": self.key}, state, upsert=True)
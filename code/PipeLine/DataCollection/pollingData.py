@@ -3,6 +3,8 @@ import MetaTrader5 as mt5
 import pandas as pd
 from datetime import datetime, timedelta
 from pymongo import MongoClient, ASCENDING
+from pymongo.errors import DuplicateKeyError
+from live_indicators import LiveIndicators
 
 # --- INITIAL SETUP (run once) ---
 if not mt5.initialize():
@@ -16,6 +18,8 @@ db       = client["market_data"]
 col      = db["XAUUSD_M30"]
 # ensure unique index on time so duplicates are skipped
 col.create_index([("time", ASCENDING)], unique=True)
+# streaming RSI/MACD/BB/CCI/... for each new bar, without recomputing history
+indicators = LiveIndicators(db, "XAUUSD_M30")
 
 # --- HELPER TO GET LAST TIMESTAMP ---
 def get_last_time():
@@ -45,13 +49,13 @@ def run_realtime_sync(poll_interval=30):
                 for rec in df.to_dict(orient="records"):
                     try:
                         col.insert_one(rec)
-                        inserted += 1
-                        # update last_time only when we successfully insert a newer bar
-                        if rec["time"] > last_time:
-                            last_time = rec["time"]
-                    except Exception:
-                        # duplicate or other error: skip
-                        pass
+                    except DuplicateKeyError:
+                        continue  # bar already stored: skip
+                    inserted += 1
+                    # update last_time only when we successfully insert a newer bar
+                    if rec["time"] > last_time:
+                        last_time = rec["time"]
+                        indicators.update(rec)
                 if inserted:
                     print(f"[{datetime.utcnow()}] Inserted {inserted} new bars, latest at {last_time}")
             else:
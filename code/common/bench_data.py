@@ -0,0 +1,75 @@
+# common/bench_data.py
+"""
+Price data for the benchmark / parity scripts in this folder.
+
+Either loads a MetaTrader M30 export (time, open, high, low, close,
+tick_volume) or generates a synthetic XAUUSD-like random walk of the
+requested length, so benchmarks can run at sizes larger than the
+recorded history.
+"""
+
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Recorded 30-minute history shipped with the repo
+DEFAULT_M30_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               '..', 'data collection', 'XAUUSD',
+                               'XAUUSD_30m_all_data_with_volume.csv')
+
+# Size of the full M30 history used by the LSTM pipelines
+M30_HISTORY_BARS = 89_000
+
+
+def synthetic_ohlcv(bars=M30_HISTORY_BARS, start_price=1800.0, seed=42):
+    """Random-walk OHLCV frame on a 30-minute grid, MT5 column names."""
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.0015, bars)))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0012, bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(100, 20_000, bars).astype(np.float64)
+    index = pd.date_range('2018-01-01', periods=bars, freq='30min', name='time')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low,
+                         'close': close, 'tick_volume': volume}, index=index)
+
+
+def load_m30(path=None, bars=None):
+    """
+    M30 bars (time-indexed, deduplicated): the file at `path`, cut to its
+    last `bars` rows when `bars` is given. Without a path, the recorded
+    history when `bars` is None (or missing from disk), else a synthetic
+    series of `bars` bars.
+    """
+    if path is None and (bars is not None or not os.path.exists(DEFAULT_M30_CSV)):
+        return synthetic_ohlcv(bars or M30_HISTORY_BARS)
+    df = pd.read_csv(path or DEFAULT_M30_CSV, parse_dates=['time'])
+    df = df.drop_duplicates('time').set_index('time').sort_index()
+    df = df[['open', 'high', 'low', 'close', 'tick_volume']].astype(np.float64)
+    return df if bars is None else df.iloc[-bars:]
+
+
+def timeit(fn, repeat=3):
+    """Best wall-clock time of `repeat` calls, in seconds, and the last result."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure(fn):
+    """(result, seconds, peak traced bytes) of fn(): one timed call, one under tracemalloc."""
+    start = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, seconds, peak
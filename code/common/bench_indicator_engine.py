@@ -0,0 +1,85 @@
+# common/bench_indicator_engine.py
+"""
+Speed comparison: the original per-function technical_indicators.py
+(frozen below, per-bar lambda CCI included) vs the shared indicator
+engine, on the M30 history (default: 89k synthetic bars).
+
+    python common/bench_indicator_engine.py               # 89k synthetic bars
+    python common/bench_indicator_engine.py --csv PATH    # recorded history
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bench_data import load_m30, timeit, M30_HISTORY_BARS
+from indicator_engine import compute_indicators, DEFAULT_FEATURES
+
+
+def legacy_block(df):
+    """
+    The pre-engine calculate_technical_indicators, column for column, on a
+    frozen copy of the original technical_indicators.py (pandas rolling /
+    ewm, CCI mean deviation via a per-bar rolling apply lambda). The module
+    itself has since been sped up, so it is no longer the baseline.
+    """
+    close = df['close']
+    ema12 = close.ewm(span=12, adjust=False).mean()
+    ema26 = close.ewm(span=26, adjust=False).mean()
+    delta = close.diff()
+    gain = delta.clip(lower=0).rolling(window=14).mean()
+    loss = -delta.clip(upper=0).rolling(window=14).mean()
+    ma20 = close.rolling(window=20).mean()
+    std20 = close.rolling(window=20).std()
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    mean_dev = tp.rolling(window=20).apply(lambda x: (x - x.mean()).abs().mean())
+    return np.column_stack([
+        close.rolling(window=10).mean(),
+        ema12 - ema26,
+        close - close.shift(4),
+        (close - close.shift(2)) / close.shift(2) * 100,
+        100 - (100 / (1 + gain / loss)),
+        ma20 + std20 * 2, ma20 - std20 * 2,
+        (tp - tp.rolling(window=20).mean()) / (0.015 * mean_dev),
+    ])
+
+
+def engine_block(df, dtype=np.float64):
+    block, _ = compute_indicators(
+        df['close'].to_numpy(), df['high'].to_numpy(), df['low'].to_numpy(),
+        features=DEFAULT_FEATURES, dtype=dtype,
+    )
+    return block
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', help='MT5 M30 export to benchmark on')
+    parser.add_argument('--bars', type=int, default=M30_HISTORY_BARS)
+    args = parser.parse_args()
+
+    df = load_m30(args.csv) if args.csv else load_m30(bars=args.bars)
+    print(f"Bars: {len(df):,}  features: {', '.join(DEFAULT_FEATURES)}")
+
+    t_legacy, legacy = timeit(lambda: legacy_block(df), repeat=1)
+    t_engine, engine = timeit(lambda: engine_block(df))
+    t_engine32, engine32 = timeit(lambda: engine_block(df, np.float32))
+
+    diff = np.nanmax(np.abs(engine - legacy), axis=0)
+    same_nan = (np.isnan(engine) == np.isnan(legacy)).all()
+    print(f"legacy (frozen original)    : {t_legacy * 1000:9.1f} ms")
+    print(f"engine float64              : {t_engine * 1000:9.1f} ms  ({t_legacy / t_engine:.1f}x)")
+    print(f"engine float32              : {t_engine32 * 1000:9.1f} ms  "
+          f"({engine32.nbytes / 2**20:.1f} MiB block)")
+    print(f"NaN layout identical: {same_nan}")
+    for name, d in zip(DEFAULT_FEATURES, diff):
+        print(f"  max |diff| {name:<11} {d:.3e}")
+
+
+if __name__ == '__main__':
+    main()
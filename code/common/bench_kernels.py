@@ -0,0 +1,83 @@
+# common/bench_kernels.py
+"""
+kernels.py backends side by side on 1M synthetic bars: EMA, Wilder
+ATR, ADX and the first-touch realistic labeler, plus the windowed
+perfect labeler (the original iterrows labelers are timed on a slice and
+extrapolated).
+
+    python common/bench_kernels.py [--bars 1000000] [--legacy-bars 5000]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import kernels
+from bench_data import synthetic_ohlcv, timeit
+from check_kernels import HOLDING_PERIOD, PERFECT_VARIANTS, legacy_perfect_labels, legacy_realistic_labels
+from trade_labels import ema_cross_directions, perfect_labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    parser.add_argument('--legacy-bars', type=int, default=5_000)
+    args = parser.parse_args()
+
+    df = synthetic_ohlcv(args.bars)
+    high, low, close = (df[c].to_numpy() for c in ('high', 'low', 'close'))
+    df['ema_10'] = kernels.ema(close, span=10)
+    df['ema_20'] = kernels.ema(close, span=20)
+    df['atr'] = kernels.atr(high, low, close, 14)
+    df['adx'] = kernels.adx(high, low, close, 14)[2]
+    direction = ema_cross_directions(df, HOLDING_PERIOD)
+    atr = df['atr'].to_numpy()
+    print(f"Bars: {args.bars:,}  trades simulated: {np.count_nonzero(direction):,}")
+
+    jobs = {
+        'ema span=20': lambda: kernels.ema(close, span=20),
+        'atr 14': lambda: kernels.atr(high, low, close, 14),
+        'adx 14': lambda: kernels.adx(high, low, close, 14),
+        'first_touch h=8': lambda: kernels.first_touch(high, low, close, direction, atr,
+                                                       2.0 * atr, 1.5 * atr, HOLDING_PERIOD),
+        'first_touch h=96': lambda: kernels.first_touch(high, low, close, direction, atr,
+                                                        2.0 * atr, 1.5 * atr, 96),
+    }
+    backends = kernels.available_backends()
+    times = {}
+    for backend in backends:
+        kernels.set_backend(backend)
+        for fn in jobs.values():
+            fn()   # JIT warm-up
+        for name, fn in jobs.items():
+            times[name, backend] = timeit(fn)[0]
+
+    print(f"{'kernel':<18}" + ''.join(f"{b:>12}" for b in backends) + '   speedup')
+    for name in jobs:
+        row = [times[name, b] for b in backends]
+        ratio = f"{row[-1] / row[0]:8.1f}x" if len(row) == 2 else ''
+        print(f"{name:<18}" + ''.join(f"{t * 1000:>10.1f}ms" for t in row) + f"  {ratio}")
+
+    part = df.iloc[:args.legacy_bars]
+    t_part, _ = timeit(lambda: legacy_realistic_labels(part), repeat=1)
+    best = min(times['first_touch h=8', b] for b in backends)
+    t_legacy = t_part * args.bars / args.legacy_bars
+    print(f"iterrows assign_realistic_label: {t_legacy:8.1f} s est. for {args.bars:,} bars "
+          f"({t_legacy / best:,.0f}x slower than the fastest first_touch)")
+
+    for variant in ('labeling2', 'labeling3'):
+        params = PERFECT_VARIANTS[variant]
+        t_new, _ = timeit(lambda: perfect_labels(df, *params[:4], HOLDING_PERIOD, include_entry=params[4]))
+        t_part, _ = timeit(lambda: legacy_perfect_labels(part, *params), repeat=1)
+        t_legacy = t_part * args.bars / args.legacy_bars
+        print(f"perfect_labels ({variant}): {t_new * 1000:8.1f} ms vs iterrows assign_perfect_label "
+              f"{t_legacy:8.1f} s est. ({t_legacy / t_new:,.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
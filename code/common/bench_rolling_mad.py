@@ -0,0 +1,59 @@
+# common/bench_rolling_mad.py
+"""
+rolling_mad vs the pandas rolling.apply(lambda) it replaces in
+commodity_channel_index, at 100k and 1M bars.
+
+    python common/bench_rolling_mad.py [--sizes 100000 1000000] [--full-legacy]
+
+The lambda version needs minutes at 1M bars, so by default its 1M time is
+extrapolated from a 100k slice (it scales linearly); --full-legacy runs it.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bench_data import synthetic_ohlcv, timeit
+from rolling import rolling_mad
+
+WINDOW = 20
+LEGACY_LIMIT = 100_000
+
+
+def legacy_mad(tp, window=WINDOW):
+    return tp.rolling(window=window).apply(lambda x: (x - x.mean()).abs().mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--full-legacy', action='store_true')
+    args = parser.parse_args()
+
+    print(f"{'bars':>10} {'lambda apply':>15} {'rolling_mad':>12} {'speedup':>8} {'max |diff|':>11}")
+    for n in args.sizes:
+        df = synthetic_ohlcv(n)
+        tp = (df['high'] + df['low'] + df['close']) / 3
+        t_new, fast = timeit(lambda: rolling_mad(tp.to_numpy(), WINDOW))
+
+        if n <= LEGACY_LIMIT or args.full_legacy:
+            t_old, slow = timeit(lambda: legacy_mad(tp), repeat=1)
+            label = ''
+        else:
+            part = tp.iloc[:LEGACY_LIMIT]
+            t_part, slow = timeit(lambda: legacy_mad(part), repeat=1)
+            t_old, label = t_part * n / LEGACY_LIMIT, ' est.'
+        m = len(slow)
+        diff = np.nanmax(np.abs(fast[:m] - slow.to_numpy()))
+        print(f"{n:>10,} {t_old:>9.2f}s{label:<5} {t_new * 1000:>10.1f}ms "
+              f"{t_old / t_new:>7.0f}x {diff:>11.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+# common/check_kernels.py
+"""
+Parity checks for kernels.py: every available backend against pandas /
+ta and against the others, plus first_touch-based realistic labels and
+windowed perfect labels (trade_labels.py) against the original per-row
+assign_realistic_label / assign_perfect_label.
+
+    python common/check_kernels.py [--bars N] [--csv PATH]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import kernels
+from bench_data import load_m30
+from trade_labels import ema_cross_directions, perfect_labels, realistic_labels
+
+TOLERANCE = 1e-9
+HOLDING_PERIOD = 8
+# (take_profit_strong, take_profit_weak, stop_loss, spread, include_entry) of
+# Grok_version/labeling2.py and labeling3.py's assign_perfect_label
+PERFECT_VARIANTS = {
+    'labeling2': (0.10, 0.05, 0.08, 0.02, True),
+    'labeling3': (0.01, 0.005, 0.01, 0.02, False),
+    # the scripts' pip-sized levels label every gold bar neutral; dollar-sized
+    # levels exercise all five classes
+    'dollar levels, entry bar': (6.0, 2.5, 6.0, 0.2, True),
+    'dollar levels, next bar': (6.0, 2.5, 6.0, 0.2, False),
+}
+
+
+def legacy_realistic_labels(df, tp_strong=2.0, tp_weak=1.5, holding_period=HOLDING_PERIOD):
+    """Grok_version/labeling2.py's assign_realistic_label, row by row."""
+    def assign(row, idx):
+        if idx < 1 or idx + holding_period >= len(df):
+            return 'neutral'
+        entry, atr, adx = row['close'], row['atr'], row['adx']
+        if adx < 15:
+            return 'neutral'
+        prev10, prev20 = df['ema_10'].iat[idx - 1], df['ema_20'].iat[idx - 1]
+        future = df.iloc[idx + 1:idx + holding_period + 1]
+        if prev10 <= prev20 and row['ema_10'] > row['ema_20']:
+            for _, f in future.iterrows():
+                if f['low'] <= entry - atr:
+                    return 'neutral'
+                if f['high'] >= entry + tp_strong * atr:
+                    return 'strong_buy'
+                if f['high'] >= entry + tp_weak * atr:
+                    return 'weak_buy'
+            return 'neutral'
+        if prev10 >= prev20 and row['ema_10'] < row['ema_20']:
+            for _, f in future.iterrows():
+                if f['high'] >= entry + atr:
+                    return 'neutral'
+                if f['low'] <= entry - tp_strong * atr:
+                    return 'strong_sell'
+                if f['low'] <= entry - tp_weak * atr:
+                    return 'weak_sell'
+            return 'neutral'
+        return 'neutral'
+    return np.array([assign(r, i) for i, r in df.reset_index(drop=True).iterrows()])
+
+
+def legacy_perfect_labels(df, tp_strong, tp_weak, stop, spread, include_entry,
+                          holding_period=HOLDING_PERIOD):
+    """Grok_version/labeling2.py / labeling3.py's assign_perfect_label, row by row."""
+    def assign(row, idx):
+        if idx + holding_period >= len(df):
+            return 'neutral'
+        start = idx if include_entry else idx + 1
+        window = df.iloc[start:idx + 1 + holding_period]
+        max_h, min_l = window['high'].max(), window['low'].min()
+        entry_buy, entry_sell = row['close'] + spread, row['close'] - spread
+        if (max_h - entry_buy) >= tp_strong and (entry_buy - min_l) < stop:
+            return 'strong_buy'
+        if (max_h - entry_buy) >= tp_weak and (entry_buy - min_l) < stop:
+            return 'weak_buy'
+        if (entry_sell - min_l) >= tp_strong and (max_h - entry_sell) < stop:
+            return 'strong_sell'
+        if (entry_sell - min_l) >= tp_weak and (max_h - entry_sell) < stop:
+            return 'weak_sell'
+        return 'neutral'
+    df = df.reset_index(drop=True)
+    return np.array([assign(r, i) for i, r in df.iterrows()])
+
+
+def compare(name, got, want, tol=TOLERANCE):
+    got, want = np.asarray(got, dtype=float), np.asarray(want, dtype=float)
+    same_nan = np.array_equal(np.isnan(got), np.isnan(want))
+    with np.errstate(invalid='ignore'):
+        err = np.nanmax(np.abs(got - want) / np.maximum(1.0, np.abs(want))) if np.isfinite(want).any() else 0.0
+    ok = same_nan and err <= tol
+    print(f"  {'ok ' if ok else 'BAD'} {name:<28} max rel err {err:.2e}  NaN layout {'same' if same_nan else 'DIFFERS'}")
+    return ok
+
+
+def main():
+    from ta.trend import ADXIndicator, EMAIndicator
+    from ta.volatility import AverageTrueRange
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv')
+    parser.add_argument('--bars', type=int, default=20_000)
+    args = parser.parse_args()
+    df = load_m30(args.csv) if args.csv else load_m30(bars=args.bars)
+    high, low, close = (df[c].to_numpy() for c in ('high', 'low', 'close'))
+    gappy = close.copy()
+    gappy[:5] = np.nan
+    gappy[100:103] = np.nan
+    ok = True
+
+    # reference values: pandas / ta
+    ref = {
+        'ema span=20': pd.Series(close).ewm(span=20, adjust=False).mean().to_numpy(),
+        'ema alpha=1/14 min_periods=14': pd.Series(gappy).ewm(alpha=1 / 14, adjust=False,
+                                                              min_periods=14).mean().to_numpy(),
+        'ema span=10 with NaN gaps': pd.Series(gappy).ewm(span=10, adjust=False).mean().to_numpy(),
+    }
+    adx_ta = ADXIndicator(df['high'], df['low'], df['close'], window=14)
+    ta_values = {
+        'atr 14 (ta)': AverageTrueRange(df['high'], df['low'], df['close'], window=14)
+        .average_true_range().to_numpy(),
+        'adx 14 (ta)': adx_ta.adx().to_numpy(),
+    }
+
+    enriched = df.reset_index(drop=True)
+    enriched['ema_10'] = EMAIndicator(enriched['close'], window=10).ema_indicator()
+    enriched['ema_20'] = EMAIndicator(enriched['close'], window=20).ema_indicator()
+    enriched['atr'] = ta_values['atr 14 (ta)']
+    enriched['adx'] = ta_values['adx 14 (ta)']
+    sample = enriched.iloc[:min(len(enriched), 5_000)]
+    legacy = legacy_realistic_labels(sample)
+    for variant, params in PERFECT_VARIANTS.items():
+        labels = perfect_labels(sample, *params[:4], HOLDING_PERIOD, include_entry=params[4])
+        same = np.array_equal(labels, legacy_perfect_labels(sample, *params))
+        counts = pd.Series(labels).value_counts().to_dict()
+        print(f"  {'ok ' if same else 'BAD'} perfect_labels == assign_perfect_label ({variant}, "
+              f"{len(sample):,} bars)  {counts}")
+        ok &= same
+    direction = ema_cross_directions(enriched, HOLDING_PERIOD)
+    atr = enriched['atr'].to_numpy()
+
+    results = {}
+    for backend in kernels.available_backends():
+        kernels.set_backend(backend)
+        print(f"Backend: {backend}")
+        got = {
+            'ema span=20': kernels.ema(close, span=20),
+            'ema alpha=1/14 min_periods=14': kernels.ema(gappy, alpha=1 / 14, min_periods=14),
+            'ema span=10 with NaN gaps': kernels.ema(gappy, span=10),
+        }
+        for name, want in ref.items():
+            ok &= compare(name, got[name], want)
+
+        # ta fills the warm-up bars of ATR/ADX with zeros where we have NaN
+        atr_k = kernels.atr(high, low, close, 14)
+        adx_k = kernels.adx(high, low, close, 14)[2]
+        ok &= compare('atr 14 (ta)', atr_k[14:], ta_values['atr 14 (ta)'][14:], tol=1e-6)
+        ok &= compare('adx 14 (ta)', adx_k[2 * 14 - 1:], ta_values['adx 14 (ta)'][2 * 14 - 1:], tol=1e-6)
+
+        labels = realistic_labels(sample)
+        same = np.array_equal(labels, legacy)
+        counts = pd.Series(labels).value_counts().to_dict()
+        print(f"  {'ok ' if same else 'BAD'} realistic_labels == assign_realistic_label "
+              f"({len(sample):,} bars)  {counts}")
+        ok &= same
+        codes = kernels.first_touch(high, low, close, direction, atr, 2.0 * atr, 1.5 * atr, HOLDING_PERIOD)
+        results[backend] = (got, atr_k, adx_k, codes)
+
+    if len(results) == 2:
+        print("numba vs numpy")
+        (g1, a1, d1, c1), (g2, a2, d2, c2) = results['numba'], results['numpy']
+        for name in g1:
+            ok &= compare(name, g1[name], g2[name], tol=1e-12)
+        ok &= compare('atr', a1, a2, tol=1e-12)
+        ok &= compare('adx', d1, d2, tol=1e-12)
+        same = np.array_equal(c1, c2)
+        print(f"  {'ok ' if same else 'BAD'} first_touch codes identical")
+        ok &= same
+
+    print('ALL OK' if ok else 'MISMATCHES FOUND')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# common/check_streaming_parity.py
+"""
+Checks streaming_indicators against the batch engine and technical_indicators.py,
+then times the live per-bar update at growing history lengths.
+
+    python common/check_streaming_parity.py [--bars N] [--csv PATH]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..', 'Final_model_with_XGboost'))
+
+import technical_indicators as ti
+from bench_data import load_m30
+from indicator_engine import indicator_frame
+from streaming_indicators import StreamingIndicatorSet
+
+FEATURES = ['MA_10', 'EMA_20', 'MACD', 'MACD_sig', 'Momentum_4', 'ROC_2', 'RSI_14',
+            'BB_upper', 'BB_lower', 'STD_20', 'CCI_20', 'ATR_14', 'ADX_14',
+            'DI_pos_14', 'DI_neg_14']
+TOLERANCE = 1e-8
+
+
+def stream(df, features, **options):
+    live = StreamingIndicatorSet(features, **options)
+    rows = []
+    bars = zip(*(df[c].to_numpy().tolist() for c in
+                 ('open', 'high', 'low', 'close', 'tick_volume')))
+    for bar in bars:
+        values = live.update(*bar)
+        rows.append([values[f] for f in features])
+    return np.array(rows, dtype=np.float64)
+
+
+def compare(name, got, want):
+    same_nan = np.array_equal(np.isnan(got), np.isnan(want))
+    scale = np.maximum(1.0, np.abs(want))
+    err = np.nanmax(np.abs(got - want) / scale) if np.isfinite(want).any() else 0.0
+    ok = same_nan and err <= TOLERANCE
+    print(f"  {'ok ' if ok else 'BAD'} {name:<12} max rel err {err:.2e}  NaN layout {'same' if same_nan else 'DIFFERS'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv')
+    parser.add_argument('--bars', type=int, default=20_000)
+    args = parser.parse_args()
+    df = load_m30(args.csv) if args.csv else load_m30(bars=args.bars)
+    ok = True
+
+    print(f"Streaming vs indicator_engine ({len(df):,} bars)")
+    got = stream(df, FEATURES)
+    want = indicator_frame(df, FEATURES).to_numpy()
+    for j, name in enumerate(FEATURES):
+        ok &= compare(name, got[:, j], want[:, j])
+
+    for smoothing, leading_zero in (('ewm', True), ('ewm', False), ('wilder', True)):
+        got = stream(df, ['RSI_14'], rsi_smoothing=smoothing, rsi_leading_zero=leading_zero)
+        want = indicator_frame(df, ['RSI_14'], rsi_smoothing=smoothing,
+                               rsi_leading_zero=leading_zero).to_numpy()
+        ok &= compare(f'RSI {smoothing}{"/0" if leading_zero else ""}', got[:, 0], want[:, 0])
+
+    print("Streaming vs technical_indicators.py")
+    got = stream(df, ['MA_10', 'MACD', 'RSI_14', 'BB_upper', 'BB_lower', 'CCI_20'])
+    upper, lower = ti.bollinger_bands(df['close'])
+    batch = [ti.moving_average(df['close'], 10), ti.macd(df['close']),
+             ti.relative_strength_index(df['close'], 14), upper, lower,
+             ti.commodity_channel_index(df)]
+    for j, (name, want) in enumerate(zip(['MA_10', 'MACD', 'RSI_14', 'BB_upper', 'BB_lower', 'CCI_20'], batch)):
+        ok &= compare(name, got[:, j], want.to_numpy())
+
+    print("Checkpoint / restore")
+    half = len(df) // 2
+    live = StreamingIndicatorSet(FEATURES)
+    live.warm_up(df.iloc[:half])
+    restored = StreamingIndicatorSet.from_state(json.loads(json.dumps(live.state_dict())))
+    a, b = live.warm_up(df.iloc[half:]), restored.warm_up(df.iloc[half:])
+    same = all(a[f] == b[f] or (a[f] != a[f] and b[f] != b[f]) for f in FEATURES)
+    print(f"  {'ok ' if same else 'BAD'} restored state continues identically")
+    ok &= same
+
+    print("Per-bar latency vs history length")
+    for history in sorted({h for h in (1_000, 10_000) if h < len(df)} | {len(df)}):
+        start_bar = max(history - 500, 0)
+        live = StreamingIndicatorSet(FEATURES)
+        live.warm_up(df.iloc[:start_bar])
+        tail = df.iloc[start_bar:history]
+        start = time.perf_counter()
+        live.warm_up(tail)
+        per_bar = (time.perf_counter() - start) / len(tail)
+        print(f"  history {history:>7,} bars: {per_bar * 1e6:7.1f} us/bar")
+
+    print('ALL OK' if ok else 'MISMATCHES FOUND')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+# common/check_ta_parity.py
+"""
+Correctness + speed of every indicator implementation in the repo
+against the `ta` library used by Grok_version/labeling*.py.
+
+Implementations are grouped in families by definition (e.g. RSI with
+Wilder / SMA / EWM smoothing, Bollinger with population vs sample std).
+Within a family every implementation must match the family reference to
+TOLERANCE; divergence from `ta` across families is reported, not failed.
+Each row also shows throughput, so the fastest correct implementation of
+each indicator is easy to pick.
+
+    python common/check_ta_parity.py [--bars N] [--csv PATH] [--indicators RSI ATR ...]
+
+Runs on a synthetic series of --bars bars and on the recorded M30 history
+(--csv, default: the XAUUSD export). Exits 1 on any in-family mismatch.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..', 'LSTM'))
+
+import kernels
+import streaming_indicators as si
+import technical_indicators as ti
+from bench_data import DEFAULT_M30_CSV, M30_HISTORY_BARS, load_m30, synthetic_ohlcv, timeit
+from indicator_engine import compute_indicators
+from indicator_sweep import sweep
+
+TOLERANCE = 1e-8
+# Bars skipped before comparing: ta fills some warm-ups with 0 where we have NaN
+WARMUP = 100
+
+
+def _engine(feature, **options):
+    def run(df):
+        block, _ = compute_indicators(df['close'].to_numpy(), df['high'].to_numpy(),
+                                      df['low'].to_numpy(), features=[feature], **options)
+        return block[:, 0]
+    return run
+
+
+def _kernel(fn, backend):
+    def run(df):
+        previous = kernels.set_backend(backend)
+        try:
+            return fn(df)
+        finally:
+            kernels.set_backend(previous)
+    return run
+
+
+def _stream(make, index=None):
+    def run(df):
+        node = make()
+        bars = zip(df['high'].to_numpy().tolist(), df['low'].to_numpy().tolist(),
+                   df['close'].to_numpy().tolist())
+        if node.needs_hlc:
+            out = [node.update(h, l, c) for h, l, c in bars]
+        else:
+            out = [node.update(c) for _, _, c in bars]
+        return np.array([o[index] for o in out] if index is not None else out, dtype=float)
+    return run
+
+
+def _hlc(df):
+    return df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy()
+
+
+def _pandas_ewm_rsi(df):
+    """events.find_rsi_events / pre-engine new_approch_LSTM formula."""
+    delta = df['close'].diff()
+    gain = delta.clip(lower=0).ewm(span=14, adjust=False).mean()
+    loss = -delta.clip(upper=0).ewm(span=14, adjust=False).mean()
+    return (100 - 100 / (1 + gain / loss)).to_numpy()
+
+
+def implementations():
+    """{indicator: [(implementation, family, fn(df) -> array)]}; the first of each family is its reference."""
+    from ta.momentum import RSIIndicator
+    from ta.trend import ADXIndicator, CCIIndicator, EMAIndicator, MACD, SMAIndicator
+    from ta.volatility import AverageTrueRange, BollingerBands
+
+    impl = {
+        'SMA_20': [
+            ('ta SMAIndicator', 'sma', lambda df: SMAIndicator(df['close'], 20).sma_indicator().to_numpy()),
+            ('technical_indicators', 'sma', lambda df: ti.moving_average(df['close'], 20).to_numpy()),
+            ('indicator_engine', 'sma', _engine('SMA_20')),
+            ('indicator_sweep', 'sma', lambda df: sweep(df['close'].to_numpy(), grid={'SMA': [20]},
+                                                        dtype=np.float64)[0][:, 0]),
+            ('streaming SMA', 'sma', _stream(lambda: si.SMA(20))),
+        ],
+        'EMA_20': [
+            ('ta EMAIndicator', 'ema', lambda df: EMAIndicator(df['close'], 20).ema_indicator().to_numpy()),
+            ('technical_indicators', 'ema',
+             lambda df: ti.exponential_moving_average(df['close'], 20).to_numpy()),
+            ('indicator_engine', 'ema', _engine('EMA_20')),
+            ('streaming EMA', 'ema', _stream(lambda: si.EMA(20))),
+        ] + [(f'kernels.ema ({b})', 'ema', _kernel(lambda df: kernels.ema(df['close'], span=20), b))
+             for b in kernels.available_backends()],
+        'MACD': [
+            ('ta MACD', 'macd', lambda df: MACD(df['close']).macd().to_numpy()),
+            ('technical_indicators', 'macd', lambda df: ti.macd(df['close']).to_numpy()),
+            ('indicator_engine', 'macd', _engine('MACD')),
+            ('streaming MACD', 'macd', _stream(lambda: si.MACD(), 0)),
+        ],
+        'MACD_sig': [
+            ('ta MACD', 'macd', lambda df: MACD(df['close']).macd_signal().to_numpy()),
+            ('indicator_engine', 'macd', _engine('MACD_sig')),
+            ('streaming MACD', 'macd', _stream(lambda: si.MACD(), 1)),
+        ],
+        'RSI_14': [
+            ('ta RSIIndicator', 'wilder', lambda df: RSIIndicator(df['close'], 14).rsi().to_numpy()),
+            # ta's diff.where(diff > 0, 0.0) turns the first (NaN) delta into 0
+            ('indicator_engine wilder', 'wilder',
+             _engine('RSI_14', rsi_smoothing='wilder', rsi_leading_zero=True)),
+            ('streaming RSI wilder', 'wilder', _stream(lambda: si.RSI(14, 'wilder', leading_zero=True))),
+            ('technical_indicators', 'sma',
+             lambda df: ti.relative_strength_index(df['close'], 14).to_numpy()),
+            ('indicator_engine sma', 'sma', _engine('RSI_14')),
+            ('indicator_sweep sma', 'sma', lambda df: sweep(df['close'].to_numpy(), grid={'RSI': [14]},
+                                                            dtype=np.float64)[0][:, 0]),
+            ('streaming RSI sma', 'sma', _stream(lambda: si.RSI(14))),
+            ('pandas ewm (events.py)', 'ewm', _pandas_ewm_rsi),
+            ('indicator_engine ewm', 'ewm', _engine('RSI_14', rsi_smoothing='ewm')),
+            ('streaming RSI ewm', 'ewm', _stream(lambda: si.RSI(14, 'ewm'))),
+        ],
+        'BB_upper_20': [
+            ('ta BollingerBands', 'population std',
+             lambda df: BollingerBands(df['close'], 20, 2).bollinger_hband().to_numpy()),
+            ('technical_indicators', 'sample std',
+             lambda df: ti.bollinger_bands(df['close'], 20)[0].to_numpy()),
+            ('indicator_engine', 'sample std', _engine('BB_upper_20')),
+            ('indicator_sweep', 'sample std', lambda df: sweep(df['close'].to_numpy(), grid={'BB': [20]},
+                                                               dtype=np.float64)[0][:, 0]),
+            ('streaming BollingerBands', 'sample std', _stream(lambda: si.BollingerBands(20), 0)),
+        ],
+        'CCI_20': [
+            ('ta CCIIndicator', 'cci', lambda df: CCIIndicator(df['high'], df['low'], df['close'], 20)
+             .cci().to_numpy()),
+            ('technical_indicators', 'cci', lambda df: ti.commodity_channel_index(df, 20).to_numpy()),
+            ('indicator_engine', 'cci', _engine('CCI_20')),
+            ('streaming CCI', 'cci', _stream(lambda: si.CCI(20))),
+        ],
+        'ATR_14': [
+            ('ta AverageTrueRange', 'wilder', lambda df: AverageTrueRange(df['high'], df['low'], df['close'], 14)
+             .average_true_range().to_numpy()),
+            ('indicator_engine', 'wilder', _engine('ATR_14')),
+            ('streaming ATR', 'wilder', _stream(lambda: si.ATR(14))),
+        ] + [(f'kernels.atr ({b})', 'wilder', _kernel(lambda df: kernels.atr(*_hlc(df), 14), b))
+             for b in kernels.available_backends()],
+        'ADX_14': [
+            ('ta ADXIndicator', 'wilder', lambda df: ADXIndicator(df['high'], df['low'], df['close'], 14)
+             .adx().to_numpy()),
+            ('indicator_engine', 'wilder', _engine('ADX_14')),
+            ('streaming ADX', 'wilder', _stream(lambda: si.ADX(14), 0)),
+        ] + [(f'kernels.adx ({b})', 'wilder', _kernel(lambda df: kernels.adx(*_hlc(df), 14)[2], b))
+             for b in kernels.available_backends()],
+    }
+    return impl
+
+
+def divergence(got, want):
+    """(max abs diff, max rel diff, bars where only one side is NaN) after WARMUP."""
+    got, want = np.asarray(got, dtype=float)[WARMUP:], np.asarray(want, dtype=float)[WARMUP:]
+    one_nan = int(np.count_nonzero(np.isnan(got) != np.isnan(want)))
+    both = ~np.isnan(got) & ~np.isnan(want)
+    if not both.any():
+        return 0.0, 0.0, one_nan
+    diff = np.abs(got[both] - want[both])
+    return float(diff.max()), float((diff / np.maximum(1.0, np.abs(want[both]))).max()), one_nan
+
+
+def run_suite(df, label, indicators):
+    print(f"\n== {label}: {len(df):,} bars ==")
+    print(f"{'indicator':<12} {'implementation':<26} {'family':<15} {'Mbars/s':>8} "
+          f"{'rel vs fam':>10} {'abs vs ta':>10}  status")
+    ok = True
+    for indicator, rows in implementations().items():
+        if indicators and indicator.split('_')[0] not in indicators:
+            continue
+        values, refs, fastest = {}, {}, {}
+        for name, family, fn in rows:
+            repeat = 1 if name.startswith(('streaming', 'ta CCI')) else 3
+            seconds, values[name] = timeit(lambda: fn(df), repeat=repeat)
+            refs.setdefault(family, name)
+            ta_name = rows[0][0]
+            _, rel_family, nan_family = divergence(values[name], values[refs[family]])
+            abs_ta, _, _ = divergence(values[name], values[ta_name])
+            same = rel_family <= TOLERANCE and nan_family == 0
+            ok &= same
+            status = 'ref' if refs[family] == name else ('ok' if same else 'MISMATCH')
+            if same and (family not in fastest or seconds < fastest[family][1]):
+                fastest[family] = (name, seconds)
+            print(f"{indicator:<12} {name:<26} {family:<15} {len(df) / seconds / 1e6:>8.2f} "
+                  f"{rel_family:>10.1e} {abs_ta:>10.1e}  {status}"
+                  + (f" ({nan_family} NaN mismatches)" if nan_family else ''))
+        for family, (name, _) in fastest.items():
+            print(f"{'':<12} fastest {family}: {name}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Indicator parity and throughput vs ta.')
+    parser.add_argument('--bars', type=int, default=M30_HISTORY_BARS)
+    parser.add_argument('--csv', default=DEFAULT_M30_CSV)
+    parser.add_argument('--indicators', nargs='+', help='e.g. RSI ATR (default: all)')
+    args = parser.parse_args()
+
+    ok = run_suite(synthetic_ohlcv(args.bars), 'synthetic', args.indicators)
+    if os.path.exists(args.csv):
+        ok &= run_suite(load_m30(args.csv), os.path.basename(args.csv), args.indicators)
+    print('\nALL OK' if ok else '\nMISMATCHES FOUND')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# common/direction_labels.py
+"""
+Vectorised up / down / flat labels for many horizons and thresholds.
+
+label_data (LSTM/ and Final_model_with_XGboost/) labels the next bar's
+move with a per-row Series.apply and a fixed absolute threshold. Here
+every (horizon, threshold) pair comes out of one pass over the close
+array as an (n, horizons, thresholds) int8 block:
+
+    UP (2)        close[i + h] - close[i] >  threshold
+    DOWN (1)      close[i + h] - close[i] < -threshold
+    FLAT (0)      otherwise
+    NO_LABEL (-1) bar i + h does not exist (or the scale is NaN)
+
+Thresholds are in price units (mode='absolute'), fractions of close[i]
+('percent', 0.001 = 0.1%) or multiples of ATR at bar i ('atr'), which
+keeps one threshold meaningful across price regimes.
+
+    python common/direction_labels.py [--bars N]   # sweep vs Series.apply
+"""
+
+import numpy as np
+import pandas as pd
+
+UP, DOWN, FLAT, NO_LABEL = 2, 1, 0, -1
+MODES = ('absolute', 'percent', 'atr')
+
+
+def future_change(close, horizons):
+    """(n, H) close[i + h] - close[i], NaN where i + h runs past the end."""
+    close = np.asarray(close, dtype=np.float64)
+    horizons = np.atleast_1d(horizons)
+    n = len(close)
+    out = np.full((n, len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        if 0 < h < n:
+            out[:n - h, j] = close[h:] - close[:n - h]
+    return out
+
+
+def direction_labels(close, horizons=1, thresholds=0.0005, mode='absolute', atr=None):
+    """(n, H, K) int8 labels (UP / DOWN / FLAT / NO_LABEL) for every horizon x threshold."""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    change = future_change(close, horizons)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mode == 'percent':
+            change /= np.asarray(close, dtype=np.float64)[:, None]
+        elif mode == 'atr':
+            if atr is None:
+                raise ValueError("mode='atr' needs the atr array")
+            change /= np.asarray(atr, dtype=np.float64)[:, None]
+    change = change[:, :, None]
+    t = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))[None, None, :]
+    return np.select([np.isnan(change), change > t, change < -t],
+                     [NO_LABEL, UP, DOWN], FLAT).astype(np.int8)
+
+
+def label_frame(df, horizons=(1,), thresholds=(0.0005,), mode='absolute', atr_period=14,
+                price_col='close'):
+    """
+    direction_labels on df[price_col] as a DataFrame with one column per
+    pair, named label_h{h}_{mode}{threshold}. mode='atr' uses df['atr']
+    when present, else Wilder ATR(atr_period) of high / low / close.
+    """
+    atr = None
+    if mode == 'atr':
+        if 'atr' in df.columns:
+            atr = df['atr'].to_numpy()
+        else:
+            from kernels import atr as wilder_atr
+            atr = wilder_atr(df['high'].to_numpy(), df['low'].to_numpy(), df[price_col].to_numpy(),
+                             atr_period)
+    horizons, thresholds = np.atleast_1d(horizons), np.atleast_1d(thresholds)
+    block = direction_labels(df[price_col].to_numpy(), horizons, thresholds, mode, atr)
+    names = [f'label_h{h}_{mode}{t:g}' for h in horizons for t in thresholds]
+    return pd.DataFrame(block.reshape(len(df), -1), index=df.index, columns=names)
+
+
+def main():
+    import argparse
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_data import M30_HISTORY_BARS, synthetic_ohlcv, timeit
+
+    parser = argparse.ArgumentParser(description='Label sweep vs per-row Series.apply.')
+    parser.add_argument('--bars', type=int, default=M30_HISTORY_BARS)
+    args = parser.parse_args()
+    df = synthetic_ohlcv(args.bars)
+
+    def apply_labels(threshold=0.0005, horizon=1):
+        diff = df['close'].shift(-horizon) - df['close']
+        return diff.apply(lambda d: 2 if d > threshold else 1 if d < -threshold else 0).to_numpy()
+
+    t_apply, want = timeit(lambda: apply_labels(), repeat=1)
+    t_one, got = timeit(lambda: direction_labels(df['close'], 1, 0.0005)[:, 0, 0])
+    ok = np.array_equal(got[:-1], want[:-1]) and got[-1] == NO_LABEL
+    horizons, thresholds = [1, 2, 4, 8, 16, 48], [0.0005, 0.001, 0.002, 0.005]
+    t_sweep, block = timeit(lambda: label_frame(df, horizons, thresholds, mode='percent'))
+    print(f"{args.bars:,} bars")
+    print(f"  Series.apply, 1 label       {t_apply * 1000:8.1f} ms")
+    print(f"  direction_labels, 1 label   {t_one * 1000:8.2f} ms  ({t_apply / t_one:,.0f}x)")
+    print(f"  label_frame, {block.shape[1]} labels     {t_sweep * 1000:8.2f} ms "
+          f"({len(horizons)} horizons x {len(thresholds)} percent thresholds)")
+    print('ALL OK' if ok else 'MISMATCH')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
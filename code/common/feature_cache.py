@@ -0,0 +1,277 @@
+# common/feature_cache.py
+"""
+On-disk cache for computed indicator / feature columns.
+
+Entries are keyed by a hash of the input data (index + price arrays) plus
+the feature name, its parameters and FEATURE_VERSION, and stored as uncompressed .npz
+files (one array per column). A JSON manifest tracks size and last access
+so the cache can be bounded with LRU eviction; hits only update it in
+memory, and it is written on put / purge and once at exit.
+
+    python common/feature_cache.py --list            # show entries
+    python common/feature_cache.py --purge [NAME]    # drop all / one feature
+
+Set FEATURE_CACHE_DIR to move the cache, FEATURE_CACHE_DISABLE=1 to bypass it.
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicator_engine import indicator_frame
+
+DEFAULT_DIR = os.environ.get(
+    'FEATURE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.feature_cache'),
+)
+DEFAULT_MAX_BYTES = 2 * 2**30
+# Bump when indicator_engine / kernels change the values they compute
+# (2: EMA, true range and DMI moved onto kernels)
+FEATURE_VERSION = 2
+MANIFEST = 'manifest.json'
+
+
+def fingerprint(*arrays):
+    """Stable hash of a sequence of arrays / Series / Index objects (None is skipped)."""
+    h = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        if arr is None:
+            h.update(b'<none>')
+            continue
+        if isinstance(arr, pd.DatetimeIndex):
+            arr = arr.asi8
+        values = np.ascontiguousarray(np.asarray(arr))
+        h.update(str(values.dtype).encode())
+        h.update(str(values.shape).encode())
+        h.update(values.tobytes() if values.dtype.kind != 'O' else repr(values.tolist()).encode())
+    return h.hexdigest()
+
+
+def make_key(data_fingerprint, name, params=None):
+    payload = json.dumps({'data': data_fingerprint, 'name': name, 'params': params or {},
+                          'version': FEATURE_VERSION},
+                         sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class FeatureCache:
+    def __init__(self, root=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.enabled = os.environ.get('FEATURE_CACHE_DISABLE') != '1'
+        self.events = []   # (name, key, 'hit' | 'miss', seconds) for this process
+        os.makedirs(self.root, exist_ok=True)
+        self._manifest = self._read_manifest()
+        self._dirty = False
+        atexit.register(self.flush)
+
+    # --- manifest ---------------------------------------------------------
+
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path()) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        tmp = self._manifest_path() + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self._manifest, fh, indent=1)
+        os.replace(tmp, self._manifest_path())
+        self._dirty = False
+
+    def flush(self):
+        """Write the access times / hit counts of this process' hits, if any."""
+        if self._dirty:
+            self._write_manifest()
+
+    def _path(self, key):
+        return os.path.join(self.root, f'{key}.npz')
+
+    # --- entries ------------------------------------------------------------
+
+    def _record(self, name, key, status, seconds):
+        self.events.append((name, key, status, seconds))
+
+    def get(self, key, name=None):
+        """{column: array} for a cached entry, or None. Hits are recorded under `name`."""
+        entry = self._manifest.get(key)
+        if not self.enabled or entry is None:
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                columns = {col: data[col] for col in data.files}
+        except (OSError, ValueError, KeyError):
+            self.invalidate(key=key)
+            return None
+        entry['last_access'] = time.time()
+        entry['hits'] = entry.get('hits', 0) + 1
+        self._dirty = True
+        if name is not None:
+            self._record(name, key, 'hit', entry['compute_seconds'])
+        return columns
+
+    def put(self, key, columns, name, params=None, compute_seconds=0.0):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        with open(path, 'wb') as fh:
+            np.savez(fh, **columns)
+        now = time.time()
+        self._manifest[key] = {
+            'name': name,
+            'params': params or {},
+            'bytes': os.path.getsize(path),
+            'rows': int(len(next(iter(columns.values())))) if columns else 0,
+            'created': now,
+            'last_access': now,
+            'compute_seconds': compute_seconds,
+            'hits': 0,
+        }
+        self._evict()
+        self._write_manifest()
+
+    def _evict(self):
+        total = sum(e['bytes'] for e in self._manifest.values())
+        for key, entry in sorted(self._manifest.items(), key=lambda kv: kv[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= entry['bytes']
+            self._remove(key)
+
+    def _remove(self, key):
+        self._manifest.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def invalidate(self, key=None, name=None):
+        """Drop one entry by key, every entry of a feature name, or everything."""
+        if key is not None:
+            keys = [key]
+        elif name is not None:
+            keys = [k for k, e in self._manifest.items() if e['name'] == name]
+        else:
+            keys = list(self._manifest)
+        for k in keys:
+            self._remove(k)
+        self._write_manifest()
+        return len(keys)
+
+    def purge(self, name=None):
+        """Drop every entry of feature `name`, or everything; returns the count."""
+        return self.invalidate(name=name)
+
+    def get_or_compute(self, data_fingerprint, name, params, compute):
+        """
+        Cached `compute()` -> {column: array}. The cache key combines the
+        input fingerprint, `name` and `params`.
+        """
+        key = make_key(data_fingerprint, name, params)
+        columns = self.get(key, name)
+        if columns is not None:
+            return columns
+        start = time.perf_counter()
+        columns = compute()
+        elapsed = time.perf_counter() - start
+        self.put(key, columns, name, params, elapsed)
+        self._record(name, key, 'miss', elapsed)
+        return columns
+
+    # --- reporting ------------------------------------------------------------
+
+    def report(self):
+        """Hit/miss summary of this process' lookups."""
+        hits = [e for e in self.events if e[2] == 'hit']
+        misses = [e for e in self.events if e[2] == 'miss']
+        lines = [f"Feature cache {self.root}: {len(hits)} hit(s), {len(misses)} miss(es)"]
+        for name, key, status, seconds in self.events:
+            verb = 'reused, saved' if status == 'hit' else 'computed in'
+            lines.append(f"  {status:<4} {name:<14} {key[:10]}  {verb} {seconds * 1000:.1f} ms")
+        return '\n'.join(lines)
+
+    def entries(self):
+        """[(key, manifest entry)], most recently used first."""
+        return sorted(self._manifest.items(), key=lambda kv: -kv[1]['last_access'])
+
+    def total_bytes(self):
+        return sum(e['bytes'] for e in self._manifest.values())
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Process-wide cache instance used by the indicator wrappers."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FeatureCache()
+    return _default_cache
+
+
+def cached_indicator_frame(df, features, columns, cache=None, **options):
+    """
+    indicator_engine.indicator_frame with one cache entry per feature.
+    Only the features missing from the cache are computed (in a single
+    engine call, so they still share intermediates).
+    """
+    cache = cache or default_cache()
+    present = {key: col for key, col in columns.items() if col in df.columns}
+    data_fp = fingerprint(df.index, *(df[present[k]] if k in present else None
+                                      for k in ('open', 'high', 'low', 'close', 'volume')))
+    dtype = options.pop('dtype', np.float64)
+    params = dict(options)
+
+    out, missing = {}, []
+    for name in features:
+        key = make_key(data_fp, name, params)
+        hit = cache.get(key, name)
+        if hit is not None:
+            out[name] = hit['values']
+        else:
+            missing.append((name, key))
+    if missing:
+        start = time.perf_counter()
+        block = indicator_frame(df, [name for name, _ in missing], columns=columns, **options)
+        per_feature = (time.perf_counter() - start) / len(missing)
+        for name, key in missing:
+            out[name] = block[name].to_numpy()
+            cache.put(key, {'values': out[name]}, name, params, per_feature)
+            cache._record(name, key, 'miss', per_feature)
+    return pd.DataFrame({name: out[name].astype(dtype, copy=False) for name in features},
+                        index=df.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or purge the feature cache.')
+    parser.add_argument('--dir', default=DEFAULT_DIR)
+    parser.add_argument('--list', action='store_true')
+    parser.add_argument('--purge', nargs='?', const='*', metavar='NAME',
+                        help='drop every entry, or only entries for feature NAME')
+    args = parser.parse_args()
+    cache = FeatureCache(args.dir)
+    if args.purge:
+        n = cache.purge(None if args.purge == '*' else args.purge)
+        print(f"Removed {n} entr{'y' if n == 1 else 'ies'}")
+    if args.list or not args.purge:
+        entries = cache.entries()
+        print(f"{cache.root}: {len(entries)} entries, {cache.total_bytes() / 2**20:.1f} MiB")
+        for key, e in entries:
+            print(f"  {key[:10]}  {e['name']:<14} rows={e['rows']:<8} {e['bytes'] / 2**10:8.1f} KiB "
+                  f"hits={e.get('hits', 0):<4} {json.dumps(e['params'], sort_keys=True)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
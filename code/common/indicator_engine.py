@@ -0,0 +1,335 @@
+# common/indicator_engine.py
+"""
+Shared technical-indicator engine.
+
+The OHLCV arrays are handed over once and every requested indicator is
+computed from a single context that memoises intermediate series (EMAs,
+SMAs, rolling stds, typical price, ...). MACD, its signal line, Bollinger
+Bands and CCI therefore reuse the same EMA12/26 and SMA20/STD20 instead of
+recomputing them per indicator, and the whole feature block comes back as
+one 2D array.
+
+Feature names follow the column names already used across the repo:
+
+    MA_<n> / SMA_<n>   simple moving average of close
+    EMA_<n>            exponential moving average (span=n, adjust=False)
+    MACD, MACD_sig     fast/slow (default 12/26) EMA difference and its
+                       9-span signal line
+    Signal             alias of MACD_sig (release/indicators.py naming)
+    MACD_hist          MACD - MACD_sig
+    Momentum_<n>       close - close.shift(n)
+    ROC_<n>            percent rate of change over n bars
+    RSI_<n> / RSI      relative strength index (default 14); SMA-, EWM- or
+                       Wilder-smoothed depending on `rsi_smoothing`
+    BB_upper_<n>, BB_lower_<n>, BB_mid_<n>   Bollinger Bands (default 20, 2 std)
+    STD_<n>            rolling standard deviation of close
+    CCI_<n>            commodity channel index (default 20)
+    ATR_<n>            Wilder average true range (default 14)
+    ADX_<n>, DI_pos_<n>, DI_neg_<n>   Wilder ADX and directional indicators (default 14)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+import kernels
+from rolling import rolling_mad
+
+# Column set used by the XGBoost/LSTM technical branch
+DEFAULT_FEATURES = [
+    'MA_10', 'MACD', 'Momentum_4', 'ROC_2', 'RSI_14',
+    'BB_upper', 'BB_lower', 'CCI_20',
+]
+
+# Lower-case MetaTrader export columns (open, high, low, close, tick_volume)
+MT5_COLUMNS = {'open': 'open', 'high': 'high', 'low': 'low',
+               'close': 'close', 'volume': 'tick_volume'}
+# Capitalised columns produced by new_approch_LSTM/src/data_prep.load_data
+OHLCV_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low',
+                 'close': 'Close', 'volume': 'Volume'}
+
+_NAME_RE = re.compile(r'^(?P<base>[A-Za-z]+(?:_[A-Za-z]+)*?)(?:_(?P<period>\d+))?$')
+
+
+def _as_float(values):
+    if values is None:
+        return None
+    return np.asarray(values, dtype=np.float64)
+
+
+class IndicatorContext:
+    """
+    Holds the raw price arrays plus a cache of every intermediate series
+    computed so far, keyed by (kind, period, source).
+    """
+
+    def __init__(self, close, high=None, low=None, open_=None, volume=None,
+                 rsi_smoothing='sma', rsi_leading_zero=False, bb_dev=2.0,
+                 macd_periods=(12, 26)):
+        if rsi_smoothing not in ('sma', 'ewm', 'wilder'):
+            raise ValueError("rsi_smoothing must be 'sma', 'ewm' or 'wilder'")
+        self.sources = {
+            'close': _as_float(close),
+            'high': _as_float(high),
+            'low': _as_float(low),
+            'open': _as_float(open_),
+            'volume': _as_float(volume),
+        }
+        self.rsi_smoothing = rsi_smoothing
+        self.rsi_leading_zero = rsi_leading_zero
+        self.bb_dev = bb_dev
+        self.macd_periods = macd_periods
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.sources['close'])
+
+    def _memo(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def source(self, name):
+        """Raw price array or a derived base series ('tp', 'tr', 'macd')."""
+        if name == 'tp':
+            return self._memo(('tp',), self._typical_price)
+        if name == 'tr':
+            return self.true_range()
+        if name == 'macd':
+            fast, slow = self.macd_periods
+            return self._memo(('macd',), lambda: self.ema(fast) - self.ema(slow))
+        values = self.sources.get(name)
+        if values is None:
+            raise ValueError(f"indicator needs the '{name}' column, which was not provided")
+        return values
+
+    def _typical_price(self):
+        return (self.source('high') + self.source('low') + self.source('close')) / 3
+
+    def true_range(self):
+        """max(high-low, |high-prev_close|, |low-prev_close|); high-low on the first bar."""
+        return self._memo(('tr',), lambda: kernels.true_range(
+            self.source('high'), self.source('low'), self.source('close')))
+
+    # --- shared primitives -------------------------------------------------
+
+    def sma(self, period, src='close'):
+        return self._memo(('sma', period, src), lambda: (
+            pd.Series(self.source(src)).rolling(window=period).mean().to_numpy()))
+
+    def std(self, period, src='close'):
+        return self._memo(('std', period, src), lambda: (
+            pd.Series(self.source(src)).rolling(window=period).std().to_numpy()))
+
+    def ema(self, period, src='close'):
+        return self._memo(('ema', period, src), lambda: kernels.ema(self.source(src), span=period))
+
+    def shifted(self, period, src='close'):
+        def _shift():
+            values = self.source(src)
+            out = np.full_like(values, np.nan)
+            if period < len(values):
+                out[period:] = values[:len(values) - period]
+            return out
+        return self._memo(('shift', period, src), _shift)
+
+    def delta(self, src='close'):
+        return self._memo(('delta', src), lambda: self.source(src) - self.shifted(1, src))
+
+    def mad(self, period, src='tp'):
+        """Rolling mean absolute deviation around the window mean."""
+        return self._memo(('mad', period, src), lambda: rolling_mad(self.source(src), period))
+
+    def wilder(self, period, src):
+        return self._memo(('wilder', period, src), lambda: wilder_smooth(self.source(src), period))
+
+    def directional(self, period):
+        """(+DI, -DI, ADX) with Wilder smoothing over `period` bars."""
+        return self._memo(('dmi', period), lambda: kernels.adx(
+            self.source('high'), self.source('low'), self.source('close'), period,
+            tr=self.true_range()))
+
+
+# Wilder's running average (seeded with an SMA); see kernels.wilder
+wilder_smooth = kernels.wilder
+
+
+# --- indicator definitions -------------------------------------------------
+
+def _sma(ctx, period):
+    return ctx.sma(period)
+
+
+def _ema(ctx, period):
+    return ctx.ema(period)
+
+
+def _std(ctx, period):
+    return ctx.std(period)
+
+
+def _macd(ctx, period):
+    return ctx.source('macd')
+
+
+def _macd_signal(ctx, period):
+    return ctx.ema(period or 9, 'macd')
+
+
+def _macd_hist(ctx, period):
+    return ctx.source('macd') - _macd_signal(ctx, period)
+
+
+def _momentum(ctx, period):
+    return ctx.source('close') - ctx.shifted(period)
+
+
+def _roc(ctx, period):
+    prev = ctx.shifted(period)
+    return (ctx.source('close') - prev) / prev * 100
+
+
+def _rsi(ctx, period):
+    period = period or 14
+    delta = ctx.delta()
+    if ctx.rsi_leading_zero:
+        # delta.where(delta > 0, 0) style: the first (NaN) delta counts as 0
+        delta = np.nan_to_num(delta, nan=0.0)
+    # delta.clip(...) style otherwise: the leading NaN is kept
+    gain = np.clip(delta, 0, None)
+    loss = -np.clip(delta, None, 0)
+    if ctx.rsi_smoothing == 'sma':
+        avg_gain = pd.Series(gain).rolling(window=period).mean().to_numpy()
+        avg_loss = pd.Series(loss).rolling(window=period).mean().to_numpy()
+    elif ctx.rsi_smoothing == 'ewm':
+        avg_gain = kernels.ema(gain, span=period)
+        avg_loss = kernels.ema(loss, span=period)
+    else:
+        # Wilder: alpha=1/period, first value after `period` observations
+        # (ta's RSIIndicator when combined with rsi_leading_zero=True)
+        avg_gain = kernels.ema(gain, alpha=1 / period, min_periods=period)
+        avg_loss = kernels.ema(loss, alpha=1 / period, min_periods=period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def _bb_mid(ctx, period):
+    return ctx.sma(period or 20)
+
+
+def _bb_upper(ctx, period):
+    period = period or 20
+    return ctx.sma(period) + ctx.std(period) * ctx.bb_dev
+
+
+def _bb_lower(ctx, period):
+    period = period or 20
+    return ctx.sma(period) - ctx.std(period) * ctx.bb_dev
+
+
+def _cci(ctx, period):
+    period = period or 20
+    tp = ctx.source('tp')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (tp - ctx.sma(period, 'tp')) / (0.015 * ctx.mad(period, 'tp'))
+
+
+def _atr(ctx, period):
+    period = period or 14
+    return ctx.wilder(period, 'tr')
+
+
+def _adx(ctx, period):
+    return ctx.directional(period or 14)[2]
+
+
+def _di_pos(ctx, period):
+    return ctx.directional(period or 14)[0]
+
+
+def _di_neg(ctx, period):
+    return ctx.directional(period or 14)[1]
+
+
+INDICATORS = {
+    'MA': _sma,
+    'SMA': _sma,
+    'EMA': _ema,
+    'STD': _std,
+    'MACD': _macd,
+    'MACD_sig': _macd_signal,
+    'Signal': _macd_signal,
+    'MACD_hist': _macd_hist,
+    'Momentum': _momentum,
+    'ROC': _roc,
+    'RSI': _rsi,
+    'BB_mid': _bb_mid,
+    'BB_upper': _bb_upper,
+    'BB_lower': _bb_lower,
+    'CCI': _cci,
+    'ATR': _atr,
+    'ADX': _adx,
+    'DI_pos': _di_pos,
+    'DI_neg': _di_neg,
+}
+
+# Indicators that cannot be computed without an explicit period suffix
+_NEEDS_PERIOD = {'MA', 'SMA', 'EMA', 'STD', 'Momentum', 'ROC'}
+
+
+def parse_feature(name):
+    """Split a feature name like 'RSI_14' into (indicator function, period)."""
+    match = _NAME_RE.match(name)
+    if match is None or match.group('base') not in INDICATORS:
+        raise ValueError(f"Unknown indicator feature: {name!r}")
+    base = match.group('base')
+    period = int(match.group('period')) if match.group('period') else None
+    if period is None and base in _NEEDS_PERIOD:
+        raise ValueError(f"Indicator {name!r} needs a period suffix, e.g. '{base}_10'")
+    return INDICATORS[base], period
+
+
+def compute_indicators(close, high=None, low=None, open_=None, volume=None,
+                       features=DEFAULT_FEATURES, dtype=np.float64,
+                       rsi_smoothing='sma', rsi_leading_zero=False, bb_dev=2.0,
+                       macd_periods=(12, 26)):
+    """
+    Compute every feature in `features` from the given price arrays.
+
+    Returns (block, names) where block is an (n, len(features)) array of
+    `dtype` whose columns follow `names`.
+    """
+    ctx = IndicatorContext(close, high, low, open_, volume,
+                           rsi_smoothing=rsi_smoothing,
+                           rsi_leading_zero=rsi_leading_zero,
+                           bb_dev=bb_dev, macd_periods=macd_periods)
+    names = list(features)
+    block = np.empty((len(ctx), len(names)), dtype=dtype)
+    for j, name in enumerate(names):
+        fn, period = parse_feature(name)
+        block[:, j] = fn(ctx, period)
+    return block, names
+
+
+def indicator_frame(df, features=DEFAULT_FEATURES, columns=MT5_COLUMNS,
+                    dtype=np.float64, rsi_smoothing='sma', rsi_leading_zero=False,
+                    bb_dev=2.0, macd_periods=(12, 26)):
+    """
+    DataFrame front-end for compute_indicators.
+
+    `columns` maps the logical open/high/low/close/volume inputs to the
+    column names of `df`; inputs whose column is missing are skipped.
+    """
+    arrays = {key: df[col].to_numpy() for key, col in columns.items() if col in df.columns}
+    if 'close' not in arrays:
+        raise KeyError(f"close column {columns.get('close')!r} not found in DataFrame")
+    block, names = compute_indicators(
+        arrays['close'], arrays.get('high'), arrays.get('low'),
+        arrays.get('open'), arrays.get('volume'),
+        features=features, dtype=dtype,
+        rsi_smoothing=rsi_smoothing, rsi_leading_zero=rsi_leading_zero,
+        bb_dev=bb_dev, macd_periods=macd_periods,
+    )
+    return pd.DataFrame(block, index=df.index, columns=names)
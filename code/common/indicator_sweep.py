@@ -0,0 +1,298 @@
+# common/indicator_sweep.py
+"""
+Parameter sweeps: many periods of the same indicators as one matrix.
+
+Instead of editing calculate_technical_indicators and rerunning a
+pipeline per setting, pass a grid of periods per indicator family:
+
+    block, names = sweep(close, high, low,
+                         grid={'RSI': range(5, 51), 'MA': range(5, 301), 'BB': [10, 20, 30]})
+
+Every variant becomes one float32 column of `block` (names follow
+indicator_engine, e.g. 'RSI_14', 'MA_10', 'BB_upper_20'), so the matrix
+can go straight into feature selection. Work is shared across variants:
+window means of any period come from one anchored prefix sum per input
+series, and RSI gains/losses, typical price and true range are built
+once. Rolling stds stay on pandas (Welford): a prefix sum of squares
+loses too much precision on near-flat windows. Families can be computed
+on a thread pool (`workers`), each writing its own columns of the
+matrix.
+
+    python common/indicator_sweep.py [--bars N] [--csv PATH] [--workers N]
+"""
+
+import argparse
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import kernels
+from indicator_engine import MT5_COLUMNS, IndicatorContext, compute_indicators, wilder_smooth
+from rolling import rolling_mad
+
+# Grid used by the benchmark: the LSTM/XGBoost feature set around its current periods
+DEFAULT_GRID = {
+    'RSI': range(5, 51),
+    'MA': range(5, 301),
+    'EMA': range(5, 201),
+    'Momentum': range(1, 51),
+    'ROC': range(1, 51),
+    'BB': range(10, 61),
+    'CCI': range(10, 61),
+}
+
+
+class _Prefix:
+    """
+    Prefix sum of one series (relative to its mean, to limit cancellation)
+    giving the mean of every length-`period` window in O(n) for any period.
+    Windows that contain a NaN come out NaN.
+    """
+
+    def __init__(self, values):
+        missing = np.isnan(values)
+        self.anchor = values[~missing].mean() if (~missing).any() else 0.0
+        dev = np.where(missing, 0.0, values - self.anchor)
+        self.s1 = np.concatenate(([0.0], np.cumsum(dev)))
+        self.nans = np.concatenate(([0], np.cumsum(missing)))
+
+    def _window(self, prefix, period):
+        return prefix[period:] - prefix[:-period]
+
+    def _finish(self, values, period):
+        out = np.full(len(self.s1) - 1, np.nan)
+        if values is not None:
+            out[period - 1:] = values
+            if self.nans[-1]:
+                out[period - 1:][self._window(self.nans, period) > 0] = np.nan
+        return out
+
+    def mean(self, period):
+        if period > len(self.s1) - 1:
+            return self._finish(None, period)
+        return self._finish(self._window(self.s1, period) / period + self.anchor, period)
+
+
+class SweepContext:
+    """Price arrays plus the per-series intermediates shared by every variant."""
+
+    def __init__(self, close, high=None, low=None, rsi_smoothing='sma',
+                 rsi_leading_zero=False, bb_dev=2.0):
+        self.base = IndicatorContext(close, high, low, rsi_smoothing=rsi_smoothing,
+                                     rsi_leading_zero=rsi_leading_zero, bb_dev=bb_dev)
+        self.rsi_smoothing = rsi_smoothing
+        self.rsi_leading_zero = rsi_leading_zero
+        self.bb_dev = bb_dev
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.base)
+
+    def _memo(self, key, fn):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = fn()
+            return self._cache[key]
+
+    def source(self, name):
+        if name in ('gain', 'loss'):
+            return self._gains_losses()[name == 'loss']
+        return self.base.source(name)
+
+    def _gains_losses(self):
+        def _split():
+            delta = self.base.delta()
+            if self.rsi_leading_zero:
+                delta = np.nan_to_num(delta, nan=0.0)
+            return np.clip(delta, 0, None), -np.clip(delta, None, 0)
+        return self._memo(('gains_losses',), _split)
+
+    def prefix(self, src):
+        return self._memo(('prefix', src), lambda: _Prefix(self.source(src)))
+
+    def std(self, period):
+        return pd.Series(self.source('close')).rolling(window=period).std().to_numpy()
+
+    def shifted(self, period):
+        close = self.source('close')
+        out = np.full_like(close, np.nan)
+        if period < len(close):
+            out[period:] = close[:len(close) - period]
+        return out
+
+
+# --- families: each yields (name, values) per period -----------------------
+
+def _sma_family(base):
+    def family(ctx, periods):
+        for p in periods:
+            yield f'{base}_{p}', ctx.prefix('close').mean(p)
+    return family
+
+
+def _ema(ctx, periods):
+    close = ctx.source('close')
+    for p in periods:
+        yield f'EMA_{p}', kernels.ema(close, span=p)
+
+
+def _std(ctx, periods):
+    for p in periods:
+        yield f'STD_{p}', ctx.std(p)
+
+
+def _momentum(ctx, periods):
+    close = ctx.source('close')
+    for p in periods:
+        yield f'Momentum_{p}', close - ctx.shifted(p)
+
+
+def _roc(ctx, periods):
+    close = ctx.source('close')
+    for p in periods:
+        prev = ctx.shifted(p)
+        yield f'ROC_{p}', (close - prev) / prev * 100
+
+
+def _rsi(ctx, periods):
+    gain, loss = ctx.source('gain'), ctx.source('loss')
+    for p in periods:
+        if ctx.rsi_smoothing == 'sma':
+            avg_gain, avg_loss = ctx.prefix('gain').mean(p), ctx.prefix('loss').mean(p)
+        elif ctx.rsi_smoothing == 'ewm':
+            avg_gain, avg_loss = kernels.ema(gain, span=p), kernels.ema(loss, span=p)
+        else:
+            avg_gain = kernels.ema(gain, alpha=1 / p, min_periods=p)
+            avg_loss = kernels.ema(loss, alpha=1 / p, min_periods=p)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            yield f'RSI_{p}', 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def _bb(ctx, periods):
+    for p in periods:
+        mid, std = ctx.prefix('close').mean(p), ctx.std(p)
+        yield f'BB_upper_{p}', mid + ctx.bb_dev * std
+        yield f'BB_lower_{p}', mid - ctx.bb_dev * std
+
+
+def _cci(ctx, periods):
+    tp = ctx.source('tp')
+    for p in periods:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            yield f'CCI_{p}', (tp - ctx.prefix('tp').mean(p)) / (0.015 * rolling_mad(tp, p))
+
+
+def _atr(ctx, periods):
+    tr = ctx.source('tr')
+    for p in periods:
+        yield f'ATR_{p}', wilder_smooth(tr, p)
+
+
+FAMILIES = {
+    'MA': _sma_family('MA'),
+    'SMA': _sma_family('SMA'),
+    'EMA': _ema,
+    'STD': _std,
+    'Momentum': _momentum,
+    'ROC': _roc,
+    'RSI': _rsi,
+    'BB': _bb,
+    'CCI': _cci,
+    'ATR': _atr,
+}
+# Columns produced per period
+_WIDTH = {'BB': 2}
+
+
+def sweep_names(grid):
+    """Column names of sweep(grid), in order."""
+    names = []
+    for family, periods in grid.items():
+        for p in periods:
+            names.extend([f'BB_upper_{p}', f'BB_lower_{p}'] if family == 'BB'
+                         else [f'{family}_{p}'])
+    return names
+
+
+def sweep(close, high=None, low=None, grid=DEFAULT_GRID, dtype=np.float32, workers=None,
+          rsi_smoothing='sma', rsi_leading_zero=False, bb_dev=2.0):
+    """
+    Compute every period in `grid` ({family: periods}, families as in
+    FAMILIES) and return (block, names): an (n, n_variants) `dtype` matrix
+    and its column names. With `workers` > 1 the families run on a thread
+    pool; NumPy / pandas release the GIL in the heavy loops.
+    """
+    unknown = set(grid) - set(FAMILIES)
+    if unknown:
+        raise ValueError(f"Unknown sweep families {sorted(unknown)}; expected {sorted(FAMILIES)}")
+    ctx = SweepContext(close, high, low, rsi_smoothing=rsi_smoothing,
+                       rsi_leading_zero=rsi_leading_zero, bb_dev=bb_dev)
+    names = sweep_names(grid)
+    # column-major, so each variant is written to contiguous memory
+    block = np.empty((len(ctx), len(names)), dtype=dtype, order='F')
+
+    tasks, col = [], 0
+    for family, periods in grid.items():
+        periods = list(periods)
+        tasks.append((family, periods, col))
+        col += len(periods) * _WIDTH.get(family, 1)
+
+    def run(task):
+        family, periods, start = task
+        for j, (_, values) in enumerate(FAMILIES[family](ctx, periods)):
+            block[:, start + j] = values
+
+    if workers and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, tasks))
+    else:
+        for task in tasks:
+            run(task)
+    return block, names
+
+
+def sweep_frame(df, grid=DEFAULT_GRID, columns=MT5_COLUMNS, **options):
+    """DataFrame front-end for sweep(); `columns` as in indicator_engine.indicator_frame."""
+    arrays = {key: df[col].to_numpy() for key, col in columns.items() if col in df.columns}
+    block, names = sweep(arrays['close'], arrays.get('high'), arrays.get('low'), grid, **options)
+    return pd.DataFrame(block, index=df.index, columns=names)
+
+
+def main():
+    from bench_data import load_m30, timeit
+
+    parser = argparse.ArgumentParser(description='Time a parameter sweep against the engine.')
+    parser.add_argument('--csv')
+    parser.add_argument('--bars', type=int)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    df = load_m30(args.csv, args.bars)
+    close, high, low = (df[c].to_numpy() for c in ('close', 'high', 'low'))
+    names = sweep_names(DEFAULT_GRID)
+    print(f"{len(names)} variants x {len(df):,} bars "
+          f"({len(names) * len(df) * 4 / 2**20:.0f} MiB float32)")
+
+    t_serial, (block, _) = timeit(lambda: sweep(close, high, low), repeat=1)
+    t_pool, _ = timeit(lambda: sweep(close, high, low, workers=args.workers), repeat=1)
+    t_engine, (want, _) = timeit(lambda: compute_indicators(close, high, low, features=names,
+                                                             dtype=np.float32), repeat=1)
+    print(f"  indicator_engine, one call:  {t_engine:7.2f} s")
+    print(f"  sweep, serial:               {t_serial:7.2f} s  ({t_engine / t_serial:.1f}x)")
+    print(f"  sweep, {args.workers} workers:           {t_pool:7.2f} s  ({t_engine / t_pool:.1f}x)")
+
+    with np.errstate(invalid='ignore'):
+        scale = np.maximum(1.0, np.abs(want))
+        err = np.nanmax(np.abs(block - want) / scale, axis=0)
+    same_nan = np.array_equal(np.isnan(block), np.isnan(want))
+    worst = int(np.nanargmax(err))
+    print(f"Max rel err vs engine {err[worst]:.1e} ({names[worst]}), "
+          f"NaN layout {'same' if same_nan else 'DIFFERS'}")
+    return 0 if same_nan and err[worst] < 1e-4 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
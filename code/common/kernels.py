@@ -0,0 +1,299 @@
+# common/kernels.py
+"""
+Recursive / path-dependent kernels with a pluggable backend.
+
+EMA-type smoothing (EMA, Wilder's average used by RSI/ATR/ADX), true
+range / directional movement and the first-touch trade simulation used
+by the Grok labelers are loops at heart. Two interchangeable backends
+implement them:
+
+    numba   the loops, JIT-compiled (used when numba is importable)
+    numpy   pandas' ewm for the recursions, array expressions for
+            TR / DM and a vectorised (bars x horizon) first-touch search
+
+Both give the same results (see check_kernels.py). The backend is chosen
+at import time; set KERNEL_BACKEND=numpy|numba to force one, or call
+set_backend().
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ('numba', 'numpy')
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != 'numba' or numba is not None]
+
+
+_backend = os.environ.get('KERNEL_BACKEND') or available_backends()[0]
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(name):
+    """Switch every kernel to `name` ('numba' or 'numpy'); returns the previous backend."""
+    global _backend
+    if name not in available_backends():
+        raise ValueError(f"Kernel backend {name!r} not available; have {available_backends()}")
+    previous, _backend = _backend, name
+    return previous
+
+
+if _backend not in available_backends():
+    raise ImportError(f"KERNEL_BACKEND={_backend!r} is not available; have {available_backends()}")
+
+
+# --- EMA recursion ------------------------------------------------------------
+
+def _ema_numpy(values, alpha, min_periods):
+    return pd.Series(values).ewm(alpha=alpha, adjust=False,
+                                 min_periods=min_periods).mean().to_numpy()
+
+
+def _ema_loop(values, alpha, min_periods):
+    # Same recursion as pandas' ewm(adjust=False, ignore_na=False): NaNs
+    # carry the last value forward and decay the weight of the old average.
+    out = np.empty(len(values))
+    weighted = np.nan
+    old_wt = 1.0
+    nobs = 0
+    for i in range(len(values)):
+        cur = values[i]
+        is_obs = cur == cur
+        if is_obs:
+            nobs += 1
+        if weighted == weighted:
+            old_wt *= 1.0 - alpha
+            if is_obs:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_obs:
+            weighted = cur
+        out[i] = weighted if nobs >= max(min_periods, 1) else np.nan
+    return out
+
+
+def _wilder_numpy(values, period):
+    out = np.full_like(values, np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < period:
+        return out
+    first = valid[0]
+    seeded = values[first:].copy()
+    seeded[:period - 1] = np.nan
+    seeded[period - 1] = values[first:first + period].mean()
+    out[first:] = _ema_numpy(seeded, 1 / period, 0)
+    return out
+
+
+def _wilder_loop(values, period):
+    n = len(values)
+    out = np.full(n, np.nan)
+    first, count = -1, 0
+    for i in range(n):
+        if values[i] == values[i]:
+            count += 1
+            if first < 0:
+                first = i
+    if count < period:
+        return out
+    seeded = values[first:].copy()
+    seeded[period - 1] = seeded[:period].mean()
+    seeded[:period - 1] = np.nan
+    out[first:] = _ema_loop(seeded, 1.0 / period, 0)
+    return out
+
+
+def _true_range_numpy(high, low, close):
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    with np.errstate(invalid='ignore'):
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _true_range_loop(high, low, close):
+    n = len(close)
+    out = np.empty(n)
+    for i in range(n):
+        tr = high[i] - low[i]
+        if i > 0:
+            # fmax semantics: NaN candidates are ignored
+            for cand in (abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])):
+                if cand > tr or tr != tr:
+                    tr = cand
+        out[i] = tr
+    return out
+
+
+def _directional_movement_numpy(high, low):
+    up = np.concatenate(([np.nan], high[1:] - high[:-1]))
+    down = np.concatenate(([np.nan], low[:-1] - low[1:]))
+    with np.errstate(invalid='ignore'):
+        dm_pos = np.where((up > down) & (up > 0), up, 0.0)
+        dm_neg = np.where((down > up) & (down > 0), down, 0.0)
+    # Directional movement starts on the second bar
+    dm_pos[0] = dm_neg[0] = np.nan
+    return dm_pos, dm_neg
+
+
+def _directional_movement_loop(high, low):
+    n = len(high)
+    dm_pos, dm_neg = np.zeros(n), np.zeros(n)
+    dm_pos[0] = dm_neg[0] = np.nan
+    for i in range(1, n):
+        up, down = high[i] - high[i - 1], low[i - 1] - low[i]
+        if up > down and up > 0:
+            dm_pos[i] = up
+        if down > up and down > 0:
+            dm_neg[i] = down
+    return dm_pos, dm_neg
+
+
+# --- first-touch trade simulation ---------------------------------------------
+
+def _first_touch_numpy(high, low, entry, direction, stop, tp_strong, tp_weak, horizon):
+    n = len(entry)
+    out = np.zeros(n, dtype=np.int8)
+    rows = np.flatnonzero(direction)
+    if not len(rows) or horizon < 1:
+        return out
+    # row i holds bars i+1 .. i+horizon (NaN past the end)
+    pad = np.full(horizon, np.nan)
+    fut_high = np.lib.stride_tricks.sliding_window_view(np.concatenate([high[1:], pad]), horizon)[rows]
+    fut_low = np.lib.stride_tricks.sliding_window_view(np.concatenate([low[1:], pad]), horizon)[rows]
+    side = direction[rows][:, None]
+    e, s = entry[rows][:, None], stop[rows][:, None]
+    strong_d, weak_d = tp_strong[rows][:, None], tp_weak[rows][:, None]
+    long = side > 0
+    with np.errstate(invalid='ignore'):
+        stopped = np.where(long, fut_low <= e - s, fut_high >= e + s)
+        strong = np.where(long, fut_high >= e + strong_d, fut_low <= e - strong_d)
+        weak = np.where(long, fut_high >= e + weak_d, fut_low <= e - weak_d)
+    hit = stopped | strong | weak
+    first = hit.argmax(axis=1)
+    at = np.arange(len(rows))
+    code = np.where(stopped[at, first], 0, np.where(strong[at, first], 2, 1))
+    out[rows] = np.where(hit[at, first], code * np.sign(direction[rows]), 0)
+    return out
+
+
+def _first_touch_loop(high, low, entry, direction, stop, tp_strong, tp_weak, horizon):
+    n = len(entry)
+    out = np.zeros(n, dtype=np.int8)
+    for i in range(n):
+        side = direction[i]
+        if side == 0:
+            continue
+        e, s, strong_d, weak_d = entry[i], stop[i], tp_strong[i], tp_weak[i]
+        for j in range(i + 1, min(i + 1 + horizon, n)):
+            if side > 0:
+                if low[j] <= e - s:
+                    break
+                if high[j] >= e + strong_d:
+                    out[i] = 2
+                    break
+                if high[j] >= e + weak_d:
+                    out[i] = 1
+                    break
+            else:
+                if high[j] >= e + s:
+                    break
+                if low[j] <= e - strong_d:
+                    out[i] = -2
+                    break
+                if low[j] <= e - weak_d:
+                    out[i] = -1
+                    break
+    return out
+
+
+if numba is not None:
+    _jit = numba.njit(cache=True, nogil=True)
+    _ema_loop = _jit(_ema_loop)
+    _wilder_loop = _jit(_wilder_loop)
+    _true_range_loop = _jit(_true_range_loop)
+    _directional_movement_loop = _jit(_directional_movement_loop)
+    _first_touch_loop = _jit(_first_touch_loop)
+
+_IMPL = {
+    'numba': {'ema': _ema_loop, 'wilder': _wilder_loop, 'true_range': _true_range_loop,
+              'dm': _directional_movement_loop, 'first_touch': _first_touch_loop},
+    'numpy': {'ema': _ema_numpy, 'wilder': _wilder_numpy, 'true_range': _true_range_numpy,
+              'dm': _directional_movement_numpy, 'first_touch': _first_touch_numpy},
+}
+
+
+def _f64(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# --- public kernels -----------------------------------------------------------
+
+def ema(values, span=None, alpha=None, min_periods=0):
+    """pandas ewm(span=... | alpha=..., adjust=False, min_periods=...).mean() as an array."""
+    if alpha is None:
+        alpha = 2.0 / (span + 1)
+    return _IMPL[_backend]['ema'](_f64(values), float(alpha), int(min_periods))
+
+
+def wilder(values, period):
+    """
+    Wilder's running average: seeded with the simple mean of the first
+    `period` valid values, then avg = (prev * (period - 1) + x) / period.
+    Leading NaNs are skipped; output is NaN until the seed is available.
+    """
+    return _IMPL[_backend]['wilder'](_f64(values), int(period))
+
+
+def true_range(high, low, close):
+    """max(high-low, |high-prev_close|, |low-prev_close|); high-low on the first bar."""
+    return _IMPL[_backend]['true_range'](_f64(high), _f64(low), _f64(close))
+
+
+def atr(high, low, close, period=14):
+    return wilder(true_range(high, low, close), period)
+
+
+def adx(high, low, close, period=14, tr=None):
+    """(+DI, -DI, ADX) with Wilder smoothing over `period` bars."""
+    tr = (true_range(high, low, close) if tr is None else _f64(tr)).copy()
+    tr[0] = np.nan
+    dm_pos, dm_neg = _IMPL[_backend]['dm'](_f64(high), _f64(low))
+    s_tr = wilder(tr, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = np.where(s_tr != 0, 100 * wilder(dm_pos, period) / s_tr, 0.0)
+        di_neg = np.where(s_tr != 0, 100 * wilder(dm_neg, period) / s_tr, 0.0)
+        di_sum = di_pos + di_neg
+        dx = np.where(di_sum != 0, 100 * np.abs(di_pos - di_neg) / di_sum, 0.0)
+    di_pos[np.isnan(s_tr)] = np.nan
+    di_neg[np.isnan(s_tr)] = np.nan
+    dx[np.isnan(s_tr)] = np.nan
+    return di_pos, di_neg, wilder(dx, period)
+
+
+def first_touch(high, low, entry, direction, stop, tp_strong, tp_weak, horizon):
+    """
+    Simulate a trade from every bar with direction +1 (long) / -1 (short)
+    over the next `horizon` bars, checking each bar for the stop first,
+    then the strong and the weak take-profit (distances from `entry`;
+    scalars or per-bar arrays). Returns int8 codes: +-2 strong target hit
+    first, +-1 weak target, 0 stopped out / nothing hit / no trade.
+    """
+    n = len(entry)
+
+    def _arr(x, dtype=np.float64):
+        return np.ascontiguousarray(np.broadcast_to(np.asarray(x, dtype=dtype), (n,)))
+
+    return _IMPL[_backend]['first_touch'](
+        _arr(high), _arr(low), _arr(entry), _arr(direction, np.int8), _arr(stop),
+        _arr(tp_strong), _arr(tp_weak), int(horizon))
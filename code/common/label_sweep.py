@@ -0,0 +1,175 @@
+# common/label_sweep.py
+"""
+Grid search over the Grok labeling parameters on a process pool.
+
+Tuning holding_period, the ATR stop / target multipliers, the ADX filter
+or the spread used to mean editing the constants of labeling2.py /
+labeling3.py and rerunning the script. Here the indicators the labelers
+need (ema_10, ema_20, atr, adx) are computed once, the OHLC + indicator
+columns are placed in one multiprocessing.shared_memory block, and every
+worker labels its configs against that block without copying it:
+
+    rows = run_sweep(df, expand_grid(DEFAULT_GRID), workers=8)
+
+Each config gives one row: realistic (trade_labels.realistic_labels) and
+perfect (trade_labels.perfect_labels) class counts, how often the two
+agree (over all bars and over realistic trades only) and the seconds the
+config took.
+
+    python common/label_sweep.py [--csv PATH] [--bars N] [--workers N] [--out label_sweep.csv]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kernels
+from trade_labels import LABEL_NAMES, ema_cross_directions, perfect_labels, realistic_labels
+
+COLUMNS = ('high', 'low', 'close', 'ema_10', 'ema_20', 'atr', 'adx')
+
+# (stop, strong target, weak target) in ATRs; perfect levels (strong, weak,
+# stop) in price units. The first entries are labeling2.py's settings, the
+# second ones labeling3.py's.
+DEFAULT_GRID = {
+    'holding_period': [4, 8, 16],
+    'atr_levels': [(1.0, 2.0, 1.5), (1.0, 1.5, 1.2)],
+    'adx_min': [0, 15, 20, 25],
+    'spread': [0.02, 0.2],
+    'perfect_levels': [(0.10, 0.05, 0.08), (0.01, 0.005, 0.01), (6.0, 2.5, 6.0)],
+    'include_entry': [True, False],
+}
+
+
+def expand_grid(grid):
+    """Every combination of `grid` ({parameter: values}) as a list of dicts."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def add_label_indicators(df):
+    """
+    ema_10 / ema_20 / atr / adx as labeling2.py computes them with ta,
+    through kernels (ta leaves zeros in the ATR / ADX warm-up, so do we).
+    """
+    high, low, close = (df[c].to_numpy(dtype=np.float64) for c in ('high', 'low', 'close'))
+    out = pd.DataFrame({'high': high, 'low': low, 'close': close})
+    out['ema_10'] = kernels.ema(close, span=10, min_periods=10)
+    out['ema_20'] = kernels.ema(close, span=20, min_periods=20)
+    out['atr'] = np.nan_to_num(kernels.atr(high, low, close, 14))
+    out['adx'] = np.nan_to_num(kernels.adx(high, low, close, 14)[2])
+    return out
+
+
+# --- shared memory -----------------------------------------------------------
+
+_frame = None
+_shm = None
+
+
+def _attach(name, shape):
+    """Pool initializer: view the parent's block as a DataFrame (no copy)."""
+    global _frame, _shm
+    _shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    _frame = pd.DataFrame(dict(zip(COLUMNS, block)), copy=False)
+
+
+def evaluate(config, df=None):
+    """Label `df` (default: the shared frame) with one config; returns a result row."""
+    df = _frame if df is None else df
+    start = time.perf_counter()
+    stop_atr, tp_strong_atr, tp_weak_atr = config['atr_levels']
+    tp_strong, tp_weak, stop = config['perfect_levels']
+    hp = config['holding_period']
+    real = realistic_labels(df, stop_atr, tp_strong_atr, tp_weak_atr, hp, config['adx_min'], names=False)
+    perfect = perfect_labels(df, tp_strong, tp_weak, stop, config['spread'], hp,
+                             include_entry=config['include_entry'], names=False)
+    trades = ema_cross_directions(df, hp, config['adx_min']) != 0
+    seconds = time.perf_counter() - start
+
+    row = {'holding_period': hp, 'stop_atr': stop_atr, 'tp_strong_atr': tp_strong_atr,
+           'tp_weak_atr': tp_weak_atr, 'adx_min': config['adx_min'], 'spread': config['spread'],
+           'tp_strong': tp_strong, 'tp_weak': tp_weak, 'stop': stop,
+           'include_entry': config['include_entry'], 'trades': int(trades.sum())}
+    for prefix, codes in (('real', real), ('perfect', perfect)):
+        counts = np.bincount(codes.astype(np.int64) + 2, minlength=len(LABEL_NAMES))
+        row.update({f'{prefix}_{name}': int(c) for name, c in zip(LABEL_NAMES, counts)})
+    same = real == perfect
+    row['agree_pct'] = 100.0 * same.mean()
+    row['trade_agree_pct'] = 100.0 * same[trades].mean() if trades.any() else np.nan
+    row['seconds'] = seconds
+    return row
+
+
+def run_sweep(df, configs, workers=None, chunksize=4):
+    """
+    Evaluate every config on `df` (OHLC frame) and return the results as a
+    DataFrame, one row per config in grid order. workers=1 runs in-process.
+    """
+    frame = add_label_indicators(df)
+    if workers == 1:
+        return pd.DataFrame([evaluate(c, frame) for c in configs])
+
+    block = frame[list(COLUMNS)].to_numpy(dtype=np.float64).T
+    shm = shared_memory.SharedMemory(create=True, size=block.nbytes)
+    try:
+        np.ndarray(block.shape, dtype=np.float64, buffer=shm.buf)[:] = block
+        with ProcessPoolExecutor(workers, initializer=_attach,
+                                 initargs=(shm.name, block.shape)) as pool:
+            rows = list(pool.map(evaluate, configs, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+    return pd.DataFrame(rows)
+
+
+def report(results, top=15):
+    """Compact distribution table: class shares (%) per config, best agreement first."""
+    table = results.copy()
+    for prefix in ('real', 'perfect'):
+        cols = [f'{prefix}_{name}' for name in LABEL_NAMES]
+        share = table[cols].div(table[cols].sum(axis=1), axis=0) * 100
+        table[f'{prefix} sell/neutral/buy %'] = [
+            f"{r[0] + r[1]:4.1f}/{r[2]:5.1f}/{r[3] + r[4]:4.1f}" for r in share.to_numpy()]
+    keep = ['holding_period', 'stop_atr', 'tp_strong_atr', 'tp_weak_atr', 'adx_min', 'spread',
+            'tp_strong', 'tp_weak', 'stop', 'include_entry', 'trades',
+            'real sell/neutral/buy %', 'perfect sell/neutral/buy %',
+            'agree_pct', 'trade_agree_pct', 'seconds']
+    table = table.sort_values('trade_agree_pct', ascending=False)[keep].head(top)
+    return table.to_string(index=False, float_format=lambda x: f'{x:.3g}')
+
+
+def main():
+    from bench_data import load_m30
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv')
+    parser.add_argument('--bars', type=int)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', default='label_sweep.csv')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    df = load_m30(args.csv, bars=args.bars)
+    configs = expand_grid(DEFAULT_GRID)
+    start = time.perf_counter()
+    results = run_sweep(df, configs, workers=args.workers)
+    wall = time.perf_counter() - start
+    results.to_csv(args.out, index=False)
+    print(f"{len(configs)} configs on {len(df):,} bars, {args.workers} workers: {wall:.1f} s wall, "
+          f"{results['seconds'].sum():.1f} s of labeling  -> {args.out}")
+    print(report(results, args.top))
+
+
+if __name__ == '__main__':
+    main()
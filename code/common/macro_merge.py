@@ -0,0 +1,168 @@
+# common/macro_merge.py
+"""
+All macro calendars onto the forex bars in one pass.
+
+generate_all.py / preprocess.py / preprocess2.py used to chain six
+merge_macro_to_forex calls (CPI, GDP, Interest_Rate, NFP, PCE, PPI),
+each re-sorting the whole forex frame, merging, forward-filling and
+returning a new copy of it. merge_macros does the same alignment once:
+
+  - every calendar becomes rows of one long table (factor, time, Actual,
+    Forecast, Previous), with release_dates.release_timestamps floored
+    to the chart timeframe as before ('1W' / '1M' to the period start)
+  - one searchsorted of those times against the sorted bar times gives
+    each release its bar
+  - the placed releases are spread into {factor}_Actual / _Forecast /
+    _Previous columns, forward-filled, and joined to the bars once
+
+A release lands on the bar whose time equals its floored release time,
+as with the chained merges; align='next' instead moves releases that
+fall between bars (weekends, holidays) onto the next bar. When a
+factor has two releases on one bar the chained merges duplicated that
+bar (in no reliable order); here the bar is kept once, with the later
+release's values and any gaps in them filled from the earlier one.
+
+    python common/macro_merge.py [--timeframe 1M]   # parity / time / memory vs the chained merges
+"""
+
+import numpy as np
+import pandas as pd
+
+from release_dates import release_timestamps
+
+FIELDS = ('Actual', 'Forecast', 'Previous')
+
+
+def floor_times(times, timeframe=None):
+    """Floor to the chart timeframe: '1W' / '1M' to the period start, else Series.dt.floor."""
+    times = pd.Series(times)
+    if timeframe is None:
+        return times
+    if timeframe == '1W':
+        return times.dt.to_period('W').dt.start_time
+    if timeframe == '1M':
+        return times.dt.to_period('M').dt.start_time
+    return times.dt.floor(timeframe)
+
+
+def stack_releases(macros, timeframe=None):
+    """
+    {factor: calendar frame} -> one long table of release keys (factor,
+    time floored to `timeframe`, source row of the calendar) in release
+    order; the Actual / Forecast / Previous values stay in the calendars.
+    """
+    parts = [pd.DataFrame({'factor': factor, 'time': release_timestamps(macro_df).to_numpy(),
+                           'source': np.arange(len(macro_df))})
+             for factor, macro_df in macros.items()]
+    long = pd.concat(parts, ignore_index=True).sort_values('time', kind='stable', ignore_index=True)
+    long['time'] = floor_times(long['time'], timeframe).to_numpy()
+    return long
+
+
+def merge_macros(forex_df, macros, timeframe=None, fields=FIELDS, align='exact'):
+    """
+    forex_df (with a 'time' column) sorted by time, plus {factor}_{field}
+    columns for every calendar in `macros` ({factor: frame with Release
+    Date, Time and `fields`}), each holding the latest release so far.
+    """
+    if align not in ('exact', 'next'):
+        raise ValueError(f"align must be 'exact' or 'next', got {align!r}")
+    forex = forex_df.sort_values('time', kind='stable', ignore_index=True)
+    bar_times = forex['time'].to_numpy(dtype='datetime64[ns]')
+    long = stack_releases(macros, timeframe)
+
+    # one as-of alignment of every release against the bars
+    release_times = long['time'].to_numpy(dtype='datetime64[ns]')
+    rows = np.searchsorted(bar_times, release_times, side='left')
+    hit = rows < len(bar_times)
+    if align == 'exact':
+        hit[hit] = bar_times[rows[hit]] == release_times[hit]
+    long = long[hit].assign(row=rows[hit])
+
+    # pivot: each bar takes the latest release of every factor placed on or
+    # before it; values come from the factor's own calendar, so every column
+    # keeps its dtype. Releases sharing a bar are filled in release order and
+    # the last one is kept, as the forward fill of the chained merges did.
+    for factor, calendar in macros.items():
+        placed = long[long['factor'] == factor]
+        source, row = placed['source'].to_numpy(), placed['row'].to_numpy()
+        last = np.flatnonzero(~pd.Index(row).duplicated(keep='last'))
+        latest = np.full(len(forex), -1)
+        latest[row[last]] = np.arange(len(last))
+        latest = np.maximum.accumulate(latest)
+        for field in fields:
+            values = calendar[field].iloc[source].ffill().array[last]
+            forex[f'{factor}_{field}'] = pd.api.extensions.take(values, latest, allow_fill=True)
+    return forex
+
+
+def main():
+    import argparse
+    import os
+
+    from bench_data import measure
+
+    def legacy_merge_macro_to_forex(forex_df, macro_df, factor_name, forex_timeframe):
+        """generate_all.py's per-factor merge (fillna(method='ffill') -> ffill())."""
+        macro_df = macro_df.copy()
+        macro_df['datetime'] = release_timestamps(macro_df)
+        forex_df = forex_df.sort_values('time')
+        macro_df = macro_df.sort_values('datetime')
+        forex_df['time_floor'] = floor_times(forex_df['time'], forex_timeframe)
+        macro_df['datetime_floor'] = floor_times(macro_df['datetime'], forex_timeframe)
+        merged = pd.merge_asof(macro_df, forex_df, left_on='datetime_floor', right_on='time_floor',
+                               direction='forward')
+        macro_renamed = merged[['datetime_floor', *FIELDS]].rename(columns={
+            'datetime_floor': 'time', **{f: f'{factor_name}_{f}' for f in FIELDS}})
+        result = pd.merge(forex_df, macro_renamed, on='time', how='left')
+        cols = [f'{factor_name}_{f}' for f in FIELDS]
+        result[cols] = result[cols].ffill()
+        return result.drop(columns=['time_floor'], errors='ignore')
+
+    def legacy_chain(forex, macros, timeframe):
+        for factor, macro_df in macros.items():
+            forex = legacy_merge_macro_to_forex(forex, macro_df, factor, timeframe)
+        return forex
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='merge_macros vs the chained merge_macro_to_forex calls.')
+    parser.add_argument('--timeframe', default='1M',
+                        help="1M / 1W / 1D / 4H (LSTM/Data markettrend files), or M30 for the "
+                             "30-minute history merged on exact release times as in preprocess2.py")
+    parser.add_argument('--macro-dir', default=os.path.join(here, '..', 'Final_model_with_XGboost', 'data', 'csv'))
+    args = parser.parse_args()
+    if args.timeframe == 'M30':
+        from bench_data import load_m30
+        forex, floor = load_m30().reset_index(), None
+    else:
+        forex = pd.read_csv(os.path.join(here, '..', 'LSTM', 'Data', f'XAUUSD_{args.timeframe}_markettrend.csv'),
+                            parse_dates=['time'])
+        floor = args.timeframe if args.timeframe in ('1M', '1W') else args.timeframe.lower()
+    forex['time'] = forex['time'].astype('datetime64[ns]')   # merge_asof wants both keys in ns
+    macros = {f: pd.read_csv(os.path.join(args.macro_dir, f'{f}.csv'))
+              for f in ('CPI', 'GDP', 'Interest_Rate', 'NFP', 'PCE', 'PPI')}
+
+    want, t_old, m_old = measure(lambda: legacy_chain(forex, macros, floor))
+    got, t_new, m_new = measure(lambda: merge_macros(forex, macros, floor))
+    # the chained merges repeat a bar that two releases of one factor fall on,
+    # in an order their unstable re-sorts do not keep; compare the other bars
+    repeated = want.loc[want['time'].duplicated(), 'time']
+    ref = want[~want['time'].isin(repeated)].reset_index(drop=True)
+    mine = got[~got['time'].isin(repeated)].reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(mine, ref)
+        same = len(got) == len(want) - len(repeated)
+    except AssertionError as err:
+        print(err)
+        same = False
+    print(f"{len(forex):,} {args.timeframe} bars, {sum(len(m) for m in macros.values())} releases "
+          f"({len(repeated)} bars duplicated by the chained merges)")
+    print(f"  chained merge_macro_to_forex  {t_old * 1000:8.1f} ms  peak {m_old / 2**20:6.1f} MiB")
+    print(f"  merge_macros                  {t_new * 1000:8.1f} ms  peak {m_new / 2**20:6.1f} MiB")
+    print(f"  {'ok ' if same else 'BAD'} identical to the chained result on every other bar")
+    print('ALL OK' if same else 'MISMATCH')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
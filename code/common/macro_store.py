@@ -0,0 +1,288 @@
+# common/macro_store.py
+"""
+Point-in-time store of macro releases with an as-of query.
+
+Each pipeline used to reload the calendars its own way: load_macro.py
+resampled every file to a daily frame, load_macro_data_with_prefix to a
+30-minute grid (a row every half hour since the first release, for each
+factor), dataM/generate.py re-filtered the whole file per month and
+release_time.py kept its own list of datetimes. ReleaseStore keeps one
+row per release instead:
+
+    time (index)   factor   period   Actual   Forecast   Previous
+
+sorted by release time, values as float64 ('177K' -> 177000.0, '2.4%'
+-> 0.024). Any vector of bar times is then answered with one
+searchsorted per factor, without materialising a grid:
+
+    store = ReleaseStore.from_files({'CPI': 'CPI.csv', 'NFP': 'NFP.csv'})
+    macro = store.as_of(forex.index)            # CPI_Actual, ..., NFP_Previous
+
+A bar at time t sees the latest release with release time <= t (< t
+with strict=True), so nothing is known before it is published. Releases
+that share a timestamp resolve to the one listed last in its file.
+as_of_period answers per period instead (monthly / weekly / daily
+datasets): the last release inside the period, else the latest before.
+
+    python common/macro_store.py     # parity + time vs the 30-minute resample and map_macro_to_date
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from release_dates import release_timestamps
+
+FIELDS = ('Actual', 'Forecast', 'Previous')
+
+_VALUE_PATTERN = r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([KkMmBb%]?)$'
+_VALUE_SCALE = {'': 1.0, 'K': 1e3, 'M': 1e6, 'B': 1e9, '%': 0.01}
+_PERIOD_COLUMNS = ('month_tag', 'quarter_tag')
+
+
+def release_values(values):
+    """Calendar values ('177K', '1.2M', '2.4%', '1,234', numbers) as float64; NaN if unparseable."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    text = values.astype(object).where(values.notna(), '').astype(str).str.replace(',', '').str.strip()
+    parts = text.str.extract(_VALUE_PATTERN)
+    number = pd.to_numeric(parts[0], errors='coerce')
+    scale = parts[1].str.upper().map(_VALUE_SCALE)
+    return (number * scale).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _periods(calendar, date_col):
+    """Reference period of each release: the '(Apr)' / '(Q1)' date suffix, else a *_tag column."""
+    dates = calendar[date_col]
+    if pd.api.types.is_object_dtype(dates) or pd.api.types.is_string_dtype(dates):
+        period = dates.astype(object).where(dates.map(type).eq(str)).str.extract(r'\(([^)]*)\)')[0]
+        if period.notna().any():
+            return period.to_numpy(dtype=object)
+    for column in _PERIOD_COLUMNS:
+        if column in calendar:
+            return calendar[column].to_numpy(dtype=object)
+    return np.full(len(calendar), None, dtype=object)
+
+
+def _query(timestamps):
+    """(index of the result, timestamps as a DatetimeIndex); a Series keeps its own index."""
+    if isinstance(timestamps, pd.Series):
+        return timestamps.index, pd.DatetimeIndex(timestamps)
+    if isinstance(timestamps, pd.Index):
+        return timestamps, pd.DatetimeIndex(timestamps)
+    times = pd.DatetimeIndex(timestamps)
+    return times, times
+
+
+def read_calendar(path):
+    """A macro calendar file: .xlsx / .xls through read_excel, anything else read_csv."""
+    if os.path.splitext(str(path))[1].lower() in ('.xlsx', '.xls'):
+        return pd.read_excel(path)
+    return pd.read_csv(path)
+
+
+class ReleaseStore:
+    """One row per macro release, time-indexed, with as_of lookups (see the module docstring)."""
+
+    def __init__(self, releases, fields=FIELDS):
+        self.fields = tuple(fields)
+        releases = releases[['factor', 'period', *self.fields]]
+        order = np.argsort(releases.index.to_numpy(dtype='datetime64[ns]'), kind='stable')
+        self.releases = releases.iloc[order]
+        self.releases.index = pd.DatetimeIndex(self.releases.index, name='time').as_unit('ns')
+        self._lookup = {}
+
+    @classmethod
+    def from_calendars(cls, calendars, date_col='Release Date', time_col='Time', fields=FIELDS,
+                       errors='coerce'):
+        """
+        {factor: calendar frame} -> store. time_col=None (or a calendar
+        without it) dates the releases at midnight; rows whose date or
+        time does not parse are dropped with errors='coerce'.
+        """
+        parts = []
+        for factor, calendar in calendars.items():
+            times = release_timestamps(calendar, date_col, time_col, errors)
+            part = pd.DataFrame({'factor': factor, 'period': _periods(calendar, date_col)},
+                                index=pd.DatetimeIndex(times, name='time'))
+            for field in fields:
+                part[field] = release_values(calendar[field]) if field in calendar else np.nan
+            parts.append(part[times.notna().to_numpy()])
+        releases = pd.concat(parts) if parts else pd.DataFrame(columns=['factor', 'period', *fields])
+        releases['factor'] = releases['factor'].astype(pd.CategoricalDtype(list(calendars)))
+        return cls(releases, fields)
+
+    @classmethod
+    def from_files(cls, paths, **kwargs):
+        """{factor: .csv / .xlsx path} -> store; kwargs as in from_calendars."""
+        return cls.from_calendars({factor: read_calendar(path) for factor, path in paths.items()},
+                                  **kwargs)
+
+    @classmethod
+    def concat(cls, stores):
+        """One store holding the releases of several (factors should not repeat)."""
+        stores = list(stores)
+        factors = [f for store in stores for f in store.factors]
+        releases = pd.concat([store.releases.assign(factor=store.releases['factor'].astype(object))
+                              for store in stores])
+        releases['factor'] = releases['factor'].astype(pd.CategoricalDtype(factors))
+        return cls(releases, stores[0].fields if stores else FIELDS)
+
+    def __len__(self):
+        return len(self.releases)
+
+    def __repr__(self):
+        span = (f", {self.releases.index[0]} .. {self.releases.index[-1]}" if len(self) else '')
+        return f"ReleaseStore({len(self)} releases, factors={list(self.factors)}{span})"
+
+    @property
+    def factors(self):
+        return tuple(self.releases['factor'].cat.categories)
+
+    def calendar(self, factor):
+        """The releases of one factor, oldest first."""
+        return self.releases[self.releases['factor'] == factor].drop(columns='factor')
+
+    def times(self, factor):
+        """Release times of one factor as a sorted datetime64[ns] array."""
+        return self.calendar(factor).index.to_numpy()
+
+    def _factor_arrays(self, factor):
+        if factor not in self._lookup:
+            if factor not in self.factors:
+                raise KeyError(f"no releases for {factor!r}; store has {list(self.factors)}")
+            calendar = self.calendar(factor)
+            block = calendar[list(self.fields)].to_numpy(dtype=np.float64)
+            filled = pd.DataFrame(block).ffill().to_numpy()
+            self._lookup[factor] = (calendar.index.asi8, block, filled)
+        return self._lookup[factor]
+
+    def as_of(self, timestamps, factors=None, fields=None, ffill=False, strict=False):
+        """
+        Latest release of each factor known at every timestamp, as a
+        float64 DataFrame indexed like `timestamps` (a Series by its own
+        index) with one {factor}_{field} column per pair; NaN before a
+        factor's first release. ffill=True fills a field the latest
+        release left empty from earlier releases of the same factor.
+        """
+        index, times = _query(timestamps)
+        query = times.as_unit('ns').asi8
+        missing = times.isna()
+        factors = self.factors if factors is None else factors
+        fields = self.fields if fields is None else tuple(fields)
+        columns = [self.fields.index(field) for field in fields]
+        out = {}
+        for factor in factors:
+            times, block, filled = self._factor_arrays(factor)
+            rows = np.searchsorted(times, query, side='left' if strict else 'right') - 1
+            known = (rows >= 0) & ~missing
+            values = np.full((len(query), len(columns)), np.nan)
+            values[known] = (filled if ffill else block)[rows[known]][:, columns]
+            for j, field in enumerate(fields):
+                out[f'{factor}_{field}'] = values[:, j]
+        return pd.DataFrame(out, index=index)
+
+    def as_of_period(self, dates, freq='M', factors=None, fields=None, ffill=False):
+        """
+        as_of at the end of the period (freq 'M', 'W-SAT', 'D', ...) holding
+        each date: the last release inside the period, else the latest one
+        before it. Unlike as_of this sees releases later in the same period,
+        as the monthly datasets expect. Indexed like `dates`.
+        """
+        index, times = _query(dates)
+        ends = times.to_period(freq).end_time
+        out = self.as_of(ends, factors, fields, ffill)
+        out.index = index
+        return out
+
+
+def main():
+    import glob
+    import time
+
+    from bench_data import load_m30, measure
+
+    def legacy_load_macro_data_with_prefix(calendar, prefix):
+        """data_preparation.py's 30-minute resample (read_excel -> read_csv, '30T' -> '30min')."""
+        df = calendar.copy()
+        df['Release DateTime'] = release_timestamps(df, errors='coerce')
+        df = df.dropna(subset=['Release DateTime']).sort_values('Release DateTime')
+        df = df[['Release DateTime', *FIELDS]].rename(columns={f: f'{prefix}_{f}' for f in FIELDS})
+        return df.set_index('Release DateTime').resample('30min').ffill()
+
+    def legacy_map_macro_to_date(target_date, macro_df, freq):
+        """dataM/generate.py's per-row lookup, with the month generalised to `freq`."""
+        target_period = target_date.to_period(freq)
+        same_period = macro_df[macro_df['date'].dt.to_period(freq) == target_period]
+        if not same_period.empty:
+            return same_period.iloc[-1]['Actual']
+        prev = macro_df[macro_df['date'] < target_date]
+        if not prev.empty:
+            return prev.iloc[-1]['Actual']
+        return np.nan
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(glob.glob(os.path.join(here, '..', 'Final_model_with_XGboost', 'data', 'csv', '*.csv')))
+    calendars = {os.path.splitext(os.path.basename(p))[0]: pd.read_csv(p) for p in paths}
+    bars = load_m30().index
+
+    def legacy():
+        grids = [legacy_load_macro_data_with_prefix(c, f) for f, c in calendars.items()]
+        return pd.DataFrame(index=bars).join(grids, how='left'), sum(len(g) for g in grids)
+
+    def store_query():
+        store = ReleaseStore.from_calendars(calendars)
+        return store.as_of(bars), len(store)
+
+    (want, grid_rows), t_old, m_old = measure(legacy)
+    (got, store_rows), t_new, m_new = measure(store_query)
+
+    ok = True
+    for factor, calendar in calendars.items():
+        cols = [f'{factor}_{f}' for f in FIELDS]
+        # the resampled grid stops at the factor's last release; compare inside it
+        last = release_timestamps(calendar).max()
+        inside = bars <= last
+        ref = np.column_stack([release_values(want[c]) for c in cols])[inside]
+        mine = got[cols].to_numpy()[inside]
+        same = np.array_equal(ref, mine, equal_nan=True)
+        after = got.loc[~inside, cols[0]].notna().all() if (~inside).any() else True
+        print(f"  {'ok ' if same and after else 'BAD'} {factor:<14} {len(calendar):4d} releases, "
+              f"{inside.sum():,} bars up to its last release")
+        ok &= same and after
+    print(f"{len(bars):,} M30 bars, {len(calendars)} calendars")
+    print(f"  30-minute resample + join   {t_old * 1000:8.1f} ms  peak {m_old / 2**20:6.1f} MiB  "
+          f"{grid_rows:,} grid rows")
+    print(f"  ReleaseStore.as_of          {t_new * 1000:8.1f} ms  peak {m_new / 2**20:6.1f} MiB  "
+          f"{store_rows:,} release rows")
+
+    # dataM/generate.py: one value per factor and monthly / weekly / daily row
+    data_m = os.path.join(here, '..', 'Final_model_with_XGboost', 'dataM')
+    store = ReleaseStore.from_files(
+        {f: os.path.join(data_m, f'{f}.csv') for f in ('CPI', 'GDP', 'Interest Rate', 'NFP', 'PCE', 'PPI')},
+        date_col='date', time_col=None, fields=['Actual'])
+    frames = {f: store.calendar(f).rename_axis('date').reset_index() for f in store.factors}
+    grids = (('M', os.path.join(data_m, 'XAUUSD_MN1.csv')),
+             ('W-SAT', os.path.join(here, '..', 'LSTM', 'Data', 'XAUUSD_1W_markettrend.csv')),
+             ('D', os.path.join(here, '..', 'LSTM', 'Data', 'XAUUSD_1D_markettrend.csv')))
+    for freq, path in grids:
+        dates = pd.to_datetime(pd.read_csv(path)['time']).dt.to_period(freq).dt.to_timestamp()
+        start = time.perf_counter()
+        want = pd.DataFrame({f'{f}_Actual': dates.apply(lambda d: legacy_map_macro_to_date(d, m, freq))
+                             for f, m in frames.items()})
+        t_old = time.perf_counter() - start
+        start = time.perf_counter()
+        got = store.as_of_period(dates, freq)
+        t_new = time.perf_counter() - start
+        same = np.array_equal(got.to_numpy(), want.to_numpy(dtype=np.float64), equal_nan=True)
+        print(f"  {'ok ' if same else 'BAD'} {freq:<5} grid, {len(dates):5,} rows: map_macro_to_date "
+              f"{t_old * 1000:8.1f} ms, as_of_period {t_new * 1000:6.2f} ms")
+        ok &= same
+    print('ALL OK' if ok else 'MISMATCH')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
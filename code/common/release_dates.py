@@ -0,0 +1,213 @@
+# common/release_dates.py
+"""
+Vectorised release timestamps for the macro calendars (CPI, GDP, NFP, ...).
+
+The macro files mix several spellings of the release date, sometimes
+within one file:
+
+    'May 13, 2025 (Apr)'    investing.com export, reference period suffix
+    '2025-05-07'            Interest_Rate
+    '2019-08-30 00:00:00'   a re-saved PCE row ('8/30/2019 0:00' in dataM/)
+    45790.0 / Timestamp     Excel serial numbers / cells read by read_excel
+
+and times like '15:30:00', '15:30\\xa0\\xa0' or datetime.time cells.
+Instead of a pd.to_datetime (or a strptime chain) per row, each column
+is parsed in a few vectorised passes:
+
+  - one regex pass strips the '(Apr)' / '(Q1)' period suffix
+  - strings are grouped by shape ('aaa 99, 9999', '9999-99-99', ...);
+    the strptime format of a shape is detected once from its first value
+    and cached for later files, then the whole group is parsed with it
+  - date (midnight) and time of day are added as int64 nanoseconds
+
+A time of day inside the date string is ignored in favour of the Time
+column, as in parse_macro_datetime.
+
+    python common/release_dates.py     # parity + speed vs the per-row parsers
+"""
+
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Tried in order when a new date shape is seen
+DATE_FORMATS = (
+    '%b %d, %Y', '%B %d, %Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M',
+    '%m/%d/%Y', '%m/%d/%Y %H:%M', '%m/%d/%Y %H:%M:%S', '%d.%m.%Y', '%Y/%m/%d', '%d %b %Y',
+)
+EXCEL_EPOCH = np.datetime64('1899-12-30', 'ns')
+
+_PERIOD_SUFFIX = r'\s*\([^)]*\)'
+_TIME_PATTERN = r'^(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp][Mm])?$'
+_shape_formats = {}
+
+
+def _shape(strings):
+    return strings.str.replace(r'\d', '9', regex=True).str.replace(r'[A-Za-z]', 'a', regex=True)
+
+
+def _format_for(sample):
+    for fmt in DATE_FORMATS:
+        try:
+            datetime.strptime(sample, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def _fail(errors, what, values):
+    if errors == 'raise':
+        raise ValueError(f"unparseable release {what}: {list(values[:5])}")
+
+
+def _parse_unique_dates(values, errors):
+    out = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    is_str = values.map(type).eq(str).to_numpy()
+    numeric = pd.to_numeric(values[~is_str], errors='coerce')
+    is_num = np.zeros(len(values), dtype=bool)
+    is_num[~is_str] = numeric.notna().to_numpy()
+    is_dt = ~is_str & ~is_num
+
+    if is_num.any():   # Excel serial day numbers
+        days = np.floor(numeric[numeric.notna()].to_numpy()).astype(np.int64)
+        out[is_num] = EXCEL_EPOCH + days * np.timedelta64(1, 'D')
+    if is_dt.any():
+        stamps = pd.to_datetime(values[is_dt], errors='coerce')
+        out[is_dt] = stamps.dt.normalize().to_numpy(dtype='datetime64[ns]')
+    if is_str.any():
+        strings = values[is_str].str.replace(_PERIOD_SUFFIX, '', regex=True).str.strip()
+        parsed = pd.Series(pd.NaT, index=strings.index, dtype='datetime64[ns]')
+        for shape, group in strings.groupby(_shape(strings), sort=False):
+            if shape not in _shape_formats:
+                _shape_formats[shape] = _format_for(group.iloc[0])
+            fmt = _shape_formats[shape]
+            if fmt is not None:
+                parsed[group.index] = pd.to_datetime(group, format=fmt, errors='coerce')
+        out[is_str] = parsed.dt.normalize().to_numpy(dtype='datetime64[ns]')
+    bad = np.isnat(out)
+    if bad.any():
+        _fail(errors, 'dates', values[bad].tolist())
+    return out
+
+
+def parse_release_dates(dates, errors='raise'):
+    """
+    Release dates (strings, Excel serials, datetimes, or a mix) as a
+    datetime64[ns] Series at midnight. errors='coerce' gives NaT for
+    missing values and values no format matches instead of raising
+    ValueError. Each distinct value is parsed once.
+    """
+    dates = pd.Series(dates).reset_index(drop=True)
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.astype('datetime64[ns]').dt.normalize()
+    codes, uniques = pd.factorize(dates)
+    if (codes < 0).any():
+        _fail(errors, 'dates', ['<missing>'])
+    parsed = _parse_unique_dates(pd.Series(uniques, dtype=object), errors)
+    out = np.where(codes >= 0, parsed[codes], np.datetime64('NaT'))
+    return pd.Series(out, name=dates.name, dtype='datetime64[ns]')
+
+
+def parse_release_times(times, errors='raise'):
+    """
+    Times of day ('15:30:00', '15:30', '8:30 pm', datetime.time, ...) as
+    int64 nanoseconds since midnight; -1 where unparseable with errors='coerce'.
+    """
+    codes, uniques = pd.factorize(pd.Series(times).astype(str))
+    strings = pd.Series(uniques, dtype=object).str.replace('\xa0', '', regex=False).str.strip()
+    parts = strings.str.extract(_TIME_PATTERN)
+    valid = parts[0].notna().to_numpy()
+    hour = pd.to_numeric(parts[0]).fillna(0).to_numpy(np.int64)
+    minute = pd.to_numeric(parts[1]).fillna(0).to_numpy(np.int64)
+    second = pd.to_numeric(parts[2]).fillna(0).to_numpy(np.int64)
+    meridiem = parts[3].str.lower().to_numpy()
+    hour = np.where(meridiem == 'pm', hour % 12 + 12, np.where(meridiem == 'am', hour % 12, hour))
+    if not valid.all():
+        _fail(errors, 'times', strings[~valid].tolist())
+    return np.where(valid, ((hour * 60 + minute) * 60 + second) * 10**9, -1)[codes]
+
+
+def release_timestamps(macro_df, date_col='Release Date', time_col='Time', errors='raise'):
+    """
+    Release date + time of every row of a macro calendar as a
+    datetime64[ns] Series aligned with macro_df.index (NaT where either
+    part failed to parse with errors='coerce').
+    """
+    dates = parse_release_dates(macro_df[date_col], errors).to_numpy()
+    if time_col is None or time_col not in macro_df:
+        stamps = dates
+    else:
+        offsets = parse_release_times(macro_df[time_col], errors)
+        ns = dates.view(np.int64) + offsets
+        stamps = np.where(np.isnat(dates) | (offsets < 0), np.datetime64('NaT'), ns.view('datetime64[ns]'))
+    return pd.Series(stamps, index=macro_df.index, name='datetime', dtype='datetime64[ns]')
+
+
+def main():
+    import glob
+    import os
+    import time
+
+    def legacy_parse_macro_datetime(row):
+        """generate_all.py / preprocess.py's per-row parser."""
+        release_date = row['Release Date']
+        if isinstance(release_date, str):
+            date = pd.to_datetime(release_date.split(' (')[0]).date()
+        else:
+            date = release_date.date()
+        t = row['Time']
+        if isinstance(t, str):
+            t = pd.to_datetime(t).time()
+        return pd.Timestamp(date) + pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
+
+    def legacy_parse_date_time(date_str, time_str):
+        """release_time.py's strptime chain (date formats only)."""
+        date_str = re.sub(r'\s*\([^)]+\)', '', date_str).strip()
+        time_str = time_str.replace('\xa0', '').strip()
+        for fmt in ('%B %d, %Y', '%b %d, %Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S'):
+            try:
+                date_obj = datetime.strptime(date_str, fmt)
+                break
+            except ValueError:
+                continue
+        try:
+            time_obj = datetime.strptime(time_str, '%H:%M:%S')
+        except ValueError:
+            time_obj = datetime.strptime(time_str, '%H:%M')
+        return datetime.combine(date_obj.date(), time_obj.time())
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = sorted(glob.glob(os.path.join(here, '..', 'Final_model_with_XGboost', 'release', '*.csv')))
+    ok = True
+    for path in files:
+        df = pd.read_csv(path)
+        got = release_timestamps(df)
+        want = df.apply(legacy_parse_macro_datetime, axis=1)
+        same = got.equals(want.astype('datetime64[ns]'))
+        print(f"  {'ok ' if same else 'BAD'} {os.path.basename(path):<18} {len(df):4d} releases")
+        ok &= same
+    # one release a day for ~27 years, every date distinct
+    days = pd.date_range('1998-01-01', periods=10_000, freq='D')
+    big = pd.DataFrame({'Release Date': days.strftime('%b %d, %Y (') + days.strftime('%b') + ')',
+                        'Time': np.where(np.arange(len(days)) % 2, '15:30:00', '16:30\xa0\xa0')})
+    start = time.perf_counter()
+    release_timestamps(big)
+    t_new = time.perf_counter() - start
+    start = time.perf_counter()
+    big.apply(legacy_parse_macro_datetime, axis=1)
+    t_apply = time.perf_counter() - start
+    start = time.perf_counter()
+    [legacy_parse_date_time(d, t) for d, t in zip(big['Release Date'], big['Time'])]
+    t_strptime = time.perf_counter() - start
+    print(f"{len(big):,} releases: release_timestamps {t_new * 1000:.1f} ms, "
+          f"apply(parse_macro_datetime) {t_apply * 1000:.0f} ms, "
+          f"strptime chain {t_strptime * 1000:.0f} ms")
+    print('ALL OK' if ok else 'MISMATCHES FOUND')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+# common/rolling.py
+"""
+Vectorised rolling-window kernels on plain NumPy arrays.
+"""
+
+import numpy as np
+
+# Upper bound on the temporary (rows, window) block built per chunk
+DEFAULT_CHUNK_BYTES = 32 * 2**20
+
+
+def rolling_mad(values, window, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Rolling mean absolute deviation around each window's own mean, i.e.
+    series.rolling(window).apply(lambda x: (x - x.mean()).abs().mean()).
+
+    Works on a strided (n - window + 1, window) view of `values` and
+    reduces it in row chunks so the temporary stays below `chunk_bytes`
+    regardless of the series length. The first window - 1 outputs are NaN,
+    as are windows containing a NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.full(n, np.nan)
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    if n < window:
+        return out
+
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    rows = max(1, chunk_bytes // (window * values.itemsize))
+    result = out[window - 1:]
+    for start in range(0, len(windows), rows):
+        block = windows[start:start + rows]
+        dev = block - block.mean(axis=1, keepdims=True)
+        np.abs(dev, out=dev)
+        result[start:start + rows] = dev.mean(axis=1)
+    return out
+
+
+def _rolling_extremum(values, window, ufunc):
+    """
+    van Herk / Gil-Werman running min or max: O(n) for any window length.
+
+    The series is cut into blocks of `window`; every window then spans the
+    tail of one block and the head of the next, so its extremum is
+    ufunc(suffix-accumulate, prefix-accumulate) at the two ends.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.full(n, np.nan)
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    if n < window:
+        return out
+
+    padded = np.concatenate([values, np.full(-n % window, np.nan)])
+    blocks = padded.reshape(-1, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    out[window - 1:] = ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def rolling_min(values, window):
+    """series.rolling(window).min() for NaN-free input; windows containing a NaN give NaN."""
+    return _rolling_extremum(values, window, np.minimum)
+
+
+def rolling_max(values, window):
+    """series.rolling(window).max() for NaN-free input; windows containing a NaN give NaN."""
+    return _rolling_extremum(values, window, np.maximum)
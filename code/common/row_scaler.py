@@ -0,0 +1,163 @@
+# common/row_scaler.py
+"""
+Per-feature scaler fitted on 2-D (bars, features) rows, before windowing.
+
+Scaling the feature matrix once and then windowing it (windows.py)
+replaces fitting sklearn scalers on reshaped (n, T, F) windows, which
+counts every row up to T times and allocates float64 copies of the
+train and test windows. RowScaler
+
+  - fits on the training rows only (pass rows[:train_end]); NaNs ignored
+  - supports partial_fit for 'standard' and 'minmax', so long histories
+    can be fitted chunk by chunk
+  - transforms float32 arrays in place (any (..., F) shape); other
+    inputs get one float32 copy
+  - saves to / loads from JSON next to the model (scaler_path_for)
+
+    x' = (x - center_) / scale_
+    'standard'  center = mean, scale = std (ddof=0)      ~ StandardScaler
+    'robust'    center = median, scale = q75 - q25        ~ RobustScaler
+    'minmax'    center = min, scale = max - min           ~ MinMaxScaler
+    (a zero scale is replaced by 1, as in sklearn)
+"""
+
+import json
+import os
+
+import numpy as np
+
+METHODS = ('standard', 'robust', 'minmax')
+
+
+def scaler_path_for(model_path):
+    """Where the scaler of a saved model lives: <model>.scaler.json."""
+    return os.path.splitext(str(model_path))[0] + '.scaler.json'
+
+
+class RowScaler:
+    def __init__(self, method='standard', dtype=np.float32):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        self.method = method
+        self.dtype = np.dtype(dtype)
+        self.feature_names = None
+        self._reset()
+
+    def _reset(self):
+        self.n_samples_seen_ = None
+        self.mean_ = self.m2_ = self.min_ = self.max_ = None
+        self.center_ = self.scale_ = None
+
+    def get_params(self, deep=True):
+        return {'method': self.method, 'dtype': self.dtype.str}
+
+    # --- fitting ------------------------------------------------------------
+
+    def _rows(self, rows):
+        if hasattr(rows, 'columns'):
+            self.feature_names = [str(c) for c in rows.columns]
+        rows = np.asarray(rows, dtype=np.float64)
+        return rows.reshape(-1, rows.shape[-1])
+
+    def fit(self, rows):
+        self._reset()
+        rows = self._rows(rows)
+        if self.method == 'robust':
+            q25, median, q75 = np.nanpercentile(rows, [25, 50, 75], axis=0)
+            self.n_samples_seen_ = np.count_nonzero(~np.isnan(rows), axis=0)
+            self._finish(median, q75 - q25)
+            return self
+        return self.partial_fit(rows)
+
+    def partial_fit(self, rows):
+        """Update the running statistics with more training rows."""
+        if self.method == 'robust':
+            raise ValueError("robust scaling needs all training rows at once; use fit()")
+        rows = self._rows(rows)
+        valid = ~np.isnan(rows)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.method == 'standard':
+                mean = np.where(count > 0, np.nansum(rows, axis=0) / np.maximum(count, 1), 0.0)
+                m2 = np.nansum((rows - mean) ** 2, axis=0)
+                if self.n_samples_seen_ is None:
+                    self.n_samples_seen_, self.mean_, self.m2_ = count, mean, m2
+                else:
+                    # Chan et al. merge of (count, mean, M2) per feature
+                    n_a, total = self.n_samples_seen_, self.n_samples_seen_ + count
+                    delta = mean - self.mean_
+                    share = np.where(total > 0, count / np.maximum(total, 1), 0.0)
+                    self.mean_ = self.mean_ + delta * share
+                    self.m2_ = self.m2_ + m2 + delta ** 2 * n_a * share
+                    self.n_samples_seen_ = total
+                std = np.sqrt(self.m2_ / np.maximum(self.n_samples_seen_, 1))
+                self._finish(self.mean_, std)
+            else:
+                lo = np.where(count > 0, np.nanmin(np.where(valid, rows, np.inf), axis=0), np.inf)
+                hi = np.where(count > 0, np.nanmax(np.where(valid, rows, -np.inf), axis=0), -np.inf)
+                if self.n_samples_seen_ is None:
+                    self.n_samples_seen_, self.min_, self.max_ = count, lo, hi
+                else:
+                    self.n_samples_seen_ = self.n_samples_seen_ + count
+                    self.min_, self.max_ = np.minimum(self.min_, lo), np.maximum(self.max_, hi)
+                self._finish(self.min_, self.max_ - self.min_)
+        return self
+
+    def _finish(self, center, scale):
+        scale = np.where(np.isfinite(scale) & (scale > 10 * np.finfo(np.float64).eps), scale, 1.0)
+        self.center_ = np.nan_to_num(np.asarray(center, dtype=np.float64))
+        self.scale_ = scale
+
+    # --- transforms -----------------------------------------------------------
+
+    def _target(self, values, copy):
+        if (not copy and isinstance(values, np.ndarray) and values.dtype == self.dtype
+                and values.flags.writeable):
+            return values
+        return np.array(values, dtype=self.dtype)
+
+    def transform(self, values, copy=False):
+        """Scale `values` (..., F); float32 writable arrays are modified in place and returned."""
+        if self.scale_ is None:
+            raise ValueError("RowScaler is not fitted")
+        out = self._target(values, copy)
+        out -= self.center_.astype(self.dtype)
+        out /= self.scale_.astype(self.dtype)
+        return out
+
+    def inverse_transform(self, values, copy=False):
+        out = self._target(values, copy)
+        out *= self.scale_.astype(self.dtype)
+        out += self.center_.astype(self.dtype)
+        return out
+
+    def fit_transform(self, rows):
+        return self.fit(rows).transform(rows)
+
+    # --- persistence ------------------------------------------------------------
+
+    def to_dict(self):
+        arrays = {name: (None if value is None else np.asarray(value).tolist())
+                  for name, value in vars(self).items() if name.endswith('_')}
+        return {'method': self.method, 'dtype': self.dtype.str,
+                'feature_names': self.feature_names, **arrays}
+
+    @classmethod
+    def from_dict(cls, spec):
+        scaler = cls(spec['method'], spec['dtype'])
+        scaler.feature_names = spec.get('feature_names')
+        for name, value in spec.items():
+            if name.endswith('_'):
+                setattr(scaler, name, None if value is None else np.asarray(value))
+        return scaler
+
+    def save(self, path):
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.to_dict(), fh, indent=1)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fh:
+            return cls.from_dict(json.load(fh))
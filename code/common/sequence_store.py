@@ -0,0 +1,291 @@
+# common/sequence_store.py
+"""
+Sharded, memory-mapped storage for (n, T, F) sequence datasets.
+
+A store is a directory of fixed-size .npy shards (windows, labels and
+optionally timestamps) plus a JSON manifest with the shape, dtype,
+feature names, the fitted scaler's parameters and free-form metadata.
+Windows are appended in chunks, so a dataset never has to fit in RAM
+while it is written; readers open shards with np.load(mmap_mode='r')
+and only touch the pages of the windows they ask for.
+
+    with SequenceWriter('seq_train', feature_names=features, scaler=scaler) as w:
+        w.append(X_chunk, y_chunk)
+    store = SequenceStore('seq_train')
+    for X, y in store.iter_batches(1024):
+        ...
+
+    python common/sequence_store.py PATH    # print a store's manifest
+"""
+
+import importlib
+import json
+import os
+
+import numpy as np
+
+MANIFEST = 'manifest.json'
+DEFAULT_SHARD_SIZE = 16_384
+
+
+def scaler_to_dict(scaler):
+    """JSON-able description of a fitted sklearn scaler (constructor args + fitted attributes)."""
+    if scaler is None:
+        return None
+    cls = type(scaler)
+    fitted = {name: (value.tolist() if isinstance(value, np.ndarray) else
+                     value.item() if isinstance(value, np.generic) else value)
+              for name, value in vars(scaler).items()
+              if name.endswith('_') and not name.startswith('_')}
+    return {'class': f'{cls.__module__}.{cls.__name__}', 'init': scaler.get_params(), 'fitted': fitted}
+
+
+def scaler_from_dict(spec):
+    """Rebuild the scaler described by scaler_to_dict()."""
+    if spec is None:
+        return None
+    module, name = spec['class'].rsplit('.', 1)
+    scaler = getattr(importlib.import_module(module), name)(**spec['init'])
+    for attr, value in spec['fitted'].items():
+        if isinstance(value, list):
+            value = np.asarray(value, dtype=object if value and isinstance(value[0], str) else None)
+        setattr(scaler, attr, value)
+    return scaler
+
+
+def _files(index):
+    return {part: f'shard_{index:05d}_{part}.npy' for part in ('x', 'y', 'times')}
+
+
+class SequenceWriter:
+    """
+    Appends windows (and labels / timestamps) to a store at `path`,
+    flushing a shard every `shard_size` windows. The manifest is written
+    on close(), so an interrupted write leaves no readable store behind.
+    An existing store at `path` is replaced.
+    """
+
+    def __init__(self, path, feature_names=None, scaler=None, shard_size=DEFAULT_SHARD_SIZE,
+                 dtype=np.float32, meta=None):
+        self.path = os.path.abspath(path)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.scaler = scaler_to_dict(scaler)
+        self.shard_size = shard_size
+        self.dtype = np.dtype(dtype)
+        self.meta = meta or {}
+        self.shards = []
+        self.window_shape = None
+        self.label_dtype = self.times_dtype = None
+        self.label_shape = ()
+        self._parts = None
+        self._fill = 0
+        os.makedirs(self.path, exist_ok=True)
+        self._clear()
+
+    def _clear(self):
+        manifest = os.path.join(self.path, MANIFEST)
+        if not os.path.exists(manifest):
+            return
+        with open(manifest) as fh:
+            old = json.load(fh)
+        os.remove(manifest)
+        for shard in old['shards']:
+            for name in shard['files'].values():
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    def _allocate(self, X, y, times):
+        self.window_shape = X.shape[1:]
+        if self.feature_names is not None and len(self.feature_names) != X.shape[-1]:
+            raise ValueError(f"{len(self.feature_names)} feature names for {X.shape[-1]} features")
+        self._parts = {'x': np.empty((self.shard_size,) + self.window_shape, dtype=self.dtype)}
+        if y is not None:
+            self.label_dtype = np.asarray(y).dtype
+            self.label_shape = tuple(np.shape(y)[1:])
+            self._parts['y'] = np.empty((self.shard_size,) + np.shape(y)[1:], dtype=self.label_dtype)
+        if times is not None:
+            self.times_dtype = np.asarray(times).dtype
+            self._parts['times'] = np.empty(self.shard_size, dtype=self.times_dtype)
+
+    def append(self, X, y=None, times=None):
+        """Add windows X (n, T, F) - a view is fine, it is copied shard by shard."""
+        if self._parts is None:
+            self._allocate(X, y, times)
+        if X.shape[1:] != self.window_shape:
+            raise ValueError(f"Window shape {X.shape[1:]} != {self.window_shape}")
+        chunks = {'x': X, 'y': y, 'times': times}
+        if {k for k, v in chunks.items() if v is not None} != set(self._parts):
+            raise ValueError("Every append must pass the same parts (y / times) as the first")
+        done = 0
+        while done < len(X):
+            take = min(len(X) - done, self.shard_size - self._fill)
+            for part, buf in self._parts.items():
+                buf[self._fill:self._fill + take] = chunks[part][done:done + take]
+            self._fill += take
+            done += take
+            if self._fill == self.shard_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._fill:
+            return
+        files = {part: name for part, name in _files(len(self.shards)).items() if part in self._parts}
+        for part, name in files.items():
+            np.save(os.path.join(self.path, name), self._parts[part][:self._fill])
+        self.shards.append({'rows': self._fill, 'files': files})
+        self._fill = 0
+
+    def close(self):
+        self._flush()
+        rows = sum(s['rows'] for s in self.shards)
+        manifest = {
+            'version': 1,
+            'shape': [rows] + list(self.window_shape or ()),
+            'dtype': self.dtype.str,
+            'label_dtype': self.label_dtype.str if self.label_dtype is not None else None,
+            'label_shape': list(self.label_shape),
+            'times_dtype': self.times_dtype.str if self.times_dtype is not None else None,
+            'feature_names': self.feature_names,
+            'scaler': self.scaler,
+            'shard_size': self.shard_size,
+            'shards': self.shards,
+            'meta': self.meta,
+        }
+        tmp = os.path.join(self.path, MANIFEST + '.tmp')
+        with open(tmp, 'w') as fh:
+            json.dump(manifest, fh, indent=1, default=str)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+        return SequenceStore(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+def write_sequences(path, X, y=None, times=None, **options):
+    """Write a whole (n, T, F) array / view as a store; returns the SequenceStore."""
+    writer = SequenceWriter(path, **options)
+    writer.append(X, y, times)
+    return writer.close()
+
+
+class SequenceStore:
+    """
+    Read side of a store: len(), .shape, store[i | slice | index array]
+    (windows copied out of the memory-mapped shards), labels(), times(),
+    iter_batches() and scaler().
+    """
+
+    def __init__(self, path, mmap_mode='r'):
+        self.path = os.path.abspath(path)
+        with open(os.path.join(self.path, MANIFEST)) as fh:
+            self.manifest = json.load(fh)
+        self.shape = tuple(self.manifest['shape'])
+        self.dtype = np.dtype(self.manifest['dtype'])
+        self.feature_names = self.manifest['feature_names']
+        self.meta = self.manifest['meta']
+        self._mmap_mode = mmap_mode
+        self._open = {}
+        self.offsets = np.cumsum([0] + [s['rows'] for s in self.manifest['shards']])
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _part(self, shard, part):
+        key = (shard, part)
+        if key not in self._open:
+            name = self.manifest['shards'][shard]['files'].get(part)
+            if name is None:
+                raise KeyError(f"Store {self.path} has no {part!r}")
+            self._open[key] = np.load(os.path.join(self.path, name), mmap_mode=self._mmap_mode)
+        return self._open[key]
+
+    def _layout(self, part):
+        """(row shape, dtype) of `part` from the manifest, so empty selections need no shard."""
+        if part == 'x':
+            return self.shape[1:], self.dtype
+        dtype = self.manifest.get('label_dtype' if part == 'y' else 'times_dtype')
+        if dtype is None:
+            raise KeyError(f"Store {self.path} has no {part!r}")
+        shape = self.manifest.get('label_shape', []) if part == 'y' else []
+        return tuple(shape), np.dtype(dtype)
+
+    def _gather(self, part, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return self._range(part, start, stop)
+        idx = np.arange(len(self))[key]
+        scalar = np.ndim(idx) == 0
+        idx = np.atleast_1d(idx)
+        shard_of = np.searchsorted(self.offsets, idx, side='right') - 1
+        row_shape, dtype = self._layout(part)
+        out = np.empty((len(idx),) + row_shape, dtype=dtype)
+        for shard in np.unique(shard_of):
+            mask = shard_of == shard
+            out[mask] = self._part(shard, part)[idx[mask] - self.offsets[shard]]
+        return out[0] if scalar else out
+
+    def _range(self, part, start, stop):
+        pieces = []
+        first = np.searchsorted(self.offsets, start, side='right') - 1
+        for shard in range(max(first, 0), len(self.offsets) - 1):
+            lo, hi = self.offsets[shard], self.offsets[shard + 1]
+            if lo >= stop:
+                break
+            pieces.append(self._part(shard, part)[max(start, lo) - lo:min(stop, hi) - lo])
+        if not pieces:
+            row_shape, dtype = self._layout(part)
+            return np.empty((0,) + row_shape, dtype=dtype)
+        return np.array(pieces[0]) if len(pieces) == 1 else np.concatenate(pieces)
+
+    def __getitem__(self, key):
+        return self._gather('x', key)
+
+    def labels(self, key=slice(None)):
+        return self._gather('y', key)
+
+    def times(self, key=slice(None)):
+        return self._gather('times', key)
+
+    def iter_batches(self, batch_size=1024, labels=True, shuffle=False, seed=None):
+        """
+        (X, y) (or X when labels=False) in contiguous batches; shuffle
+        permutes the batch order, so reads stay sequential within a batch.
+        """
+        starts = np.arange(0, len(self), batch_size)
+        if shuffle:
+            np.random.default_rng(seed).shuffle(starts)
+        for start in starts:
+            stop = min(start + batch_size, len(self))
+            X = self._range('x', start, stop)
+            yield (X, self._range('y', start, stop)) if labels else X
+
+    def scaler(self):
+        return scaler_from_dict(self.manifest['scaler'])
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print a sequence store's manifest.")
+    parser.add_argument('path')
+    args = parser.parse_args()
+    store = SequenceStore(args.path)
+    m = store.manifest
+    print(f"{store.path}: {len(store):,} windows of {store.shape[1:]} {store.dtype}, "
+          f"{len(m['shards'])} shard(s) of <= {m['shard_size']:,}")
+    print(f"  features: {store.feature_names}")
+    print(f"  labels: {m['label_dtype']}  times: {m['times_dtype']}  "
+          f"scaler: {m['scaler']['class'] if m['scaler'] else None}")
+    if store.meta:
+        print(f"  meta: {store.meta}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+# common/streaming_indicators.py
+"""
+Incremental (one bar at a time) versions of the indicators in
+indicator_engine.py / technical_indicators.py.
+
+Each object keeps only the state it needs (last EMA value, a fixed-size
+window, ...), so updating with a new M30 bar costs the same no matter how
+long the history is. Values match the batch functions to floating-point
+tolerance; see check_streaming_parity.py.
+
+State can be checkpointed with `state_dict()` (plain, JSON/BSON friendly
+dict) and restored with `load_state_dict()` or `from_state()`, so a live
+poller can resume without replaying the whole history.
+"""
+
+import math
+from collections import deque
+
+from indicator_engine import DEFAULT_FEATURES, parse_feature, INDICATORS
+
+NAN = float('nan')
+
+# class name -> class, for restoring nested indicators from a state dict
+_CLASSES = {}
+
+
+def _isnan(x):
+    return x is None or x != x
+
+
+class StreamingIndicator:
+    """Base class: generic checkpoint/restore of the instance attributes."""
+
+    # True when update() takes (high, low, close) instead of close only
+    needs_hlc = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _CLASSES[cls.__name__] = cls
+
+    def state_dict(self):
+        return {'type': type(self).__name__, 'attrs': _dump(vars(self))}
+
+    def load_state_dict(self, state):
+        if state['type'] != type(self).__name__:
+            raise ValueError(f"state is for {state['type']}, not {type(self).__name__}")
+        for key, value in state['attrs'].items():
+            setattr(self, key, _load(value))
+        return self
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls.__new__(cls)
+        return obj.load_state_dict(state)
+
+
+def _dump(value):
+    if isinstance(value, StreamingIndicator):
+        return {'__indicator__': value.state_dict()}
+    if isinstance(value, deque):
+        return {'__deque__': list(value), 'maxlen': value.maxlen}
+    if isinstance(value, dict):
+        return {k: _dump(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_dump(v) for v in value]
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if '__indicator__' in value:
+            state = value['__indicator__']
+            return _CLASSES[state['type']].from_state(state)
+        if '__deque__' in value:
+            return deque(value['__deque__'], maxlen=value['maxlen'])
+        return {k: _load(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_load(v) for v in value]
+    return value
+
+
+class RollingWindow(StreamingIndicator):
+    """
+    Fixed-size window with running sums for mean/variance.
+
+    Sums are kept relative to an anchor value and recomputed exactly once
+    per `period` updates, so each push is amortised O(1) and rounding
+    drift cannot build up over long live sessions.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.values = deque(maxlen=period)
+        self.anchor = 0.0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.since_resync = 0
+
+    @property
+    def full(self):
+        return len(self.values) == self.period
+
+    def push(self, x):
+        if self.full:
+            old = self.values[0] - self.anchor
+            self.sum -= old
+            self.sumsq -= old * old
+        self.values.append(x)
+        d = x - self.anchor
+        self.sum += d
+        self.sumsq += d * d
+        self.since_resync += 1
+        if self.since_resync >= self.period:
+            self._resync()
+
+    def _resync(self):
+        self.anchor = math.fsum(self.values) / len(self.values)
+        devs = [v - self.anchor for v in self.values]
+        self.sum = math.fsum(devs)
+        self.sumsq = math.fsum(d * d for d in devs)
+        self.since_resync = 0
+
+    def mean(self):
+        if not self.full:
+            return NAN
+        return self.anchor + self.sum / self.period
+
+    def std(self, ddof=1):
+        if not self.full or self.period <= ddof:
+            return NAN
+        var = (self.sumsq - self.sum * self.sum / self.period) / (self.period - ddof)
+        return math.sqrt(max(var, 0.0))
+
+    def mad(self):
+        """Mean absolute deviation around the window mean (O(period))."""
+        if not self.full:
+            return NAN
+        m = self.mean()
+        return math.fsum(abs(v - m) for v in self.values) / self.period
+
+
+class SMA(StreamingIndicator):
+    def __init__(self, period):
+        self.window = RollingWindow(period)
+
+    def update(self, x):
+        self.window.push(x)
+        return self.window.mean()
+
+
+class RollingStd(StreamingIndicator):
+    def __init__(self, period, ddof=1):
+        self.window = RollingWindow(period)
+        self.ddof = ddof
+
+    def update(self, x):
+        self.window.push(x)
+        return self.window.std(self.ddof)
+
+
+class EMA(StreamingIndicator):
+    """pandas ewm(span=period, adjust=False); pass `alpha` for Wilder-style smoothing."""
+
+    def __init__(self, period=None, alpha=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.value = NAN
+
+    def update(self, x):
+        if _isnan(x):
+            return self.value
+        if _isnan(self.value):
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+class WilderAverage(StreamingIndicator):
+    """Wilder smoothing seeded with the simple mean of the first `period` values."""
+
+    def __init__(self, period):
+        self.period = period
+        self.seed = []
+        self.value = NAN
+
+    def update(self, x):
+        if _isnan(x):
+            return self.value
+        if _isnan(self.value):
+            self.seed.append(x)
+            if len(self.seed) == self.period:
+                self.value = math.fsum(self.seed) / self.period
+                self.seed = []
+            return self.value
+        self.value = (self.value * (self.period - 1) + x) / self.period
+        return self.value
+
+
+class Lag(StreamingIndicator):
+    """Value of the input `period` bars ago (NaN until available)."""
+
+    def __init__(self, period):
+        self.values = deque(maxlen=period + 1)
+
+    def update(self, x):
+        self.values.append(x)
+        if len(self.values) < self.values.maxlen:
+            return NAN
+        return self.values[0]
+
+
+class RSI(StreamingIndicator):
+    """
+    smoothing='sma'    rolling means of gains/losses (technical_indicators.py)
+    smoothing='ewm'    ewm(span=period) (new_approch_LSTM indicators/events)
+    smoothing='wilder' ewm(alpha=1/period) as in ta.momentum.RSIIndicator
+                       (with leading_zero=True)
+    `leading_zero` treats the first bar's gain/loss as 0 instead of NaN.
+    """
+
+    def __init__(self, period=14, smoothing='sma', leading_zero=False):
+        if smoothing == 'sma':
+            self.gain, self.loss = RollingWindow(period), RollingWindow(period)
+        elif smoothing == 'ewm':
+            self.gain, self.loss = EMA(period), EMA(period)
+        elif smoothing == 'wilder':
+            self.gain, self.loss = EMA(alpha=1.0 / period), EMA(alpha=1.0 / period)
+        else:
+            raise ValueError("smoothing must be 'sma', 'ewm' or 'wilder'")
+        self.period = period
+        self.smoothing = smoothing
+        self.leading_zero = leading_zero
+        self.prev = NAN
+        self.count = 0
+
+    def update(self, close):
+        delta = close - self.prev if not _isnan(self.prev) else NAN
+        self.prev = close
+        if _isnan(delta):
+            if not self.leading_zero:
+                return NAN
+            delta = 0.0
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.count += 1
+        if self.smoothing == 'sma':
+            self.gain.push(gain)
+            self.loss.push(loss)
+            avg_gain, avg_loss = self.gain.mean(), self.loss.mean()
+        else:
+            avg_gain, avg_loss = self.gain.update(gain), self.loss.update(loss)
+            if self.smoothing == 'wilder' and self.count < self.period:
+                return NAN
+        if _isnan(avg_gain) or _isnan(avg_loss):
+            return NAN
+        if avg_loss == 0:
+            return NAN if avg_gain == 0 else 100.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+class MACD(StreamingIndicator):
+    """Returns (macd, signal, hist)."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+
+    def update(self, close):
+        line = self.fast.update(close) - self.slow.update(close)
+        sig = self.signal.update(line)
+        return line, sig, line - sig
+
+
+class BollingerBands(StreamingIndicator):
+    """Returns (upper, mid, lower) with the sample (ddof=1) std."""
+
+    def __init__(self, period=20, dev=2.0):
+        self.window = RollingWindow(period)
+        self.dev = dev
+
+    def update(self, close):
+        self.window.push(close)
+        mid, std = self.window.mean(), self.window.std()
+        return mid + self.dev * std, mid, mid - self.dev * std
+
+
+class CCI(StreamingIndicator):
+    needs_hlc = True
+
+    def __init__(self, period=20):
+        self.window = RollingWindow(period)
+
+    def update(self, high, low, close):
+        tp = (high + low + close) / 3
+        self.window.push(tp)
+        mad = self.window.mad()
+        if _isnan(mad) or mad == 0:
+            return NAN
+        return (tp - self.window.mean()) / (0.015 * mad)
+
+
+class TrueRange(StreamingIndicator):
+    needs_hlc = True
+
+    def __init__(self):
+        self.prev_close = NAN
+
+    def update(self, high, low, close):
+        if _isnan(self.prev_close):
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return tr
+
+
+class ATR(StreamingIndicator):
+    needs_hlc = True
+
+    def __init__(self, period=14):
+        self.tr = TrueRange()
+        self.avg = WilderAverage(period)
+
+    def update(self, high, low, close):
+        return self.avg.update(self.tr.update(high, low, close))
+
+
+class ADX(StreamingIndicator):
+    """Returns (adx, di_pos, di_neg), Wilder smoothing throughout."""
+
+    needs_hlc = True
+
+    def __init__(self, period=14):
+        self.tr = TrueRange()
+        self.s_tr = WilderAverage(period)
+        self.s_pos = WilderAverage(period)
+        self.s_neg = WilderAverage(period)
+        self.s_dx = WilderAverage(period)
+        self.prev_high = NAN
+        self.prev_low = NAN
+
+    def update(self, high, low, close):
+        tr = self.tr.update(high, low, close)
+        if _isnan(self.prev_high):
+            self.prev_high, self.prev_low = high, low
+            return NAN, NAN, NAN
+        up, down = high - self.prev_high, self.prev_low - low
+        self.prev_high, self.prev_low = high, low
+        dm_pos = up if (up > down and up > 0) else 0.0
+        dm_neg = down if (down > up and down > 0) else 0.0
+        s_tr = self.s_tr.update(tr)
+        s_pos, s_neg = self.s_pos.update(dm_pos), self.s_neg.update(dm_neg)
+        if _isnan(s_tr):
+            return NAN, NAN, NAN
+        di_pos = 100 * s_pos / s_tr if s_tr != 0 else 0.0
+        di_neg = 100 * s_neg / s_tr if s_tr != 0 else 0.0
+        di_sum = di_pos + di_neg
+        dx = 100 * abs(di_pos - di_neg) / di_sum if di_sum != 0 else 0.0
+        return self.s_dx.update(dx), di_pos, di_neg
+
+
+class StreamingIndicatorSet(StreamingIndicator):
+    """
+    Streaming counterpart of indicator_engine.compute_indicators: takes the
+    same feature names and returns a {name: value} dict for every new bar.
+    Features that share state (BB_upper/BB_lower, MACD/MACD_sig, ADX/DI_*)
+    share a single indicator object.
+    """
+
+    def __init__(self, features=DEFAULT_FEATURES, rsi_smoothing='sma',
+                 rsi_leading_zero=False, bb_dev=2.0, macd_periods=(12, 26)):
+        self.features = list(features)
+        self.nodes = {}
+        self.outputs = []
+        for name in self.features:
+            fn, period = parse_feature(name)
+            base = next(key for key, value in INDICATORS.items() if value is fn)
+            key, make, index, transform = self._spec(base, period, rsi_smoothing,
+                                                     rsi_leading_zero, bb_dev, macd_periods)
+            if key not in self.nodes:
+                self.nodes[key] = make()
+            self.outputs.append([key, index, transform])
+        self.last = {}
+
+    @staticmethod
+    def _spec(base, period, rsi_smoothing, rsi_leading_zero, bb_dev, macd_periods):
+        """(node key, factory, output index, transform) for one feature."""
+        if base in ('MA', 'SMA'):
+            return f'SMA_{period}', lambda: SMA(period), 0, None
+        if base == 'EMA':
+            return f'EMA_{period}', lambda: EMA(period), 0, None
+        if base == 'STD':
+            return f'STD_{period}', lambda: RollingStd(period), 0, None
+        if base in ('MACD', 'MACD_sig', 'Signal', 'MACD_hist'):
+            signal = 9 if base == 'MACD' else (period or 9)
+            index = {'MACD': 0, 'MACD_sig': 1, 'Signal': 1, 'MACD_hist': 2}[base]
+            return (f'MACD_{signal}', lambda: MACD(macd_periods[0], macd_periods[1], signal),
+                    index, None)
+        if base in ('Momentum', 'ROC'):
+            return f'LAG_{period}', lambda: Lag(period), 0, base
+        if base == 'RSI':
+            period = period or 14
+            return (f'RSI_{period}', lambda: RSI(period, rsi_smoothing, rsi_leading_zero),
+                    0, None)
+        if base in ('BB_upper', 'BB_mid', 'BB_lower'):
+            period = period or 20
+            index = {'BB_upper': 0, 'BB_mid': 1, 'BB_lower': 2}[base]
+            return f'BB_{period}', lambda: BollingerBands(period, bb_dev), index, None
+        if base == 'CCI':
+            period = period or 20
+            return f'CCI_{period}', lambda: CCI(period), 0, None
+        if base == 'ATR':
+            period = period or 14
+            return f'ATR_{period}', lambda: ATR(period), 0, None
+        if base in ('ADX', 'DI_pos', 'DI_neg'):
+            period = period or 14
+            index = {'ADX': 0, 'DI_pos': 1, 'DI_neg': 2}[base]
+            return f'ADX_{period}', lambda: ADX(period), index, None
+        raise ValueError(f"No streaming implementation for {base!r}")
+
+    def update(self, open_, high, low, close, volume=NAN):
+        """Feed one completed bar; returns {feature: value} for that bar."""
+        results = {}
+        for key, node in self.nodes.items():
+            out = node.update(high, low, close) if node.needs_hlc else node.update(close)
+            results[key] = out if isinstance(out, tuple) else (out,)
+        values = {}
+        for name, (key, index, transform) in zip(self.features, self.outputs):
+            out = results[key][index]
+            if transform == 'Momentum':
+                out = close - out
+            elif transform == 'ROC':
+                out = (close - out) / out * 100
+            values[name] = out
+        self.last = values
+        return values
+
+    def warm_up(self, df, columns=None):
+        """Replay a history DataFrame (MT5 column names by default); returns the last values."""
+        columns = columns or {'open': 'open', 'high': 'high', 'low': 'low',
+                              'close': 'close', 'volume': 'tick_volume'}
+        n = len(df)
+        cols = [df[columns[key]].to_numpy(dtype=float).tolist()
+                if columns.get(key) in df.columns else [NAN] * n
+                for key in ('open', 'high', 'low', 'close', 'volume')]
+        for bar in zip(*cols):
+            self.update(*bar)
+        return self.last
+
@@ -0,0 +1,318 @@
+# common/support_resistance.py
+"""
+Causal support / resistance levels for live M30 bars.
+
+events.find_support_resistance marks bars whose low/high is the extremum
+of a *centered* window, i.e. it needs the next lookback/2 bars and has to
+be recomputed over the whole history. Here the same pivots are found
+causally: bar t is a pivot low when its low is the lowest of bars
+t-left .. t+right, and that is reported on bar t+right, the first bar on
+which it is actually known. The batch path (confirmed_pivots) uses the
+van Herk / Gil-Werman rolling.rolling_min / rolling_max, O(n) for any
+window; the streaming detector keeps a monotonic deque per extremum
+(RollingExtremum, amortised O(1) per bar).
+
+Confirmed pivots go into a LevelBook, which clusters them into price
+zones with touch counts; after every bar it can be asked for the nearest
+zone below (support) and above (resistance) the close.
+
+    python common/support_resistance.py [--bars N] [--csv PATH]   # parity + latency check
+"""
+
+import argparse
+import bisect
+import json
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from rolling import rolling_max, rolling_min
+from streaming_indicators import ATR, NAN, StreamingIndicator, _isnan
+
+
+def centered_span(lookback):
+    """(left, right) bars around the pivot equivalent to rolling(lookback, center=True)."""
+    return lookback // 2, lookback - 1 - lookback // 2
+
+
+def confirmed_pivots(high, low, left, right):
+    """
+    Boolean (pivot_high, pivot_low) arrays, True on the bar where a pivot
+    `right` bars earlier is confirmed. Shift back by `right` to mark the
+    pivot bar itself.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    window = left + right + 1
+    pivot_high = np.zeros(len(high), dtype=bool)
+    pivot_low = np.zeros(len(low), dtype=bool)
+    if len(high) > right:
+        pivot_high[right:] = high[:len(high) - right] == rolling_max(high, window)[right:]
+        pivot_low[right:] = low[:len(low) - right] == rolling_min(low, window)[right:]
+    return pivot_high, pivot_low
+
+
+class RollingExtremum(StreamingIndicator):
+    """
+    Min (or max) of the last `period` values.
+
+    The deque holds [index, value] candidates with monotonic values; each
+    value is pushed and popped at most once, so update() is amortised O(1)
+    whatever the period. NaN inputs are skipped.
+    """
+
+    def __init__(self, period, mode='min'):
+        if mode not in ('min', 'max'):
+            raise ValueError("mode must be 'min' or 'max'")
+        self.period = period
+        self.mode = mode
+        self.window = deque()
+        self.count = 0
+
+    def update(self, x):
+        i = self.count
+        self.count += 1
+        window = self.window
+        if not _isnan(x):
+            if self.mode == 'min':
+                while window and window[-1][1] >= x:
+                    window.pop()
+            else:
+                while window and window[-1][1] <= x:
+                    window.pop()
+            window.append([i, x])
+        while window and window[0][0] <= i - self.period:
+            window.popleft()
+        if self.count < self.period or not window:
+            return NAN
+        return window[0][1]
+
+
+class PivotDetector(StreamingIndicator):
+    """Returns (pivot_high, pivot_low) prices confirmed on this bar, NaN when none."""
+
+    needs_hlc = True
+
+    def __init__(self, left=5, right=5):
+        self.right = right
+        self.highs = RollingExtremum(left + right + 1, 'max')
+        self.lows = RollingExtremum(left + right + 1, 'min')
+        self.recent = deque(maxlen=right + 1)   # [high, low] of the last right + 1 bars
+
+    def update(self, high, low, close=NAN):
+        highest, lowest = self.highs.update(high), self.lows.update(low)
+        self.recent.append([high, low])
+        if len(self.recent) < self.recent.maxlen:
+            return NAN, NAN
+        candidate_high, candidate_low = self.recent[0]
+        return (candidate_high if candidate_high == highest else NAN,
+                candidate_low if candidate_low == lowest else NAN)
+
+
+class LevelBook(StreamingIndicator):
+    """
+    Pivot prices clustered into zones.
+
+    A pivot within `tolerance` of the nearest zone's price is a touch of
+    that zone (the zone price becomes the mean of its touches and its
+    low/high bounds widen); otherwise it opens a new zone. Zones that drift
+    within tolerance of each other are merged. At most `max_zones` are
+    kept; the least recently touched one is dropped first.
+    """
+
+    def __init__(self, max_zones=50):
+        self.max_zones = max_zones
+        self.prices = []   # sorted zone prices, parallel to self.zones
+        self.zones = []
+
+    def add(self, price, kind, pos, tolerance):
+        """Record a 'support' (pivot low) or 'resistance' (pivot high) touch at bar `pos`."""
+        i = self._nearest(price)
+        if i is not None and abs(self.prices[i] - price) <= tolerance:
+            zone = self.zones[i]
+            zone['sum'] += price
+            zone['touches'] += 1
+            zone[kind] += 1
+            zone['low'] = min(zone['low'], price)
+            zone['high'] = max(zone['high'], price)
+            zone['last'] = pos
+            self.prices[i] = zone['price'] = zone['sum'] / zone['touches']
+            self._merge_neighbours(i, tolerance)
+            return zone
+        zone = {'price': price, 'sum': price, 'low': price, 'high': price, 'touches': 1,
+                'support': int(kind == 'support'), 'resistance': int(kind == 'resistance'),
+                'first': pos, 'last': pos}
+        i = bisect.bisect_left(self.prices, price)
+        self.prices.insert(i, price)
+        self.zones.insert(i, zone)
+        if len(self.zones) > self.max_zones:
+            stale = min(range(len(self.zones)), key=lambda j: self.zones[j]['last'])
+            del self.prices[stale], self.zones[stale]
+        return zone
+
+    def _nearest(self, price):
+        i = bisect.bisect_left(self.prices, price)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(self.prices)]
+        return min(candidates, key=lambda j: abs(self.prices[j] - price)) if candidates else None
+
+    def _merge_neighbours(self, i, tolerance):
+        for j in (i + 1, i - 1):
+            if 0 <= j < len(self.zones) and abs(self.prices[j] - self.prices[i]) <= tolerance:
+                keep, drop = self.zones[min(i, j)], self.zones[max(i, j)]
+                for key in ('sum', 'touches', 'support', 'resistance'):
+                    keep[key] += drop[key]
+                keep['low'], keep['high'] = min(keep['low'], drop['low']), max(keep['high'], drop['high'])
+                keep['first'], keep['last'] = min(keep['first'], drop['first']), max(keep['last'], drop['last'])
+                keep['price'] = keep['sum'] / keep['touches']
+                del self.prices[max(i, j)], self.zones[max(i, j)]
+                self.prices[min(i, j)] = keep['price']
+                return
+
+    def nearest(self, price, min_touches=1):
+        """(support, resistance): closest zones at/below and above `price`, or None."""
+        i = bisect.bisect_right(self.prices, price)
+        below = (z for z in reversed(self.zones[:i]) if z['touches'] >= min_touches)
+        above = (z for z in self.zones[i:] if z['touches'] >= min_touches)
+        return next(below, None), next(above, None)
+
+    def levels(self, min_touches=1):
+        """Zones with at least `min_touches` touches, ordered by price."""
+        return [z for z in self.zones if z['touches'] >= min_touches]
+
+
+class SupportResistance(StreamingIndicator):
+    """
+    Pivot detector + level book. Zone tolerance is `tolerance` in price
+    units, or `atr_mult` x ATR(`atr_period`) at the time of the pivot when
+    tolerance is None. update() returns a dict with the pivots confirmed on
+    this bar and the nearest support/resistance zones around the close.
+    """
+
+    needs_hlc = True
+    OUTPUTS = ['pivot_high', 'pivot_low', 'support', 'support_touches',
+               'resistance', 'resistance_touches']
+
+    def __init__(self, left=5, right=5, tolerance=None, atr_mult=0.5, atr_period=14,
+                 max_zones=50, min_touches=1):
+        self.pivots = PivotDetector(left, right)
+        self.atr = ATR(atr_period)
+        self.book = LevelBook(max_zones)
+        self.tolerance = tolerance
+        self.atr_mult = atr_mult
+        self.min_touches = min_touches
+        self.count = 0
+        self.last = {}
+
+    def update(self, high, low, close):
+        atr = self.atr.update(high, low, close)
+        pivot_high, pivot_low = self.pivots.update(high, low, close)
+        pos = self.count - self.pivots.right
+        self.count += 1
+        tolerance = self.tolerance if self.tolerance is not None else self.atr_mult * atr
+        if _isnan(tolerance):
+            tolerance = 0.0
+        if not _isnan(pivot_high):
+            self.book.add(pivot_high, 'resistance', pos, tolerance)
+        if not _isnan(pivot_low):
+            self.book.add(pivot_low, 'support', pos, tolerance)
+        support, resistance = self.book.nearest(close, self.min_touches)
+        self.last = {
+            'pivot_high': pivot_high,
+            'pivot_low': pivot_low,
+            'support': support['price'] if support else NAN,
+            'support_touches': support['touches'] if support else 0,
+            'resistance': resistance['price'] if resistance else NAN,
+            'resistance_touches': resistance['touches'] if resistance else 0,
+        }
+        return self.last
+
+    def warm_up(self, df, columns=None):
+        """Replay a history DataFrame (MT5 column names by default); returns the last values."""
+        columns = columns or {'high': 'high', 'low': 'low', 'close': 'close'}
+        cols = [df[columns[key]].to_numpy(dtype=float).tolist() for key in ('high', 'low', 'close')]
+        for bar in zip(*cols):
+            self.update(*bar)
+        return self.last
+
+
+def support_resistance_frame(df, columns=None, **options):
+    """Per-bar SupportResistance outputs for a whole history, as seen live on each bar."""
+    levels = SupportResistance(**options)
+    columns = columns or {'high': 'high', 'low': 'low', 'close': 'close'}
+    cols = [df[columns[key]].to_numpy(dtype=float).tolist() for key in ('high', 'low', 'close')]
+    rows = [list(levels.update(*bar).values()) for bar in zip(*cols)]
+    return pd.DataFrame(rows, columns=SupportResistance.OUTPUTS, index=df.index)
+
+
+def main():
+    from bench_data import load_m30
+
+    parser = argparse.ArgumentParser(description='Check the causal S/R detector and time it.')
+    parser.add_argument('--csv')
+    parser.add_argument('--bars', type=int, default=20_000)
+    parser.add_argument('--lookback', type=int, default=100)
+    args = parser.parse_args()
+    df = load_m30(args.csv) if args.csv else load_m30(bars=args.bars)
+    high, low = df['high'].to_numpy(), df['low'].to_numpy()
+    ok = True
+
+    same = all(np.array_equal(fn(x, args.lookback),
+                              getattr(pd.Series(x).rolling(args.lookback), name)().to_numpy(),
+                              equal_nan=True)
+               for fn, name in ((rolling_min, 'min'), (rolling_max, 'max')) for x in (high, low))
+    print(f"  {'ok ' if same else 'BAD'} rolling_min/rolling_max == pandas rolling")
+    ok &= same
+
+    # Causal pivots, shifted back to the pivot bar, vs the centered-window detector
+    left, right = centered_span(args.lookback)
+    conf_high, conf_low = confirmed_pivots(high, low, left, right)
+    causal = np.zeros(len(df), dtype=bool)
+    causal[:len(df) - right] = (conf_high | conf_low)[right:]
+    centered = ((df['low'] == df['low'].rolling(args.lookback, center=True, min_periods=1).min())
+                | (df['high'] == df['high'].rolling(args.lookback, center=True, min_periods=1).max()))
+    inner = slice(left, len(df) - right)
+    same = np.array_equal(causal[inner], centered.to_numpy()[inner])
+    print(f"  {'ok ' if same else 'BAD'} causal pivots == centered rolling({args.lookback}) "
+          f"away from the edges ({int(causal.sum()):,} pivots)")
+    ok &= same
+
+    pivots = PivotDetector(left, right)
+    streamed = np.array([[not _isnan(v) for v in pivots.update(h, l)] for h, l in zip(high, low)])
+    same = np.array_equal(streamed[:, 0], conf_high) and np.array_equal(streamed[:, 1], conf_low)
+    print(f"  {'ok ' if same else 'BAD'} streaming PivotDetector == confirmed_pivots")
+    ok &= same
+
+    half = len(df) // 2
+    live = SupportResistance()
+    live.warm_up(df.iloc[:half])
+    restored = SupportResistance.from_state(json.loads(json.dumps(live.state_dict())))
+    a, b = live.warm_up(df.iloc[half:]), restored.warm_up(df.iloc[half:])
+    same = all(a[k] == b[k] or (_isnan(a[k]) and _isnan(b[k])) for k in a)
+    print(f"  {'ok ' if same else 'BAD'} restored state continues identically")
+    ok &= same
+
+    print("Per-bar latency vs history length")
+    for history in sorted({h for h in (1_000, 10_000) if h < len(df)} | {len(df)}):
+        start_bar = max(history - 500, 0)
+        live = SupportResistance()
+        live.warm_up(df.iloc[:start_bar])
+        tail = df.iloc[start_bar:history]
+        start = time.perf_counter()
+        live.warm_up(tail)
+        per_bar = (time.perf_counter() - start) / len(tail)
+        print(f"  history {history:>7,} bars: {per_bar * 1e6:7.1f} us/bar  "
+              f"{len(live.book.zones)} zones")
+    last = live.last
+    print(f"Latest close {df['close'].iloc[-1]:.2f}: support {last['support']:.2f} "
+          f"({last['support_touches']} touches), resistance {last['resistance']:.2f} "
+          f"({last['resistance_touches']} touches)")
+
+    print('ALL OK' if ok else 'MISMATCHES FOUND')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
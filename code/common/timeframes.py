@@ -0,0 +1,186 @@
+# common/timeframes.py
+"""
+Higher-timeframe bars + indicators from the single M30 master series.
+
+Every bar gets an integer bucket id per timeframe (floor division of the
+epoch time for 1H/4H/1D, Sunday-start weeks for 1W as in MetaTrader,
+calendar months for 1M). OHLCV is then reduced with ufunc.reduceat over
+the bucket boundaries instead of a resample() per timeframe. Timeframes
+are built as a cascade (M30 -> 1H -> 4H -> 1D -> 1W / 1M), so a higher
+timeframe is always the exact aggregate of the lower ones.
+
+    python common/timeframes.py --csv PATH --out DIR [--timeframes 1H 4H 1D 1W 1M]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicator_engine import DEFAULT_FEATURES, MT5_COLUMNS, compute_indicators
+
+TIMEFRAMES = ['1H', '4H', '1D', '1W', '1M']
+
+_SECOND = 10**9
+_DAY = 86_400 * _SECOND
+_FIXED_WIDTH = {'30min': 1_800 * _SECOND, '1H': 3_600 * _SECOND,
+                '4H': 14_400 * _SECOND, '1D': _DAY}
+# Each timeframe is reduced from the one it nests in
+_PARENT = {'1H': '30min', '4H': '1H', '1D': '4H', '1W': '1D', '1M': '1D'}
+# 1970-01-01 was a Thursday; shifting by 4 days puts week boundaries on Sunday
+_WEEK_SHIFT_DAYS = 4
+
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+
+def bucket_ids(times, timeframe):
+    """int64 bucket id of each timestamp for `timeframe`."""
+    ns = np.asarray(times, dtype='datetime64[ns]').astype(np.int64)
+    if timeframe in _FIXED_WIDTH:
+        return ns // _FIXED_WIDTH[timeframe]
+    if timeframe == '1W':
+        return (ns // _DAY + _WEEK_SHIFT_DAYS) // 7
+    if timeframe == '1M':
+        return np.asarray(times, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"Unknown timeframe {timeframe!r}; expected one of {list(_FIXED_WIDTH) + ['1W', '1M']}")
+
+
+def bucket_start(ids, timeframe):
+    """Open time (datetime64[ns]) of each bucket id."""
+    ids = np.asarray(ids, dtype=np.int64)
+    if timeframe in _FIXED_WIDTH:
+        return (ids * _FIXED_WIDTH[timeframe]).astype('datetime64[ns]')
+    if timeframe == '1W':
+        return ((ids * 7 - _WEEK_SHIFT_DAYS) * _DAY).astype('datetime64[ns]')
+    if timeframe == '1M':
+        return ids.astype('datetime64[M]').astype('datetime64[ns]')
+    raise ValueError(f"Unknown timeframe {timeframe!r}")
+
+
+def aggregate(bars, timeframe):
+    """
+    Reduce a sorted {'time', 'open', 'high', 'low', 'close', 'volume'}
+    array dict into `timeframe` buckets.
+    """
+    ids = bucket_ids(bars['time'], timeframe)
+    if len(ids) and np.any(ids[1:] < ids[:-1]):
+        raise ValueError("bars must be sorted by time")
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], int)
+    ends = np.r_[starts[1:], len(ids)] - 1
+    if not len(starts):
+        return {key: bars[key][:0] for key in ['time'] + OHLCV}
+    return {
+        'time': bucket_start(ids[starts], timeframe),
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts),
+    }
+
+
+def _master_arrays(df, columns):
+    """Sorted, de-duplicated float arrays of the M30 master series."""
+    times = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.to_datetime(df['time'])
+    times = np.asarray(times, dtype='datetime64[ns]')
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    keep = np.r_[True, times[1:] != times[:-1]]
+    bars = {'time': times[keep]}
+    for key in OHLCV:
+        col = columns.get(key)
+        values = df[col].to_numpy(dtype=np.float64) if col in df.columns else np.zeros(len(df))
+        bars[key] = values[order][keep]
+    return bars
+
+
+def build_timeframes(df, timeframes=TIMEFRAMES, features=DEFAULT_FEATURES,
+                     columns=MT5_COLUMNS, dtype=np.float64):
+    """
+    {timeframe: DataFrame} with OHLCV (MT5 column names) plus `features`
+    for each requested timeframe, all derived from the M30 frame `df`.
+    """
+    bars = {'30min': _master_arrays(df, columns)}
+    for tf in TIMEFRAMES:
+        if any(_reaches(t, tf) for t in timeframes):
+            bars[tf] = aggregate(bars[_PARENT[tf]], tf)
+
+    frames = {}
+    for tf in timeframes:
+        b = bars[tf]
+        block, names = compute_indicators(b['close'], b['high'], b['low'], b['open'], b['volume'],
+                                          features=features, dtype=dtype)
+        frame = pd.DataFrame({'open': b['open'], 'high': b['high'], 'low': b['low'],
+                              'close': b['close'], 'tick_volume': b['volume']},
+                             index=pd.DatetimeIndex(b['time'], name='time'))
+        frame[names] = block
+        frames[tf] = frame
+    return frames
+
+
+def _reaches(target, tf):
+    """True if `tf` lies on the cascade path needed to build `target`."""
+    while target in _PARENT:
+        if target == tf:
+            return True
+        target = _PARENT[target]
+    return False
+
+
+def verify_nesting(frames):
+    """Check that each built timeframe aggregates exactly into the next one up."""
+    problems = []
+    for tf, parent in _PARENT.items():
+        if tf not in frames or parent not in frames:
+            continue
+        lower = frames[parent]
+        ids = bucket_ids(lower.index, tf)
+        grouped = lower.groupby(ids).agg(open=('open', 'first'), high=('high', 'max'),
+                                          low=('low', 'min'), close=('close', 'last'),
+                                          tick_volume=('tick_volume', 'sum'))
+        upper = frames[tf][['open', 'high', 'low', 'close', 'tick_volume']]
+        if not np.array_equal(grouped.to_numpy(), upper.to_numpy()):
+            problems.append(f'{parent} -> {tf}')
+    return problems
+
+
+def write_timeframes(frames, out_dir, symbol='XAUUSD'):
+    """Write each frame to <out_dir>/<symbol>_<tf>.csv; returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for tf, frame in frames.items():
+        path = os.path.join(out_dir, f'{symbol}_{tf}.csv')
+        frame.to_csv(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    from bench_data import load_m30
+
+    parser = argparse.ArgumentParser(description='Build higher timeframes from M30 bars.')
+    parser.add_argument('--csv', help='MT5 M30 export (default: recorded history)')
+    parser.add_argument('--out', help='directory for <symbol>_<tf>.csv files')
+    parser.add_argument('--symbol', default='XAUUSD')
+    parser.add_argument('--timeframes', nargs='+', default=TIMEFRAMES)
+    args = parser.parse_args()
+
+    df = load_m30(args.csv)
+    start = time.perf_counter()
+    frames = build_timeframes(df, args.timeframes)
+    elapsed = time.perf_counter() - start
+    for tf, frame in frames.items():
+        print(f"  {tf:>3}: {len(frame):>7,} bars  {frame.index[0]} .. {frame.index[-1]}")
+    print(f"Built {len(frames)} timeframes from {len(df):,} M30 bars in {elapsed * 1000:.1f} ms")
+    problems = verify_nesting(frames)
+    print('Nesting check: ' + ('ok' if not problems else 'MISMATCH ' + ', '.join(problems)))
+    if args.out:
+        for path in write_timeframes(frames, args.out, args.symbol):
+            print(f"Saved {path}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# common/trade_labels.py
+"""
+Trade-outcome labels for the Grok_version labeling scripts.
+
+The realistic labeler enters on a 10/20 EMA crossover in a trending
+market (ADX filter) and walks the next `holding_period` bars to see which
+ATR-sized level is touched first; the walk runs in kernels.first_touch
+(numba or NumPy backend) instead of iterrows per bar.
+
+The perfect-hindsight labeler only needs the highest high and lowest low
+of each bar's holding window, taken for all bars at once from an
+(n, window) strided view of high / low instead of a df.iloc slice per row.
+
+Both return 'strong_sell' .. 'strong_buy' strings, or the int8 codes
+-2..2 with names=False.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from kernels import first_touch
+
+LABEL_NAMES = np.array(['strong_sell', 'weak_sell', 'neutral', 'weak_buy', 'strong_buy'])
+
+
+def label_names(codes):
+    """Map first_touch codes (-2..2) to 'strong_sell' .. 'strong_buy'."""
+    return LABEL_NAMES[np.asarray(codes) + 2]
+
+
+def ema_cross_directions(df, holding_period=8, adx_min=15, fast='ema_10', slow='ema_20'):
+    """
+    +1 where `fast` crosses above `slow`, -1 where it crosses below, 0
+    elsewhere; bars without a previous bar or a full holding period ahead,
+    and bars with ADX below `adx_min`, get 0.
+    """
+    n = len(df)
+    e_fast, e_slow = df[fast].to_numpy(), df[slow].to_numpy()
+    p_fast, p_slow = np.r_[np.nan, e_fast[:-1]], np.r_[np.nan, e_slow[:-1]]
+    idx = np.arange(n)
+    with np.errstate(invalid='ignore'):
+        # `adx < adx_min` is False for NaN ADX, which the per-row labelers let through
+        tradable = (idx >= 1) & (idx + holding_period < n) & ~(df['adx'].to_numpy() < adx_min)
+        up = tradable & (p_fast <= p_slow) & (e_fast > e_slow)
+        down = tradable & (p_fast >= p_slow) & (e_fast < e_slow)
+    return np.where(up, 1, np.where(down, -1, 0)).astype(np.int8)
+
+
+def realistic_labels(df, stop_atr=1.0, tp_strong_atr=2.0, tp_weak_atr=1.5,
+                     holding_period=8, adx_min=15, names=True):
+    """
+    Labels of assign_realistic_label for every row of `df` (needs close,
+    high, low, ema_10, ema_20, atr and adx columns), as a string array.
+    """
+    atr = df['atr'].to_numpy()
+    codes = first_touch(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(),
+                        ema_cross_directions(df, holding_period, adx_min),
+                        stop_atr * atr, tp_strong_atr * atr, tp_weak_atr * atr, holding_period)
+    return label_names(codes) if names else codes
+
+
+def window_extremes(high, low, holding_period=8, include_entry=False):
+    """
+    Highest high and lowest low over bars i+1 .. i+holding_period (from
+    bar i itself with include_entry=True) for every bar i; NaN for the
+    last `holding_period` bars, which have no full window.
+    """
+    high, low = np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64)
+    n, start = len(high), 0 if include_entry else 1
+    max_high, min_low = np.full(n, np.nan), np.full(n, np.nan)
+    m = n - holding_period
+    if m > 0:
+        width = holding_period + 1 - start
+        max_high[:m] = sliding_window_view(high[start:], width).max(axis=1)[:m]
+        min_low[:m] = sliding_window_view(low[start:], width).min(axis=1)[:m]
+    return max_high, min_low
+
+
+def perfect_labels(df, take_profit_strong, take_profit_weak, stop_loss, spread,
+                   holding_period=8, include_entry=False, names=True):
+    """
+    Labels of assign_perfect_label for every row of `df` (needs close,
+    high and low): a buy entered at close + spread is strong / weak when
+    the window's high reaches the take-profit while its low stays within
+    the stop (checked before the sell side, entered at close - spread).
+    labeling2.py's window includes the entry bar (include_entry=True),
+    labeling3.py's starts on the next bar. Bars without a full window are
+    neutral.
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    max_high, min_low = window_extremes(df['high'].to_numpy(), df['low'].to_numpy(),
+                                        holding_period, include_entry)
+    buy_entry, sell_entry = close + spread, close - spread
+    with np.errstate(invalid='ignore'):
+        buy_ok = (buy_entry - min_low) < stop_loss
+        sell_ok = (max_high - sell_entry) < stop_loss
+        buy_profit, sell_profit = max_high - buy_entry, sell_entry - min_low
+        codes = np.select(
+            [buy_ok & (buy_profit >= take_profit_strong), buy_ok & (buy_profit >= take_profit_weak),
+             sell_ok & (sell_profit >= take_profit_strong), sell_ok & (sell_profit >= take_profit_weak)],
+            [2, 1, -2, -1], 0).astype(np.int8)
+    return label_names(codes) if names else codes
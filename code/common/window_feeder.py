@@ -0,0 +1,105 @@
+# common/window_feeder.py
+"""
+Batches of LSTM windows gathered on the fly from 2-D feature matrices.
+
+Instead of materialising (n, T, F) arrays for every model input, the
+feeder keeps each input once as a (bars, F) matrix plus a vector of
+window start rows (see windows.valid_window_indices) and builds each
+batch with one fancy-index gather. Memory is bars x F instead of
+windows x T x F, whatever the window length.
+
+    train = WindowSequence({'tech_input': tech, 'macro_input': macro}, labels,
+                           window=30, indices=train_starts, shuffle=True)
+    model.fit(train.to_dataset(), epochs=50)     # or model.fit(train, ...)
+
+Window i covers rows start .. start+window-1 and its label is
+targets[start + window - 1 + horizon], as in windows.make_sequences.
+"""
+
+import math
+
+import numpy as np
+from tensorflow.keras.utils import Sequence
+
+
+class WindowSequence(Sequence):
+    """
+    keras Sequence over windows of one or several inputs.
+
+    inputs      (bars, F) array, or {input name: (bars, F) array} for
+                multi-input models; all share the row axis
+    targets     per-row labels (None for prediction-only feeds)
+    indices     window start rows to serve (default: every full window)
+    shuffle     reshuffle the window order at the end of each epoch
+    kwargs      passed to the Keras base class (workers, max_queue_size, ...)
+    """
+
+    def __init__(self, inputs, targets, window, indices=None, horizon=1, batch_size=32,
+                 shuffle=False, seed=None, dtype=np.float32, **kwargs):
+        super().__init__(**kwargs)
+        self.named = isinstance(inputs, dict)
+        items = inputs.items() if self.named else [(None, inputs)]
+        self.inputs = {name: np.asarray(values, dtype=dtype) for name, values in items}
+        rows = {len(values) for values in self.inputs.values()}
+        if len(rows) != 1:
+            raise ValueError(f"All inputs must have the same number of rows, got {sorted(rows)}")
+        n_rows = rows.pop()
+        self.targets = None if targets is None else np.asarray(targets)
+        self.window, self.horizon, self.batch_size = window, horizon, batch_size
+        if indices is None:
+            indices = np.arange(max(n_rows - window - horizon + 1, 0))
+        self.indices = np.asarray(indices, dtype=np.int64)
+        if len(self.indices) and self.indices.max() + window + horizon > n_rows:
+            raise ValueError("Window indices run past the end of the inputs")
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.order = self.indices.copy()
+        if shuffle:
+            self.rng.shuffle(self.order)
+        self._offsets = np.arange(window)
+
+    def __len__(self):
+        return math.ceil(len(self.order) / self.batch_size)
+
+    def labels(self):
+        """Targets of all windows in `indices` order (y_true for evaluation)."""
+        return self.targets[self.indices + self.window - 1 + self.horizon]
+
+    def __getitem__(self, batch):
+        starts = self.order[batch * self.batch_size:(batch + 1) * self.batch_size]
+        rows = starts[:, None] + self._offsets
+        x = {name: values[rows] for name, values in self.inputs.items()}
+        if not self.named:
+            x = x[None]
+        if self.targets is None:
+            return x
+        return x, self.targets[starts + self.window - 1 + self.horizon]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+    def to_dataset(self, prefetch=None):
+        """
+        The same batches as a tf.data pipeline with `prefetch` batches
+        (default AUTOTUNE) built in the background while the model trains.
+        Reshuffles on every pass when shuffle=True.
+        """
+        import tensorflow as tf
+
+        def spec(values):
+            return tf.TensorSpec((None, self.window, values.shape[1]), tf.as_dtype(values.dtype))
+
+        x_spec = {name: spec(values) for name, values in self.inputs.items()}
+        if not self.named:
+            x_spec = x_spec[None]
+        signature = x_spec if self.targets is None else (
+            x_spec, tf.TensorSpec((None,), tf.as_dtype(self.targets.dtype)))
+
+        def batches():
+            for batch in range(len(self)):
+                yield self[batch]
+            self.on_epoch_end()
+
+        dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+        return dataset.prefetch(tf.data.AUTOTUNE if prefetch is None else prefetch)
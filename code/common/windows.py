@@ -0,0 +1,127 @@
+# common/windows.py
+"""
+LSTM input windows as strided views instead of per-bar Python slices.
+
+Window i covers rows i .. i+window-1 of a (bars, features) array. Its
+target sits `horizon` rows after the last row of the window, so
+horizon=1 is "the bar right after the window" (the create_sequences
+convention in LSTM/ and Grok_version/). horizon=0 labels the window's
+own last bar.
+
+    X = sliding_windows(values, 30, horizon=1)      # (n, 30, F) view, no copy
+    y = window_targets(labels, 30, horizon=1)       # labels[i + 30] per window
+
+The views are read-only and share memory with `values`. Slicing them
+stays free, fancy indexing (shuffles, masks) and reshape(-1, F) copy.
+np.save, Keras and scalers copy them like any other array.
+
+    python common/windows.py [--bars N]   # views / prefix-sum validity vs per-window loops
+"""
+
+import numpy as np
+
+
+def window_count(length, window, horizon=0):
+    """Number of full windows of `window` rows (plus `horizon` rows of target) in `length` rows."""
+    return max(length - window - horizon + 1, 0)
+
+
+def sliding_windows(values, window, horizon=0, count=None):
+    """
+    (n, window, F) view of a (bars, F) array, or (n, window) for a 1-D
+    one. n = window_count(len(values), window, horizon), capped at `count`.
+    """
+    values = np.asarray(values)
+    if window < 1:
+        raise ValueError(f"window must be >= 1, got {window}")
+    n = window_count(len(values), window, horizon)
+    if count is not None:
+        n = min(n, count)
+    if n == 0:
+        return np.empty((0, window) + values.shape[1:], dtype=values.dtype)
+    # sliding_window_view puts the window axis last: (n, F, window) -> (n, window, F)
+    view = np.lib.stride_tricks.sliding_window_view(values[:n + window - 1], window, axis=0)
+    return np.moveaxis(view, -1, 1)
+
+
+def window_targets(targets, window, horizon=1, count=None):
+    """targets[i + window - 1 + horizon] for every window i (a view of `targets`)."""
+    targets = np.asarray(targets)
+    n = window_count(len(targets), window, horizon)
+    if count is not None:
+        n = min(n, count)
+    start = window - 1 + horizon
+    return targets[start:start + n]
+
+
+def valid_window_indices(*arrays, window, horizon=1):
+    """
+    Start rows of the windows without a NaN in any of `arrays` (each
+    (bars, F) or (bars,)). Rows are flagged once and counted with a
+    prefix sum, so each window is checked in O(1) whatever its length.
+    """
+    row_nan = np.zeros(len(arrays[0]), dtype=bool)
+    for values in arrays:
+        isnan = np.isnan(np.asarray(values, dtype=float))
+        row_nan |= isnan.any(axis=1) if isnan.ndim > 1 else isnan
+    n = window_count(len(row_nan), window, horizon)
+    nan_before = np.concatenate(([0], np.cumsum(row_nan)))
+    # NaN rows in window i = nan_before[i + window] - nan_before[i]
+    return np.flatnonzero(nan_before[window:window + n] == nan_before[:n])
+
+
+def make_sequences(values, targets, window, horizon=1):
+    """(X, y) = (sliding_windows(values, ...), window_targets(targets, ...))."""
+    return (sliding_windows(values, window, horizon),
+            window_targets(targets, window, horizon))
+
+
+def _loop_sequences(values, targets, window, horizon=1):
+    X, y = [], []
+    for i in range(len(values) - window - horizon + 1):
+        X.append(values[i:i + window])
+        y.append(targets[i + window - 1 + horizon])
+    return np.array(X), np.array(y)
+
+
+def main():
+    import argparse
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_data import M30_HISTORY_BARS, synthetic_ohlcv, timeit
+
+    parser = argparse.ArgumentParser(description='Window building: strided views vs Python loop.')
+    parser.add_argument('--bars', type=int, default=M30_HISTORY_BARS)
+    parser.add_argument('--window', type=int, default=30)
+    args = parser.parse_args()
+
+    df = synthetic_ohlcv(args.bars)
+    values = df[['open', 'high', 'low', 'close', 'tick_volume']].to_numpy(dtype=np.float64)
+    labels = np.sign(np.diff(values[:, 3], append=np.nan))
+
+    t_loop, (X_loop, y_loop) = timeit(lambda: _loop_sequences(values, labels, args.window), repeat=1)
+    t_view, (X, y) = timeit(lambda: make_sequences(values, labels, args.window))
+    same = np.array_equal(X, X_loop) and np.array_equal(y, y_loop, equal_nan=True)
+
+    gappy = values.copy()
+    gappy[::997, 1] = np.nan
+    t_scan, valid_loop = timeit(lambda: np.array([i for i, w in enumerate(sliding_windows(gappy, args.window, 1))
+                                                  if not np.isnan(w).any()]), repeat=1)
+    t_prefix, valid = timeit(lambda: valid_window_indices(gappy, window=args.window))
+    same &= np.array_equal(valid, valid_loop)
+    print(f"{args.bars:,} bars, window {args.window}: {X.shape}, "
+          f"{X_loop.nbytes / 2**20:,.0f} MiB if materialised")
+    print(f"  loop of slices  {t_loop * 1000:10.1f} ms")
+    print(f"  strided view    {t_view * 1000:10.3f} ms  ({t_loop / t_view:,.0f}x)  "
+          f"shares memory: {np.shares_memory(X, values)}")
+    print(f"NaN-free windows ({len(valid):,} of {len(X):,}):")
+    print(f"  isnan per window {t_scan * 1000:10.1f} ms")
+    print(f"  prefix sums      {t_prefix * 1000:10.3f} ms  ({t_scan / t_prefix:,.0f}x)")
+    print('ALL OK' if same else 'MISMATCH')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
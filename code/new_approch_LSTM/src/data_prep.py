@@ -3,15 +3,16 @@
 from pathlib import Path
 import pandas as pd
 
+DATA_CSV = Path(__file__).resolve().parent.parent / 'data' / 'XAUUSD_30m_from_2018.csv'
+
 def load_data() -> pd.DataFrame:
     """
     Load 30-minute XAUUSD CSV (with columns time, open, high, low, close, tick_volume)
     from the project’s data/ folder, parse the 'time' column as datetime index,
     and rename columns to OHLCV.
     """
-    csv_path = Path(__file__).resolve().parent.parent / 'data' / 'XAUUSD_30m_from_2018.csv'
     df = pd.read_csv(
-        csv_path,
+        DATA_CSV,
         parse_dates=['time'],      # parse the 'time' column
         index_col='time'           # set it as index
     )
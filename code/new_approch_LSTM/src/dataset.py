@@ -4,24 +4,33 @@ import sys, os
 # Ensure local modules are importable
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
 from data_prep import load_data
 from indicators import add_indicators
+from windows import sliding_windows, window_count, window_targets
+from row_scaler import RowScaler
 
-def build_sequences(df, features, target_col='Close', window=50):
-    scaler = MinMaxScaler()
-    scaled = scaler.fit_transform(df[features])
+def build_sequences(df, features, target_col='Close', window=50, scaler=None, train_fraction=0.8):
+    """
+    Min-max scaled windows and next-bar-up labels. The scaler is fitted on
+    the rows of the first `train_fraction` of windows only (the training
+    split of train.py), or pass the fitted one saved next to the model.
+    """
+    n = window_count(len(df), window, horizon=2)
+    if scaler is None:
+        scaler = RowScaler('minmax').fit(df[features].iloc[:int(n * train_fraction) + window - 1])
+    scaled = scaler.transform(df[features].to_numpy(dtype=np.float32))
 
-    X, y = [], []
-    for i in range(window, len(scaled) - 1):
-        X.append(scaled[i-window:i])
-        cur = scaled[i, features.index(target_col)]
-        nxt = scaled[i+1, features.index(target_col)]
-        y.append(int(nxt > cur))
+    # Window i is rows i .. i+window-1; its label is whether the bar after
+    # the next one closes above the next one (needs horizon=2 rows of target)
+    target = df[target_col].to_numpy()
+    up = (target[1:] > target[:-1]).astype(np.int32)
+    X = sliding_windows(scaled, window, horizon=2)
+    y = window_targets(up, window, horizon=1)
 
-    return np.array(X, dtype=np.float32), np.array(y, dtype=np.int32), scaler
+    return X, y, scaler
 
 if __name__ == '__main__':
     df = load_data()                     # no arguments
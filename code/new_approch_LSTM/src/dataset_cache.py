@@ -0,0 +1,96 @@
+# src/dataset_cache.py
+"""
+On-disk cache of built event datasets (X, y, times).
+
+Entries are keyed by a hash of the raw data file plus lookback,
+lookahead, the feature list and DATASET_VERSION, and stored through the
+shared FeatureCache (common/feature_cache.py) in its own directory, so
+train_events, export_predictions and visualize_events build the dataset
+once and load it from disk until the CSV or a parameter changes.
+
+    python src/dataset_cache.py --list
+    python src/dataset_cache.py --purge
+
+Set DATASET_CACHE_DIR to move the cache, FEATURE_CACHE_DISABLE=1 to bypass it.
+"""
+
+import sys, os
+if '__file__' in globals():
+    sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+
+import argparse
+import hashlib
+import json
+
+import numpy as np
+
+from data_prep import DATA_CSV
+from dataset_events import FEATURES, build_event_dataset
+from feature_cache import FeatureCache
+
+# Bump when build_event_dataset / scan_events / add_indicators change their output
+DATASET_VERSION = 2
+DEFAULT_DIR = os.environ.get(
+    'DATASET_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.dataset_cache'),
+)
+
+_default_cache = None
+
+
+def dataset_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FeatureCache(DEFAULT_DIR)
+    return _default_cache
+
+
+def file_fingerprint(path, chunk=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cached_event_dataset(lookback=50, lookahead=5, features=FEATURES, df=None, cache=None):
+    """
+    build_event_dataset(lookback, lookahead, features) from the cache when
+    the data file and parameters match an entry; `df` (an add_indicators
+    frame of the same file) is only used when the dataset must be rebuilt.
+    """
+    cache = cache or dataset_cache()
+    params = {
+        'version': DATASET_VERSION,
+        'lookback': lookback,
+        'lookahead': int(lookahead) if np.ndim(lookahead) == 0 else [int(h) for h in lookahead],
+        'features': list(features),
+    }
+    entry = cache.get_or_compute(
+        file_fingerprint(DATA_CSV), 'event_dataset', params,
+        lambda: dict(zip(('X', 'y', 'times'), build_event_dataset(lookback, lookahead, features, df))))
+    return entry['X'], entry['y'], entry['times']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or purge the event dataset cache.')
+    parser.add_argument('--dir', default=DEFAULT_DIR)
+    parser.add_argument('--list', action='store_true')
+    parser.add_argument('--purge', action='store_true', help='drop every entry')
+    args = parser.parse_args()
+    cache = FeatureCache(args.dir)
+    if args.purge:
+        n = cache.purge()
+        print(f"Removed {n} entr{'y' if n == 1 else 'ies'}")
+    if args.list or not args.purge:
+        entries = cache.entries()
+        print(f"{cache.root}: {len(entries)} entries, {cache.total_bytes() / 2**20:.1f} MiB")
+        for key, e in entries:
+            print(f"  {key[:10]}  rows={e['rows']:<7} {e['bytes'] / 2**20:8.1f} MiB "
+                  f"hits={e.get('hits', 0):<4} built in {e['compute_seconds']:.1f}s "
+                  f"{json.dumps(e['params'], sort_keys=True)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
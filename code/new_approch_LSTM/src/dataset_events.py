@@ -1,36 +1,53 @@
 import sys, os
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 import numpy as np
+import pandas as pd
 from data_prep import load_data
 from indicators import add_indicators
-from events import (
-    find_rsi_events, find_macd_crossovers,
-    find_ema_crosses, find_bb_touch,
-    find_support_resistance
-)
-
-def build_event_dataset(lookback=50, lookahead=5):
-    df = add_indicators(load_data())
-    features = ['Close','RSI','MACD','MACD_sig','BB_upper','BB_lower','Volume']
-    events = find_rsi_events(df)
-    for fn in (find_macd_crossovers, find_ema_crosses, find_bb_touch, find_support_resistance):
-        events = events.union(fn(df))
-    events = events.sort_values().unique()
-
-    X_list, y_list, times = [], [], []
-    for t in events:
-        pos = np.where(df.index == t)[0]
-        if pos.size==0: continue
-        idx = pos[0]
-        if idx<lookback or idx+lookahead>=len(df): continue
-        W = df[features].iloc[idx-lookback:idx].values.astype(np.float32)
-        curr = df['Close'].iloc[idx]
-        fut = df['Close'].iloc[idx+1:idx+1+lookahead].values[-1]
-        label = int(fut>curr)
-        X_list.append(W); y_list.append(label); times.append(t)
-    return np.array(X_list), np.array(y_list), times
+from events import scan_events
+from windows import sliding_windows
+
+FEATURES = ['Close','RSI','MACD','MACD_sig','BB_upper','BB_lower','Volume']
+
+
+def event_positions(index, times):
+    """Bar position of each event time in `index` (first match), -1 where absent."""
+    index = pd.Index(index)
+    if index.is_unique:
+        return index.get_indexer(times)
+    first = ~index.duplicated()
+    pos = index[first].get_indexer(times)
+    return np.where(pos >= 0, np.flatnonzero(first)[pos], -1)
+
+
+def build_event_dataset(lookback=50, lookahead=5, features=FEATURES, df=None):
+    """
+    (X, y, times) for every detected event: X the `lookback` bars of
+    `features` before the event bar (float32), y whether Close `lookahead`
+    bars later is above the event bar's Close. `lookahead` may be a list of
+    horizons, giving y of shape (events, horizons). Events without a full
+    window or horizon are dropped. Pass `df` to reuse an add_indicators
+    frame instead of loading and computing one.
+    """
+    if df is None:
+        df = add_indicators(load_data())
+    events = scan_events(df)['time'].to_numpy()
+    horizons = np.atleast_1d(lookahead)
+
+    pos = event_positions(df.index, events)
+    keep = (pos >= lookback) & (pos + horizons.max() < len(df))
+    pos, times = pos[keep], events[keep]
+
+    # one gather for all windows: window starting at pos-lookback ends on pos-1
+    X = sliding_windows(df[list(features)].to_numpy(dtype=np.float32), lookback)[pos - lookback]
+    close = df['Close'].to_numpy()
+    y = (close[pos[:, None] + horizons] > close[pos][:, None]).astype(int)
+    if np.ndim(lookahead) == 0:
+        y = y[:, 0]
+    return X, y, times
 
 if __name__=='__main__':
     X,y,t = build_event_dataset()
-    print(f"Events: {len(t)}, X:{X.shape}, up-rate:{y.mean():.2f}")
\ No newline at end of file
+    print(f"Events: {len(t)}, X:{X.shape}, up-rate:{y.mean():.2f}")
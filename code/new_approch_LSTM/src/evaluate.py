@@ -4,6 +4,7 @@ import sys, os
 # Enable imports from src/
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 
 import numpy as np
 import pandas as pd
@@ -11,21 +12,27 @@ from tensorflow.keras.models import load_model
 
 from data_prep import load_data
 from indicators import add_indicators
+from feature_cache import default_cache
 from dataset import build_sequences
 from model import sum_time  # custom function for Lambda layer
+from row_scaler import RowScaler, scaler_path_for
 
 def backtest():
     # Load data and compute indicators
     df = load_data()
     df = add_indicators(df)
+    print(default_cache().report())
 
     # Features and window
     feats = ['Close', 'RSI', 'MACD', 'MACD_sig', 'BB_upper', 'BB_lower', 'Volume']
     window = 50
-    X_all, y_all, _ = build_sequences(df, feats, window=window)
+    model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'fx_lstm_attn.h5'))
+    # Reuse the scaler fitted at training time (older models without one refit it)
+    scaler_path = scaler_path_for(model_path)
+    scaler = RowScaler.load(scaler_path) if os.path.exists(scaler_path) else None
+    X_all, y_all, _ = build_sequences(df, feats, window=window, scaler=scaler)
 
     # Load model with custom_objects
-    model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'fx_lstm_attn.h5'))
     model = load_model(model_path, custom_objects={'sum_time': sum_time})
 
     # Generate signals (binary)
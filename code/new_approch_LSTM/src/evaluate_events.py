@@ -2,16 +2,18 @@ import sys, os
 from pathlib import Path
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 
 import numpy as np
-import pandas as pd
 from tensorflow.keras.models import load_model
 from sklearn.metrics import accuracy_score, precision_score, recall_score
 
-# Load test artifacts
+from sequence_store import SequenceStore
+
+# Load test artifacts (memory-mapped; windows are read batch by batch)
 models_dir = Path(__file__).resolve().parent.parent / 'models_events'
-X_test = np.load(models_dir / 'X_test_events.npy')
-y_test = pd.read_csv(models_dir / 'y_test_events.csv')['actual'].values
+test_store = SequenceStore(models_dir / 'X_test_events')
+y_test = test_store.labels()
 
 # Load trained model with custom sum_time
 from model_events import sum_time  # import the custom function used in Lambda layer
@@ -22,7 +24,8 @@ event_model = load_model(
 )
 
 # Predict & evaluate
-probs = event_model.predict(X_test).ravel()
+probs = np.concatenate([event_model.predict(X, verbose=0).ravel()
+                        for X in test_store.iter_batches(4096, labels=False)])
 signals = (probs > 0.5).astype(int)
 
 acc = accuracy_score(y_test, signals)
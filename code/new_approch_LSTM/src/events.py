@@ -1,5 +1,10 @@
+import sys, os
+if '__file__' in globals():
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+
 import pandas as pd
 import numpy as np
+from support_resistance import centered_span, confirmed_pivots
 
 # 1) RSI overbought/oversold crossing events
 def find_rsi_events(df: pd.DataFrame, oversold=30, overbought=70) -> pd.DatetimeIndex:
@@ -40,8 +45,67 @@ def find_bb_touch(df: pd.DataFrame, window=20, dev=2) -> pd.DatetimeIndex:
     return df.index[touch_up | touch_down]
 
 # 5) Support & Resistance (local minima/maxima)
-def find_support_resistance(df: pd.DataFrame, lookback=100) -> pd.DatetimeIndex:
+#    By default each pivot is reported on the bar where it is confirmed
+#    (lookback/2 bars later); causal=False marks the pivot bar itself from a
+#    centered window, which looks ahead.
+def find_support_resistance(df: pd.DataFrame, lookback=100, causal=True) -> pd.DatetimeIndex:
+    if causal:
+        pivot_high, pivot_low = confirmed_pivots(df['High'], df['Low'], *centered_span(lookback))
+        return df.index[pivot_high | pivot_low]
     lows = df['Low'].rolling(lookback, center=True, min_periods=1).min()
     highs = df['High'].rolling(lookback, center=True, min_periods=1).max()
     sr = (df['Low'] == lows) | (df['High'] == highs)
-    return df.index[sr]
\ No newline at end of file
+    return df.index[sr]
+
+# Event type bits used in the scan_events bitmask
+EVENT_RSI = 1
+EVENT_MACD = 2
+EVENT_EMA = 4
+EVENT_BB = 8
+EVENT_SR = 16
+EVENT_NAMES = {
+    EVENT_RSI: 'RSI', EVENT_MACD: 'MACD', EVENT_EMA: 'EMA',
+    EVENT_BB: 'BB', EVENT_SR: 'S/R',
+}
+
+
+def _prev(a: np.ndarray) -> np.ndarray:
+    return np.concatenate(([np.nan], a[:-1]))
+
+
+def scan_events(df: pd.DataFrame, oversold=30, overbought=70, lookback=100,
+                causal=True) -> pd.DataFrame:
+    """
+    All five detectors in one vectorized pass over the add_indicators frame.
+
+    Reuses the RSI, MACD, MACD_sig and BB_upper/BB_lower columns instead of
+    recomputing them; the 12/26 EMA cross is the MACD zero crossing, since
+    MACD = EMA12 - EMA26. The S/R bit is set on the bar a pivot is
+    confirmed (see find_support_resistance), so no detector looks ahead;
+    causal=False restores the centered-window pivots. Returns one row per bar where anything fired: pos (bar
+    position), time and a uint8 mask of EVENT_* bits.
+    """
+    close = df['Close'].to_numpy()
+    rsi = df['RSI'].to_numpy()
+    macd = df['MACD'].to_numpy()
+    sig = df['MACD_sig'].to_numpy()
+    rsi_prev, macd_prev, sig_prev = _prev(rsi), _prev(macd), _prev(sig)
+
+    rsi_evt = ((rsi_prev < oversold) & (rsi >= oversold)) | ((rsi_prev > overbought) & (rsi <= overbought))
+    macd_evt = ((macd_prev < sig_prev) & (macd > sig)) | ((macd_prev > sig_prev) & (macd < sig))
+    ema_evt = ((macd_prev < 0) & (macd > 0)) | ((macd_prev > 0) & (macd < 0))
+    bb_evt = (close >= df['BB_upper'].to_numpy()) | (close <= df['BB_lower'].to_numpy())
+    if causal:
+        pivot_high, pivot_low = confirmed_pivots(df['High'], df['Low'], *centered_span(lookback))
+        sr_evt = pivot_high | pivot_low
+    else:
+        lows = df['Low'].rolling(lookback, center=True, min_periods=1).min().to_numpy()
+        highs = df['High'].rolling(lookback, center=True, min_periods=1).max().to_numpy()
+        sr_evt = (df['Low'].to_numpy() == lows) | (df['High'].to_numpy() == highs)
+
+    mask = (rsi_evt * np.uint8(EVENT_RSI)) | (macd_evt * np.uint8(EVENT_MACD)) \
+        | (ema_evt * np.uint8(EVENT_EMA)) | (bb_evt * np.uint8(EVENT_BB)) \
+        | (sr_evt * np.uint8(EVENT_SR))
+    mask = mask.astype(np.uint8)
+    pos = np.flatnonzero(mask)
+    return pd.DataFrame({'pos': pos, 'time': df.index[pos], 'mask': mask[pos]})
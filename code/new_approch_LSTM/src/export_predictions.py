@@ -5,12 +5,14 @@ from pathlib import Path
 
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 
 import numpy as np
 import pandas as pd
 from tensorflow.keras.models import load_model
 
-from dataset_events import build_event_dataset
+from dataset_cache import cached_event_dataset, dataset_cache
+from feature_cache import default_cache
 from model_events import sum_time  # for custom_objects
 
 def export_predictions(
@@ -19,8 +21,10 @@ def export_predictions(
     model_dir: str = '../models_events',
     out_csv: str = '../outputs/predictions.csv'
 ):
-    # 1) Rebuild the event dataset (X, y, timestamps)
-    X, y_true, times = build_event_dataset(lookback, lookahead)
+    # 1) Event dataset (X, y, timestamps), rebuilt only when the data or parameters change
+    X, y_true, times = cached_event_dataset(lookback, lookahead)
+    print(default_cache().report())
+    print(dataset_cache().report())
 
     # 2) Load the trained model
     model_path = Path(__file__).resolve().parent.parent / model_dir / 'event_model.h5'
@@ -4,6 +4,7 @@ import sys, os
 # Ensure local modules are importable when running as a script
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 
 import tensorflow as tf
 from tensorflow.keras.callbacks import EarlyStopping
@@ -12,13 +13,16 @@ from sklearn.model_selection import train_test_split
 
 from data_prep import load_data
 from indicators import add_indicators
+from feature_cache import default_cache
 from dataset import build_sequences
 from model import lstm_attention_model
+from row_scaler import scaler_path_for
 
 def run_training():
     # Load data and add technical indicators
     df = load_data()                        # no args required
     df = add_indicators(df)
+    print(default_cache().report())
 
     # Feature setup
     feats = ['Close', 'RSI', 'MACD', 'MACD_sig', 'BB_upper', 'BB_lower', 'Volume']
@@ -50,7 +54,8 @@ def run_training():
     os.makedirs(output_dir, exist_ok=True)
     model_path = os.path.join(output_dir, 'fx_lstm_attn.h5')
     model.save(model_path)
-    print(f"Model saved to {model_path}")
+    scaler.save(scaler_path_for(model_path))
+    print(f"Model and scaler saved to {model_path}")
 
     return model, scaler, X_test, y_test
 
@@ -1,6 +1,7 @@
 import sys, os
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 
 import numpy as np
 import pandas as pd
@@ -9,12 +10,13 @@ from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
 from sklearn.model_selection import train_test_split
 from pathlib import Path  
 
-from dataset_events import build_event_dataset
+from dataset_cache import cached_event_dataset
 from model_events import build_event_model
+from sequence_store import write_sequences
 
 
 def run_event_training(lookback=50, lookahead=5, test_size=0.2):
-    X, y, times = build_event_dataset(lookback, lookahead)
+    X, y, times = cached_event_dataset(lookback, lookahead)
     idx = np.arange(len(y))
     train_idx, temp_idx = train_test_split(idx, test_size=test_size, shuffle=False)
     val_idx, test_idx = train_test_split(temp_idx, test_size=0.5, shuffle=False)
@@ -43,8 +45,10 @@ def run_event_training(lookback=50, lookahead=5, test_size=0.2):
     out = Path(__file__).resolve().parent.parent / 'models_events'
     os.makedirs(out, exist_ok=True)
     model.save(out / 'event_model.h5')
-    pd.DataFrame({'time': np.array(times)[test_idx], 'actual': y_test}).to_csv(out / 'y_test_events.csv', index=False)
-    np.save(out / 'X_test_events.npy', X_test)
+    test_times = np.array(times)[test_idx]
+    pd.DataFrame({'time': test_times, 'actual': y_test}).to_csv(out / 'y_test_events.csv', index=False)
+    write_sequences(out / 'X_test_events', X_test, y_test, test_times.astype('datetime64[ns]'),
+                    meta={'lookback': lookback, 'lookahead': lookahead})
     print(f"Saved event model & data to {out}")
 
 if __name__ == '__main__':
@@ -4,6 +4,7 @@ import sys, os
 from pathlib import Path
 if '__file__' in globals():
     sys.path.insert(0, os.path.dirname(__file__))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
 
 import numpy as np
 import pandas as pd
@@ -13,21 +14,18 @@ from tensorflow.keras.models import load_model
 
 from data_prep import load_data
 from indicators import add_indicators
-from events import (
-    find_rsi_events,
-    find_macd_crossovers,
-    find_ema_crosses,
-    find_bb_touch,
-    find_support_resistance
-)
+from events import scan_events, EVENT_NAMES
 from model_events import sum_time
-from dataset_events import build_event_dataset
+from dataset_cache import cached_event_dataset, dataset_cache
+from feature_cache import default_cache
 
 # 1) Load and indicator-engineer full price series
 df = add_indicators(load_data())
 
-# 2) Build event dataset and model predictions
-X_events, y_events, event_times = build_event_dataset()
+# 2) Event dataset (from the dataset cache; built from `df` on a miss) and model predictions
+X_events, y_events, event_times = cached_event_dataset(df=df)
+print(default_cache().report())
+print(dataset_cache().report())
 models_dir = Path(__file__).resolve().parent.parent / 'models_events'
 event_model = load_model(
     models_dir / 'event_model.h5',
@@ -38,6 +36,9 @@ signals = probs > 0.5
 buy_times = [t for t, s in zip(event_times, signals) if s]
 sell_times = [t for t, s in zip(event_times, signals) if not s]
 
+# Detector hits, one marker trace per event type
+event_table = scan_events(df)
+
 # 3) Prepare indicator series
 ema_fast = df['Close'].ewm(span=12, adjust=False).mean()
 ema_slow = df['Close'].ewm(span=26, adjust=False).mean()
@@ -89,6 +90,14 @@ fig.add_trace(go.Scatter(
     name='Sell Signal'
 ), row=1, col=1)
 
+for bit, label in EVENT_NAMES.items():
+    hits = event_table[(event_table['mask'] & bit) > 0]
+    fig.add_trace(go.Scatter(
+        x=hits['time'], y=df['Close'].to_numpy()[hits['pos'].to_numpy()],
+        mode='markers', marker={'size': 4, 'symbol': 'circle-open'},
+        name=f'{label} event', visible='legendonly'
+    ), row=1, col=1)
+
 # --- Row 2: RSI ---
 fig.add_trace(go.Scatter(
     x=df.index, y=rsi_line,